@@ -0,0 +1,86 @@
+"""Compares per-account page load time and browser memory between the default and lean Firefox profiles.
+
+Run from the repository root:
+  python -m benchmarks.browserProfiles --rounds 3
+
+Each profile gets a fresh driver; every account page is loaded `rounds` times
+and timed from driver.get() until the positions and orders tabs are present,
+which is the point where scrapeAccount starts reading. RSS is measured over
+the geckodriver/Firefox process tree after each load.
+"""
+from core.scraper import makeDriver, processTreeRSS, PooledDriver, waitForAccountTabs
+from main import testData
+import argparse
+import statistics
+import time
+
+
+PROFILES = {
+  'default': {'headless': True},
+  'lean': {'headless': True, 'lean': True}
+}
+
+
+def benchmarkProfile(name, urls, rounds) -> dict:
+  launchStart = time.perf_counter()
+  driver = makeDriver(**PROFILES[name])
+  launchTime = time.perf_counter() - launchStart
+  pid = PooledDriver(0, driver).pid()
+
+  loadTimes = []
+  rss = []
+  try:
+    for _ in range(rounds):
+      for url in urls:
+        start = time.perf_counter()
+        driver.get(url)
+        waitForAccountTabs(driver)
+        loadTimes.append(time.perf_counter() - start)
+        if pid:
+          rss.append(processTreeRSS(pid))
+  finally:
+    driver.quit()
+
+  rss = [value for value in rss if value is not None]
+  return {
+    'profile': name,
+    'launch': launchTime,
+    'pages': len(loadTimes),
+    'meanLoad': statistics.mean(loadTimes),
+    'medianLoad': statistics.median(loadTimes),
+    'maxLoad': max(loadTimes),
+    'meanRSS': statistics.mean(rss) if rss else None,
+    'peakRSS': max(rss) if rss else None
+  }
+
+
+def printResults(results) -> None:
+  print(f"{'profile':<10}{'launch s':>10}{'pages':>8}{'mean s':>9}{'median s':>10}{'max s':>8}"
+        f"{'mean MB':>10}{'peak MB':>10}")
+  for row in results:
+    memory = (f"{row['meanRSS']:>10.0f}{row['peakRSS']:>10.0f}" if row['meanRSS'] is not None
+              else f"{'n/a':>10}{'n/a':>10}")
+    print(f"{row['profile']:<10}{row['launch']:>10.2f}{row['pages']:>8}{row['meanLoad']:>9.2f}"
+          f"{row['medianLoad']:>10.2f}{row['maxLoad']:>8.2f}{memory}")
+
+  if len(results) == 2:
+    default, lean = results
+    print(f"\nLean profile: {default['meanLoad'] / lean['meanLoad']:.2f}x faster mean load", end='')
+    if default['peakRSS'] and lean['peakRSS']:
+      print(f", {default['peakRSS'] - lean['peakRSS']:.0f} MB less peak RSS", end='')
+    print()
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--rounds', type=int, default=3, help='times each account page is loaded per profile')
+  parser.add_argument('urls', nargs='*', help='account URLs to load (default: main.testData())')
+  args = parser.parse_args()
+
+  urls = args.urls or testData()
+  results = [benchmarkProfile(name, urls, args.rounds) for name in PROFILES]
+  printResults(results)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,120 @@
+"""Memory report for holding many positions: dict-backed classes vs the __slots__ classes vs columns.
+
+Run from the repository root:
+  python -m benchmarks.classMemory --positions 1000000
+
+Asset and order type strings are decoded fresh for every record, the way the
+parsers produce them, so the interning in core.classes is measured too. The
+columnar figure is the size of the PositionFrame arrays for the same data.
+"""
+from core.classes import Position, Order, Trader
+from core.positionFrame import PositionFrame
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+
+ASSETS = ['BTC', 'ETH', 'SOL', 'LINK', 'ARB', 'DOGE', 'AVAX', 'UNI']
+ORDER_TYPES = ['Limit', 'Stop Loss', 'Take Profit']
+
+
+# The previous, dict-backed definitions, kept here as the baseline
+
+class DictPosition:
+  def __init__(self, asset, leverage, short, pnl, pnlPerc, collateral, liq, entry) -> None:
+    self.asset = asset
+    self.leverage = leverage
+    self.short = short
+    self.pnl = pnl
+    self.pnlPerc = pnlPerc
+    self.collateral = collateral
+    self.size = int(collateral * leverage)
+    self.liq = liq
+    self.entry = entry
+
+
+class DictOrder:
+  def __init__(self, asset, short, orderType, size, trigger) -> None:
+    self.asset = asset
+    self.short = short
+    self.orderType = orderType
+    self.size = size
+    self.trigger = trigger
+
+
+class DictTrader:
+  def __init__(self, traderID, url) -> None:
+    self.traderID = traderID
+    self.url = url
+    self.positions = []
+    self.orders = []
+
+
+def fresh(text) -> str:
+  """A new string object with the same value, as a regex group or JSON decode would return."""
+  return text.encode().decode()
+
+
+def build(positionCls, orderCls, traderCls, positions, perTrader, seed) -> list:
+  rng = random.Random(seed)
+  traders = []
+  for traderID in range(positions // perTrader):
+    trader = traderCls(traderID, f'https://app.gmx.io/#/accounts/0x{traderID:040x}?network=arbitrum&v=2')
+    for _ in range(perTrader):
+      leverage = round(rng.uniform(1, 50), 2)
+      entry = rng.uniform(1, 70000)
+      trader.positions.append(positionCls(fresh(rng.choice(ASSETS)), leverage, rng.random() < 0.5,
+                                          rng.uniform(-1e4, 1e4), rng.uniform(-50, 50), rng.uniform(100, 1e5),
+                                          entry * (1 - 1 / leverage), entry))
+    trader.orders.append(orderCls(fresh(rng.choice(ASSETS)), rng.random() < 0.5, fresh(rng.choice(ORDER_TYPES)),
+                                  rng.uniform(-5e4, 5e4), rng.uniform(1, 70000)))
+    traders.append(trader)
+  return traders
+
+
+def measure(label, fn) -> dict:
+  gc.collect()
+  tracemalloc.start()
+  start = time.perf_counter()
+  result = fn()
+  elapsed = time.perf_counter() - start
+  current, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {'label': label, 'result': result, 'current': current, 'peak': peak, 'seconds': elapsed}
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--positions', type=int, default=1_000_000)
+  parser.add_argument('--per-trader', type=int, default=10, help='positions per trader (one order each)')
+  args = parser.parse_args()
+
+  rows = []
+  legacy = measure('dict-backed classes',
+                   lambda: build(DictPosition, DictOrder, DictTrader, args.positions, args.per_trader, 1))
+  rows.append(legacy)
+  del legacy['result']
+
+  compact = measure('__slots__ classes',
+                    lambda: build(Position, Order, Trader, args.positions, args.per_trader, 1))
+  rows.append(compact)
+
+  frame = measure('PositionFrame columns', lambda: PositionFrame.from_traders(compact['result']))
+  columns = ('asset', 'leverage', 'short', 'pnl', 'collateral', 'size', 'liq', 'entry', 'offsets', 'trader_index')
+  frame['current'] = sum(getattr(frame['result'], name).nbytes for name in columns)
+  rows.append(frame)
+
+  positions = args.positions // args.per_trader * args.per_trader
+  print(f'{positions:,} positions, {positions // args.per_trader:,} traders\n')
+  print(f"{'representation':<24}{'retained MB':>13}{'bytes/pos':>11}{'peak MB':>10}{'build s':>9}")
+  for row in rows:
+    print(f"{row['label']:<24}{row['current'] / 2**20:>13.1f}{row['current'] / positions:>11.0f}"
+          f"{row['peak'] / 2**20:>10.1f}{row['seconds']:>9.2f}")
+  print(f"\n__slots__ classes retain {rows[0]['current'] / rows[1]['current']:.2f}x less memory "
+        f"than the dict-backed ones")
+
+
+if __name__ == '__main__':
+  main()
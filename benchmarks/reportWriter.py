@@ -0,0 +1,94 @@
+"""Render cost of the HTML report: Rich's record-and-export route against the streaming report writer.
+
+Run from the repository root:
+  python -m benchmarks.reportWriter --traders 1000 10000 50000
+
+Traders are synthetic, with orders clustered around a few price levels so
+the hotspot tables grow with the trader count, as they do on busy days. The
+old route prints every table into a recording Console, exports it with
+save_html, then reads the file back to patch the <body> tag; the writer
+renders the same analysis straight to HTML, JSON or CSV.
+"""
+from core.classes import Position, Order, Trader
+from rich.console import Console
+import core.sentimentAnalysis as sentimentAnalysis
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+
+ASSETS = {'BTC': 65000.0, 'ETH': 3200.0, 'SOL': 150.0, 'LINK': 15.0}
+ORDER_TYPES = ['Limit', 'Stop Loss', 'Take Profit']
+
+
+def build(count, seed) -> list:
+  rng = random.Random(seed)
+  traders = []
+  for traderID in range(count):
+    trader = Trader(traderID, f'https://app.gmx.io/#/accounts/0x{traderID:040x}?network=arbitrum&v=2')
+    for _ in range(rng.randint(1, 4)):
+      asset, price = rng.choice(list(ASSETS.items()))
+      leverage = round(rng.uniform(1, 60), 2)
+      short = rng.random() < 0.5
+      entry = price * rng.uniform(0.9, 1.1)
+      trader.addPosition(Position(asset, leverage, short, rng.uniform(-1e4, 1e4), rng.uniform(-50, 50),
+                                  rng.uniform(100, 1e5), entry * (1 + (1 if short else -1) / leverage), entry))
+    for _ in range(rng.randint(0, 3)):
+      asset, price = rng.choice(list(ASSETS.items()))
+      level = price * rng.choice([0.9, 0.95, 1.05, 1.1])
+      trader.addOrder(Order(asset, rng.random() < 0.5, rng.choice(ORDER_TYPES), rng.uniform(-5e4, 5e4),
+                            level * rng.uniform(0.995, 1.005)))
+    traders.append(trader)
+  return traders
+
+
+def richExport(analysis, path) -> None:
+  """The report route before the writer: record the console output, export it, patch the <body> tag."""
+  console = Console(record=True, file=io.StringIO(), width=200)
+  previous = sentimentAnalysis.console
+  sentimentAnalysis.console = console
+  try:
+    sentimentAnalysis.print_analysis(analysis)
+  finally:
+    sentimentAnalysis.console = previous
+  console.save_html(path)
+  with open(path, 'r+', encoding='utf-8') as file:
+    content = file.read().replace("<body>", "<body style='color: white; background-color: black;'>")
+    file.seek(0)
+    file.write(content)
+    file.truncate()
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--traders', type=int, nargs='+', default=[1000, 10000, 50000])
+  args = parser.parse_args()
+
+  outputDir = tempfile.mkdtemp(prefix='reportWriter')
+  sentimentAnalysis.OUTPUT_DIR = outputDir
+
+  print(f"{'traders':>8}{'rows':>9}{'rich s':>9}{'html s':>9}{'json s':>9}{'csv s':>9}{'speed-up':>10}{'html MB':>9}")
+  for count in args.traders:
+    analysis = sentimentAnalysis.compute_analysis(build(count, 1), prices=dict(ASSETS))
+    rows = sum(len(table[3]) for table in sentimentAnalysis.report_tables(analysis))
+
+    start = time.perf_counter()
+    richExport(analysis, os.path.join(outputDir, 'rich.html'))
+    richTime = time.perf_counter() - start
+
+    # Each format end to end, including formatting the table cells
+    seconds = {}
+    for extension in ('html', 'json', 'csv'):
+      start = time.perf_counter()
+      sentimentAnalysis.write_report(analysis, formats=(extension,))
+      seconds[extension] = time.perf_counter() - start
+    htmlSize = os.path.getsize(os.path.join(outputDir, 'new.html'))
+    print(f"{count:>8,}{rows:>9,}{richTime:>9.2f}{seconds['html']:>9.2f}{seconds['json']:>9.2f}"
+          f"{seconds['csv']:>9.2f}{richTime / seconds['html']:>9.1f}x{htmlSize / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+  main()
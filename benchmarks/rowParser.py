@@ -0,0 +1,183 @@
+"""Micro-benchmark of the positions row parser: the single-pass fast path against the per-cell fallback.
+
+Run from the repository root:
+  python -m benchmarks.rowParser
+  python -m benchmarks.rowParser --capture data/pages
+  python -m benchmarks.rowParser --pages data/pages
+  python -m benchmarks.rowParser --synthetic
+
+The default corpus is benchmarks/corpus/positionRows.json: the cell texts
+(td.innerText) of real positions rows, captured from account pages stored by
+main.py --save-pages. --capture DIR rebuilds that file from a fresh
+--save-pages directory and --pages DIR benchmarks such a directory directly.
+The corpus file is not shipped: until it has been captured, a plain run exits
+with the steps to create it rather than timing made-up rows. --synthetic opts
+into rows rebuilt from the positions in the last HTML report (data/new.html),
+written out in the account table's innerText layout, plus a few odd rows that
+only the fallback accepts; those only approximate what the site renders.
+"""
+from core.parser import positionFromCells, cleanPositionBlock, POSITION_ROW, CELL_SEPARATOR
+from core.classes import Position
+from core.htmlParser import tableRowsFromHTML
+from core.routes import accountRoutes
+import argparse
+import json
+import os
+import re
+import time
+
+
+REPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'new.html')
+
+# Captured positions rows, one list of cell texts per row
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'corpus', 'positionRows.json')
+
+# Liquidation table rows of the HTML report: asset, leverage, size, pnl, collateral, liq price, current price.
+# The first pattern matches reports written by core.sentimentAnalysis.write_report, the second Rich's HTML export
+REPORT_ROWS = [
+  re.compile(r'<tr><td>\d+</td><td>(\w+)</td><td>([\d.]+)x</td><td>\$([\d.]+)</td><td>\$(-?[\d.]+)</td>'
+             r'<td>\$([\d.]+)</td><td>\$([\d.]+)</td><td>\$([\d.]+)</td>'),
+  re.compile(r'│<span[^>]*>\s*\d+ </span>│<span[^>]*>\s*(\w+) </span>│<span[^>]*>\s*([\d.]+)x </span>'
+             r'│<span[^>]*>\s*\$([\d.]+) </span>│<span[^>]*>\s*\$(-?[\d.]+) </span>'
+             r'│<span[^>]*>\s*\$([\d.]+) </span>│<span[^>]*>\s*\$([\d.]+) </span>'
+             r'│<span[^>]*>\s*\$([\d.]+) </span>'),
+]
+
+# Rows the strict pattern rejects on purpose: no leverage yet, a stray '$' before a price
+ODD_ROWS = [
+  ['ETH\nLong', '$20,000.00', '$1,650.20\n+$50.20 (2.51%)', '$1,600.00\n(0.5 ETH)', '$3,120.55',
+   '$3,180.00', '$2,870.10'],
+  ['BTC\n3.00x Short', '$9,000.00', '$2,900.00\n-$100.00 (-3.33%)', 'US$ $3,000.00', '$67,000.00',
+   '$67,400.00', '—'],
+  ['SOL\n40.00x Long', '$40,000.00', '$900.00\n-$100.00 (-10.00%)', '$1,000.00', '$150.25',
+   '$148.00', '$ $146.50'],
+]
+
+
+def money(value) -> str:
+  sign = '-' if value < 0 else ''
+  return f'{sign}${abs(value):,.2f}'
+
+
+def reportCorpus(path) -> list[list[str]]:
+  with open(path, 'r', encoding='utf-8') as file:
+    html = file.read()
+
+  rows = []
+  matches = [match for pattern in REPORT_ROWS for match in pattern.findall(html)]
+  for asset, leverage, size, pnl, collateral, liq, current in matches:
+    leverage, size, pnl, collateral = float(leverage), float(size), float(pnl), float(collateral)
+    short = float(liq) > float(current)
+    pnlSign = '-' if pnl < 0 else '+'
+    rows.append([
+      f"{asset}\n{leverage:.2f}x {'Short' if short else 'Long'}",
+      money(size),
+      f'{money(collateral + pnl)}\n{pnlSign}${abs(pnl):,.2f} ({pnlSign}{abs(pnl) / collateral * 100:.2f}%)',
+      f'{money(collateral)}\n({collateral / float(current):.4f} {asset})',
+      money(float(current)),
+      money(float(current)),
+      money(float(liq))
+    ])
+  return rows + ODD_ROWS
+
+
+def pagesCorpus(pagesDir) -> list[list[str]]:
+  with open(os.path.join(pagesDir, 'accounts.json'), 'r', encoding='utf-8') as file:
+    index = json.load(file)
+
+  rows = []
+  for tabs in index.values():
+    if tabs.get('positions'):
+      with open(os.path.join(pagesDir, tabs['positions']), 'r', encoding='utf-8') as file:
+        rows.extend(tableRowsFromHTML(file.read(), accountRoutes['POS_TABLE']))
+  return rows
+
+
+def captureCorpus(pagesDir, path=CORPUS_PATH) -> list[list[str]]:
+  """Writes the positions rows of a --save-pages directory to the corpus file and returns them."""
+  rows = pagesCorpus(pagesDir)
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  with open(path, 'w', encoding='utf-8') as file:
+    json.dump(rows, file, indent=1, ensure_ascii=False)
+    file.write('\n')
+  return rows
+
+
+def loadCorpus(path=CORPUS_PATH) -> list[list[str]]:
+  with open(path, 'r', encoding='utf-8') as file:
+    return json.load(file)
+
+
+def fallbackPosition(cells) -> Position:
+  """The per-cell route every row took before the fast path existed."""
+  cargo = cleanPositionBlock([cells[0], cells[2], cells[3], cells[4], cells[6]])
+  return Position(cargo['asset'], cargo['leverage'], cargo['short'], cargo['pnl'], cargo['pnlPerc'],
+                  cargo['collateral'], cargo['liq'], cargo['entry'])
+
+
+def usesFastPath(cells) -> bool:
+  return POSITION_ROW.fullmatch(CELL_SEPARATOR.join((cells[0], cells[2], cells[3], cells[4], cells[6]))) is not None
+
+
+def timeParser(parse, corpus, repeat, runs=5) -> float:
+  """Best of `runs` timings of `repeat` passes over the corpus."""
+  best = float('inf')
+  for _ in range(runs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+      for cells in corpus:
+        parse(cells)
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--pages', metavar='DIR', help='account pages stored with main.py --save-pages')
+  parser.add_argument('--capture', metavar='DIR',
+                      help='rewrite the captured corpus from account pages stored with --save-pages, then run on it')
+  parser.add_argument('--synthetic', action='store_true', help='use rows rebuilt from the last HTML report')
+  parser.add_argument('--repeat', type=int, default=1000, help='passes over the corpus per timing run')
+  args = parser.parse_args()
+
+  if args.capture:
+    corpus = captureCorpus(args.capture)
+    print(f'Captured {len(corpus)} rows into {CORPUS_PATH}\n')
+  elif args.pages:
+    corpus = pagesCorpus(args.pages)
+  elif args.synthetic:
+    corpus = reportCorpus(REPORT_PATH)
+  elif os.path.exists(CORPUS_PATH):
+    corpus = loadCorpus()
+  else:
+    raise SystemExit(f'No captured corpus at {CORPUS_PATH}. Store some account pages with\n'
+                     f'  python main.py --save-pages data/pages\n'
+                     f'then capture their positions rows with\n'
+                     f'  python -m benchmarks.rowParser --capture data/pages\n'
+                     f'or pass --synthetic to time rows rebuilt from the last HTML report instead.')
+  if not corpus:
+    print('No position rows found')
+    return
+
+  # Both paths must agree wherever the fast path applies
+  mismatches = sum(positionFromCells(cells).toDict() != fallbackPosition(cells).toDict() for cells in corpus)
+  fastRows = sum(usesFastPath(cells) for cells in corpus)
+
+  print(f'{len(corpus)} rows x {args.repeat} passes, {fastRows} on the fast path, '
+        f'{mismatches} mismatches between paths\n')
+
+  common = [cells for cells in corpus if usesFastPath(cells)]
+  for label, rows in (('all rows', corpus), ('fast-path rows', common)):
+    if not rows:
+      continue
+    count = len(rows) * args.repeat
+    fastTime = timeParser(positionFromCells, rows, args.repeat)
+    slowTime = timeParser(fallbackPosition, rows, args.repeat)
+    print(f'{label}:')
+    print(f'  positionFromCells: {count / fastTime:>10,.0f} rows/s')
+    print(f'  clean* helpers:    {count / slowTime:>10,.0f} rows/s')
+    print(f'  speed-up:          {slowTime / fastTime:>10.2f}x')
+
+
+if __name__ == '__main__':
+  main()
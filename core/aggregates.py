@@ -0,0 +1,314 @@
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from sortedcontainers import SortedList
+
+from .sentimentAnalysis import hotspot_windows
+
+
+class AggregateState:
+    """Running market statistics that are updated one Trader at a time.
+
+    Feed it Traders as the scraper yields them (add_trader), swap in a
+    re-scraped account with update_trader or drop one with remove_trader, and
+    call report() whenever a view is needed; the report uses the same keys as
+    compute_analysis(). Each operation costs O(positions and orders of that
+    trader, times log n): counts and sums are running totals, rankings, the
+    PnL median and per-asset order triggers are kept in sorted lists, and
+    liquidation checks are kept per position and redone only for assets whose
+    price changed. Hotspot clusters are cached per asset and recomputed by
+    report() only for assets whose orders changed since the last report.
+
+    Traders are identified by URL. Each one occupies a slot, which is what
+    the rankings and hotspot rows refer to; an updated trader keeps its slot.
+    """
+
+    def __init__(self, prices=None, threshold_percent=5, price_range_percent=3, min_traders=3, top_n=15):
+        self.threshold_percent = threshold_percent
+        self.price_range_percent = price_range_percent
+        self.min_traders = min_traders
+        self.top_n = top_n
+        self.lock = threading.Lock()
+
+        self.slots = []
+        self.free_slots = []
+        self.slot_of = {}
+
+        self.long_count = self.short_count = 0
+        self.long_size = self.short_size = 0
+        self.pnl_sum = 0.0
+        self.pnl_values = SortedList()
+        self.collateral_sum = 0.0
+        # Leverage distribution only looks at positions up to 50x
+        self.leverages = SortedList()
+        self.leverage_sum = 0.0
+        self.assets = defaultdict(lambda: {'longs': 0, 'shorts': 0, 'leverage_sum': 0.0, 'pnl_sum': 0.0})
+        self.pending_orders = defaultdict(lambda: {'longs': 0, 'shorts': 0, 'orders': {}})
+
+        # Rankings as (sort key, slot); the slot breaks ties in arrival order like a stable sort
+        self.profit_rank = SortedList()
+        self.loss_rank = SortedList()
+        self.size_rank = SortedList()
+        self.leverage_rank = SortedList()
+        self.rank_keys = {}
+
+        # Per asset: (trigger, sequence, slot, short, order), ascending by trigger price
+        self.order_book = defaultdict(SortedList)
+        self.order_keys = {}
+        self.sequence = itertools.count()
+        # Hotspot clusters per asset as of the last report, and assets whose orders changed since
+        self.hotspots = {}
+        self.stale_hotspots = set()
+
+        self.prices = {}
+        self.asset_positions = defaultdict(dict)
+        self.at_risk = {}
+        if prices:
+            self.update_prices(prices)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    @property
+    def traders(self):
+        return [trader for trader in self.slots if trader is not None]
+
+    # Trader operations found below
+
+    def add_trader(self, trader):
+        """Adds a trader; a URL that is already present is treated as update_trader."""
+        with self.lock:
+            slot = self.slot_of.get(trader.url)
+            if slot is not None:
+                self.unfold(slot)
+            elif self.free_slots:
+                slot = self.free_slots.pop()
+            else:
+                slot = len(self.slots)
+                self.slots.append(None)
+            self.fold(slot, trader)
+
+    def update_trader(self, trader):
+        self.add_trader(trader)
+
+    def remove_trader(self, trader_or_url):
+        url = getattr(trader_or_url, 'url', trader_or_url)
+        with self.lock:
+            slot = self.slot_of.get(url)
+            if slot is None:
+                return
+            self.unfold(slot)
+            self.free_slots.append(slot)
+
+    def fold(self, slot, trader):
+        self.slots[slot] = trader
+        self.slot_of[trader.url] = slot
+
+        pnl_total = 0.0
+        max_size = 0.0
+        max_leverage = 0.0
+        for index, pos in enumerate(trader.positions):
+            self.count_position(pos, 1)
+            pnl_total += pos.pnl
+            max_size = max(max_size, pos.size)
+            if pos.leverage <= 50:
+                max_leverage = max(max_leverage, pos.leverage)
+            self.asset_positions[pos.asset][(slot, index)] = pos
+            self.check_liquidation(slot, index, pos)
+
+        keys = ((-pnl_total, slot), (pnl_total, slot), (-max_size, slot), (-max_leverage, slot))
+        self.rank_keys[slot] = keys
+        for rank, key in zip(self.rankings(), keys):
+            rank.add(key)
+
+        order_keys = []
+        for order in trader.orders:
+            pending = self.pending_orders[order.asset]
+            pending['shorts' if order.short else 'longs'] += 1
+            pending['orders'][(slot, len(order_keys))] = order
+
+            key = (order.trigger, next(self.sequence), slot, order.short, order)
+            self.order_book[order.asset].add(key)
+            self.stale_hotspots.add(order.asset)
+            order_keys.append(key)
+        self.order_keys[slot] = order_keys
+
+    def unfold(self, slot):
+        trader = self.slots[slot]
+        for index, pos in enumerate(trader.positions):
+            self.count_position(pos, -1)
+            del self.asset_positions[pos.asset][(slot, index)]
+            if not self.asset_positions[pos.asset]:
+                del self.asset_positions[pos.asset]
+            self.at_risk.pop((slot, index), None)
+
+        for rank, key in zip(self.rankings(), self.rank_keys.pop(slot)):
+            rank.remove(key)
+
+        for index, key in enumerate(self.order_keys.pop(slot)):
+            order = key[4]
+            pending = self.pending_orders[order.asset]
+            pending['shorts' if order.short else 'longs'] -= 1
+            del pending['orders'][(slot, index)]
+            if not pending['orders']:
+                del self.pending_orders[order.asset]
+
+            self.order_book[order.asset].remove(key)
+            self.stale_hotspots.add(order.asset)
+            if not self.order_book[order.asset]:
+                del self.order_book[order.asset]
+
+        del self.slot_of[trader.url]
+        self.slots[slot] = None
+
+    def rankings(self):
+        return self.profit_rank, self.loss_rank, self.size_rank, self.leverage_rank
+
+    def count_position(self, pos, sign):
+        """Adds (sign=1) or subtracts (sign=-1) one position from the running totals."""
+        size = pos.size
+        if pos.short:
+            self.short_count += sign
+            self.short_size += sign * size
+        else:
+            self.long_count += sign
+            self.long_size += sign * size
+        self.pnl_sum += sign * pos.pnl
+        self.collateral_sum += sign * pos.collateral
+        if sign > 0:
+            self.pnl_values.add(pos.pnl)
+        else:
+            self.pnl_values.remove(pos.pnl)
+
+        if pos.leverage <= 50:
+            self.leverage_sum += sign * pos.leverage
+            if sign > 0:
+                self.leverages.add(pos.leverage)
+            else:
+                self.leverages.remove(pos.leverage)
+
+        if pos.asset != "Unknown":
+            stats = self.assets[pos.asset]
+            stats['shorts' if pos.short else 'longs'] += sign
+            stats['leverage_sum'] += sign * pos.leverage
+            stats['pnl_sum'] += sign * pos.pnl
+            if stats['longs'] + stats['shorts'] == 0:
+                del self.assets[pos.asset]
+
+    # Prices and liquidation risk found below
+
+    def update_prices(self, prices):
+        """Merges in live prices and redoes the liquidation check for assets whose price changed."""
+        with self.lock:
+            changed = [asset for asset, price in prices.items() if self.prices.get(asset) != price]
+            self.prices.update(prices)
+            for asset in changed:
+                for (slot, index), pos in self.asset_positions.get(asset, {}).items():
+                    self.check_liquidation(slot, index, pos)
+
+    def check_liquidation(self, slot, index, pos):
+        self.at_risk.pop((slot, index), None)
+        price = self.prices.get(pos.asset)
+        if pos.liq is None or price is None:
+            return
+
+        difference = abs((pos.liq - price) / price) * 100
+        if difference <= self.threshold_percent:
+            self.at_risk[(slot, index)] = (price, difference)
+
+    # Reporting found below
+
+    def refresh_hotspots(self):
+        """Recomputes the cached hotspot clusters of assets whose orders changed since the last call."""
+        for asset in self.stale_hotspots:
+            self.hotspots.pop(asset, None)
+            book = self.order_book.get(asset)
+            if not book:
+                continue
+            rows = [(trigger, slot, short, order) for trigger, _, slot, short, order in book]
+            clusters = hotspot_windows([row[0] for row in rows], rows, self.slots,
+                                       self.price_range_percent, self.min_traders)
+            if clusters:
+                self.hotspots[asset] = clusters
+        self.stale_hotspots.clear()
+
+    def ranked(self, rank, n, negate=False):
+        return [(self.slots[slot], float(-value if negate else value)) for value, slot in rank[:n]]
+
+    def median_pnl(self):
+        n = len(self.pnl_values)
+        if n % 2:
+            return self.pnl_values[n // 2]
+        return (self.pnl_values[n // 2 - 1] + self.pnl_values[n // 2]) / 2
+
+    def report(self):
+        """A snapshot of every statistic so far; safe to call while Traders are still being added."""
+        with self.lock:
+            positions = self.long_count + self.short_count
+            long_ratio = self.long_count / self.short_count if self.short_count else np.inf
+            size_ratio = self.long_size / self.short_size if self.short_size else np.inf
+
+            asset_data = {}
+            for asset, stats in self.assets.items():
+                count = stats['longs'] + stats['shorts']
+                asset_data[asset] = {
+                    'longs': stats['longs'],
+                    'shorts': stats['shorts'],
+                    'positions': count,
+                    'average_leverage': stats['leverage_sum'] / count,
+                    'average_pnl': stats['pnl_sum'] / count,
+                }
+
+            self.refresh_hotspots()
+            hotspots = {asset: self.hotspots[asset] for asset in self.order_book if asset in self.hotspots}
+
+            risk_positions = []
+            for (slot, index), (price, difference) in sorted(self.at_risk.items()):
+                trader = self.slots[slot]
+                pos = trader.positions[index]
+                risk_positions.append({
+                    "trader_id": trader.traderID,
+                    "trader_url": trader.url,
+                    "asset": pos.asset,
+                    "leverage": pos.leverage,
+                    "size": pos.size,
+                    "pnl": pos.pnl,
+                    "collateral": pos.collateral,
+                    "liq_price": pos.liq,
+                    "current_price": price,
+                    "difference_percent": difference
+                })
+
+            return {
+                "generated_at": time.time(),
+                "traders": len(self.slot_of),
+                "positions": positions,
+                "long_vs_short": (self.long_count, self.short_count, long_ratio),
+                "long_vs_short_size": (self.long_size, self.short_size, size_ratio),
+                "leverage_dist": {
+                    'average_leverage': self.leverage_sum / len(self.leverages),
+                    'max_leverage': self.leverages[-1]
+                } if self.leverages else None,
+                "pnl_stats": {
+                    'average_pnl': self.pnl_sum / positions,
+                    'median_pnl': self.median_pnl()
+                } if positions else None,
+                "collateral_dist": {
+                    'total_collateral': self.collateral_sum,
+                    'average_collateral': self.collateral_sum / positions
+                } if positions else None,
+                "top_profitable_traders": self.ranked(self.profit_rank, self.top_n, negate=True),
+                "top_losing_traders": self.ranked(self.loss_rank, self.top_n),
+                "largest_position_holders": self.ranked(self.size_rank, self.top_n, negate=True),
+                "top_leveraged_traders": self.ranked(self.leverage_rank, self.top_n, negate=True),
+                "asset_data": asset_data,
+                "pending_orders": {asset: {'longs': data['longs'], 'shorts': data['shorts'],
+                                           'orders': [data['orders'][key] for key in sorted(data['orders'])]}
+                                   for asset, data in self.pending_orders.items()},
+                "hotspots": hotspots,
+                "prices": dict(self.prices),
+                "risk_positions": risk_positions,
+            }
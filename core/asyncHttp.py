@@ -0,0 +1,141 @@
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+import asyncio
+import random
+import threading
+import time
+import requests
+
+
+# Requests per second and burst size allowed per host; CoinGecko's free tier wants ~1 call every 3s
+HOST_RATES = {
+  'api.coingecko.com': (1 / 3, 1)
+}
+DEFAULT_RATE = (10, 10)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+  """Async token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+  def __init__(self, rate, capacity) -> None:
+    self.rate = rate
+    self.capacity = capacity
+    self.tokens = capacity
+    self.updated = time.monotonic()
+    self.lock = asyncio.Lock()
+
+  async def acquire(self):
+    async with self.lock:
+      while True:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+          self.tokens -= 1
+          return
+        await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncHttpClient:
+  """Bounded-concurrency GETs with per-host token-bucket rate limits and jittered exponential backoff.
+
+  Requests go through a pooled requests.Session on worker threads, so the event
+  loop never blocks on I/O. Buckets are created lazily, one per host, and keep
+  their state when the client is reused from a later event loop. Its asyncio
+  primitives belong to one loop at a time, so a client must not be shared by
+  loops running concurrently (use one client per loop, or submit all of its
+  work to one LoopThread); doing so raises RuntimeError.
+  """
+
+  def __init__(self, concurrency=8, hostRates=None, retries=3, backoff=0.5, timeout=15, session=None) -> None:
+    self.concurrency = concurrency
+    self.hostRates = dict(HOST_RATES)
+    self.hostRates.update(hostRates or {})
+    self.retries = retries
+    self.backoff = backoff
+    self.timeout = timeout
+    self.session = session or requests.Session()
+    self.semaphore = None
+    self.buckets = {}
+    self.loop = None
+    self.loopLock = threading.Lock()
+
+  def bucketFor(self, host) -> TokenBucket:
+    if host not in self.buckets:
+      self.buckets[host] = TokenBucket(*self.hostRates.get(host, DEFAULT_RATE))
+    return self.buckets[host]
+
+  def bindLoop(self):
+    # asyncio primitives belong to one loop; keep token counts but rebuild them when the loop changes
+    loop = asyncio.get_running_loop()
+    with self.loopLock:
+      if loop is self.loop:
+        return
+      if self.loop is not None and self.loop.is_running():
+        raise RuntimeError('AsyncHttpClient is already in use on another running event loop')
+      self.loop = loop
+      self.semaphore = asyncio.Semaphore(self.concurrency)
+      for bucket in self.buckets.values():
+        bucket.lock = asyncio.Lock()
+
+  async def get(self, url) -> requests.Response:
+    self.bindLoop()
+    bucket = self.bucketFor(urlsplit(url).hostname)
+
+    for attempt in range(self.retries + 1):
+      await bucket.acquire()
+      try:
+        async with self.semaphore:
+          response = await asyncio.to_thread(self.session.get, url, timeout=self.timeout)
+        if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+          response.raise_for_status()
+          return response
+      except requests.ConnectionError:
+        if attempt == self.retries:
+          raise
+      except requests.Timeout:
+        if attempt == self.retries:
+          raise
+      # Full jitter: anywhere between 0 and the exponential ceiling
+      await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+  async def getJSON(self, url):
+    response = await self.get(url)
+    return response.json()
+
+  async def gatherJSON(self, urls) -> list:
+    return await asyncio.gather(*(self.getJSON(url) for url in urls))
+
+
+class LoopThread:
+  """An event loop running on its own daemon thread, started on first use.
+
+  Coroutines submitted from any thread run on that one loop, so clients and
+  other asyncio state used only through it are never touched by two loops.
+  """
+
+  def __init__(self, name='async-loop') -> None:
+    self.name = name
+    self.loop = None
+    self.thread = None
+    self.lock = threading.Lock()
+
+  def start(self) -> asyncio.AbstractEventLoop:
+    with self.lock:
+      if self.loop is None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=self.name, daemon=True)
+        self.thread.start()
+      return self.loop
+
+  def submit(self, coro) -> Future:
+    """Schedules a coroutine on the loop; the returned Future holds its result."""
+    return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+  def run(self, coro):
+    """Runs a coroutine on the loop and blocks until it is done."""
+    if threading.current_thread() is self.thread:
+      coro.close()
+      raise RuntimeError(f'{self.name}.run() called from its own loop; await the coroutine instead')
+    return self.submit(coro).result()
@@ -0,0 +1,113 @@
+from .classes import Trader
+import json
+import os
+import threading
+import time
+
+
+# A checkpoint left by a run older than this is discarded rather than resumed
+MAX_CHECKPOINT_AGE = 6 * 60 * 60
+
+
+class ScrapeCheckpoint:
+  """Append-only log of the Traders a scrape job has completed, one JSON line each.
+
+  Every record is flushed and fsynced as soon as its account is done, so a
+  crash loses at most the account being scraped. Opening an existing log
+  resumes the job: its Traders are loaded into `completed` and those URLs can
+  be skipped. Accounts that raised are logged as failed records; they stay
+  out of `completed`, so resuming the job retries them. A torn final line
+  from a crash mid-write is ignored.
+  """
+
+  def __init__(self, path, maxAge=MAX_CHECKPOINT_AGE) -> None:
+    self.path = path
+    self.lock = threading.Lock()
+    self.completed = {}
+    self.failed = {}
+    self.started = time.time()
+
+    if os.path.exists(path):
+      self.load(maxAge)
+    else:
+      os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+      self.write({'started': self.started})
+
+  def load(self, maxAge) -> None:
+    records = []
+    with open(self.path, 'r', encoding='utf-8') as file:
+      for line in file:
+        try:
+          records.append(json.loads(line))
+        except json.JSONDecodeError:
+          break
+
+    header = records[0] if records and 'started' in records[0] else {'started': 0}
+    if maxAge is not None and time.time() - header['started'] > maxAge:
+      print(f'Discarding checkpoint {self.path} from an old run\n')
+      self.reset()
+      return
+
+    self.started = header['started']
+    for record in records[1:]:
+      if 'failed' in record:
+        self.failed[record['url']] = record['failed']
+      else:
+        self.completed[record['url']] = record
+    # Rewrite only the completed records that parsed, so a torn line does not corrupt later appends
+    # and accounts that failed last time are logged again only if they fail again
+    self.rewrite(header, [record for record in records[1:] if 'failed' not in record])
+    print(f'Resuming scrape from {self.path}: {len(self.completed)} accounts already done, '
+          f'{len(self.failed)} failed accounts to retry\n')
+    self.failed = {}
+
+  def write(self, record, mode='a') -> None:
+    with open(self.path, mode, encoding='utf-8') as file:
+      file.write(json.dumps(record) + '\n')
+      file.flush()
+      os.fsync(file.fileno())
+
+  def rewrite(self, header, records) -> None:
+    tmpPath = self.path + '.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as file:
+      for record in [header] + records:
+        file.write(json.dumps(record) + '\n')
+      file.flush()
+      os.fsync(file.fileno())
+    os.replace(tmpPath, self.path)
+
+  def reset(self) -> None:
+    self.completed = {}
+    self.failed = {}
+    self.started = time.time()
+    self.write({'started': self.started}, mode='w')
+
+  def isDone(self, url) -> bool:
+    return url in self.completed
+
+  def append(self, trader) -> None:
+    record = trader.toDict()
+    with self.lock:
+      self.write(record)
+      self.completed[trader.url] = record
+      self.failed.pop(trader.url, None)
+
+  def fail(self, url, error) -> None:
+    """Logs that scraping `url` raised `error`; the account is retried when the job is resumed."""
+    with self.lock:
+      self.write({'url': url, 'failed': repr(error)})
+      self.failed[url] = repr(error)
+
+  def traders(self, accountURLS) -> list[Trader]:
+    """The completed Traders among `accountURLS`, with IDs from sorted URL order like accountPageScraper."""
+    return [Trader.fromDict(self.completed[url], traderID=traderID)
+            for traderID, url in enumerate(sorted(accountURLS)) if url in self.completed]
+
+  def isComplete(self, accountURLS) -> bool:
+    return all(url in self.completed for url in accountURLS)
+
+  def finish(self) -> None:
+    """Removes the log once the job has completed every account."""
+    with self.lock:
+      if os.path.exists(self.path):
+        os.remove(self.path)
@@ -1,27 +1,64 @@
+import re
+import sys
+
+
+# A wallet address in an account URL; the same address may appear checksummed (mixed case) or lowercased
+ADDRESS_PATTERN = re.compile(r'0x[0-9a-fA-F]{40}')
+
+
+def internText(value):
+  """Asset and order type strings repeat on every instance, so each distinct value is stored once."""
+  return sys.intern(value) if type(value) is str else value
+
+
+def walletAddress(url) -> str:
+  """The lowercased wallet address in an account URL, which identifies a trader across runs; the URL if it has none."""
+  match = ADDRESS_PATTERN.search(url)
+  return match.group(0).lower() if match else url
+
+
+# The classes below use __slots__ so a position costs a fixed handful of pointers instead of a dict
+
 class Position:
+  __slots__ = ('asset', 'leverage', 'short', 'pnl', 'pnlPerc', 'collateral', 'liq', 'entry')
+
   def __init__(self, asset, leverage, short, pnl, pnlPerc, collateral, liq, entry) -> None:
-    self.asset = asset
+    self.asset = internText(asset)
     self.leverage = leverage
     self.short = short
     self.pnl = pnl
     self.pnlPerc = pnlPerc
     self.collateral = collateral
-    self.size = int(collateral * leverage)
     self.liq = liq
     self.entry = entry
 
+  @property
+  def size(self) -> int:
+    return int(self.collateral * self.leverage)
+
   def __str__(self) -> str:
     direction = "Short" if self.short else "Long"
     return (f"Position({self.asset}, Leverage: {self.leverage}x, {direction}, "
             f"PnL: {self.pnl} ({self.pnlPerc}%), Collateral: {self.collateral}, "
             f"Size: {self.size}, Liquidation Price: {self.liq}, Entry Price: {self.entry})")
 
+  def toDict(self) -> dict:
+    return {'asset': self.asset, 'leverage': self.leverage, 'short': self.short, 'pnl': self.pnl,
+            'pnlPerc': self.pnlPerc, 'collateral': self.collateral, 'liq': self.liq, 'entry': self.entry}
+
+  @classmethod
+  def fromDict(cls, data):
+    return cls(data['asset'], data['leverage'], data['short'], data['pnl'], data['pnlPerc'],
+               data['collateral'], data['liq'], data['entry'])
+
 
 class Order:
+  __slots__ = ('asset', 'short', 'orderType', 'size', 'trigger')
+
   def __init__(self, asset, short, orderType, size, trigger) -> None:
-    self.asset = asset
+    self.asset = internText(asset)
     self.short = short
-    self.orderType = orderType
+    self.orderType = internText(orderType)
     self.size = size
     self.trigger = trigger
 
@@ -30,14 +67,29 @@ class Order:
     return (f"Order({self.asset}, {direction}, Type: {self.orderType}, "
             f"Size: {self.size}, Trigger: {self.trigger})")
 
+  def toDict(self) -> dict:
+    return {'asset': self.asset, 'short': self.short, 'orderType': self.orderType,
+            'size': self.size, 'trigger': self.trigger}
+
+  @classmethod
+  def fromDict(cls, data):
+    return cls(data['asset'], data['short'], data['orderType'], data['size'], data['trigger'])
+
 
 class Trader:
+  __slots__ = ('traderID', 'url', 'positions', 'orders')
+
   def __init__(self, traderID, url) -> None:
     self.traderID = traderID
     self.url = url
     self.positions = []
     self.orders = []
 
+  @property
+  def address(self) -> str:
+    """Stable identity of the trader; traderID is only its position in this run's sorted URL list."""
+    return walletAddress(self.url)
+
   def addPosition(self, position):
     self.positions.append(position)
 
@@ -52,4 +104,16 @@ class Trader:
 
   def __str__(self) -> str:
     return (f"Trader(ID: {self.traderID}, URL: {self.url}, "
-            f"Positions: {len(self.positions)}, Orders: {len(self.orders)})")
\ No newline at end of file
+            f"Positions: {len(self.positions)}, Orders: {len(self.orders)})")
+
+  def toDict(self) -> dict:
+    return {'traderID': self.traderID, 'url': self.url,
+            'positions': [position.toDict() for position in self.positions],
+            'orders': [order.toDict() for order in self.orders]}
+
+  @classmethod
+  def fromDict(cls, data, traderID=None):
+    trader = cls(data['traderID'] if traderID is None else traderID, data['url'])
+    trader.addPositionLst([Position.fromDict(position) for position in data['positions']])
+    trader.addOrderLst([Order.fromDict(order) for order in data['orders']])
+    return trader
\ No newline at end of file
@@ -0,0 +1,292 @@
+from .scraper import accountURLScraper, scrapeAccount, DriverPool, RateBudget
+from .fetcher import DataFetcher
+from .sentimentAnalysis import fetch_live_prices
+from .aggregates import AggregateState
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import heapq
+import threading
+import time
+
+
+# Default cadences, in seconds
+LEADERBOARD_INTERVAL = 15 * 60
+ACCOUNT_TICK = 30
+PRICE_INTERVAL = 60
+# At most one published report per this interval is appended to the metrics history
+HISTORY_INTERVAL = 5 * 60
+
+# How often an account is re-scraped, by tier; see accountTier
+REFRESH_INTERVALS = {'hot': 2 * 60, 'warm': 10 * 60, 'cold': 30 * 60}
+HOT_LIQ_PERCENT, WARM_LIQ_PERCENT = 5, 15
+HOT_LEVERAGE, WARM_LEVERAGE = 25, 10
+HOT_SIZE, WARM_SIZE = 1_000_000, 100_000
+
+# An account that fails to scrape is retried after this delay, doubled on each further failure up to the cap
+RETRY_BACKOFF = 60
+MAX_RETRY_BACKOFF = REFRESH_INTERVALS['cold']
+
+
+def accountTier(trader, prices=None) -> str:
+  """Ranks an account by how much its book can move: total size, top leverage and distance to liquidation.
+
+  Distance to liquidation uses the live price when known, else the entry price.
+  """
+  prices = prices or {}
+  size = sum(pos.size for pos in trader.positions)
+  leverage = max((pos.leverage for pos in trader.positions), default=0)
+
+  liqDistance = float('inf')
+  for pos in trader.positions:
+    price = prices.get(pos.asset, pos.entry)
+    if pos.liq is not None and price:
+      liqDistance = min(liqDistance, abs(pos.liq - price) / price * 100)
+
+  if liqDistance <= HOT_LIQ_PERCENT or leverage >= HOT_LEVERAGE or size >= HOT_SIZE:
+    return 'hot'
+  if liqDistance <= WARM_LIQ_PERCENT or leverage >= WARM_LEVERAGE or size >= WARM_SIZE:
+    return 'warm'
+  return 'cold'
+
+
+def retryDelay(failures) -> float:
+  """Seconds until an account that failed `failures` times in a row is tried again."""
+  return min(RETRY_BACKOFF * 2 ** (failures - 1), MAX_RETRY_BACKOFF)
+
+
+class Scheduler:
+  """Runs named jobs at fixed intervals on a single thread.
+
+  Jobs never overlap; one that overruns its interval simply runs again as soon
+  as it finishes. A job that raises is reported and kept on its schedule.
+  """
+
+  def __init__(self) -> None:
+    self.queue = []
+    self.runs = {}
+    self.stopEvent = threading.Event()
+
+  def every(self, name, interval, fn, delay=0) -> None:
+    heapq.heappush(self.queue, (time.monotonic() + delay, name, interval, fn))
+    self.runs[name] = 0
+
+  def run(self) -> None:
+    while self.queue and not self.stopEvent.is_set():
+      due, name, interval, fn = self.queue[0]
+      wait = due - time.monotonic()
+      if wait > 0:
+        self.stopEvent.wait(wait)
+        continue
+
+      heapq.heappop(self.queue)
+      try:
+        fn()
+      except Exception as error:
+        print(f'Scheduled job {name} failed: {error!r}\n')
+      self.runs[name] += 1
+      heapq.heappush(self.queue, (max(due + interval, time.monotonic()), name, interval, fn))
+
+  def stop(self) -> None:
+    self.stopEvent.set()
+
+
+class WhaleDaemon:
+  """Long-running service that keeps the analysis current instead of scraping everything per run.
+
+  Three jobs share one Scheduler: the leaderboard is re-read every
+  `leaderboardInterval` seconds, due accounts are refreshed every `accountTick`
+  seconds (hot accounts far more often than cold ones), and prices every
+  `priceInterval` seconds. A DriverPool (or the HTTP session) is opened once
+  in start() and reused by every cycle. Refreshed accounts are folded into an
+  AggregateState at O(their positions and orders) each. Publishing reads the
+  totals and rankings off that state and recomputes hotspots only for assets
+  whose orders changed, though it still copies the pending orders and
+  at-risk positions into the report. The newest report is available from
+  latestAnalysis().
+  """
+
+  def __init__(self, backend='browser', workers=2, apiBase=None, parseMode='script',
+               leaderboardInterval=LEADERBOARD_INTERVAL, accountTick=ACCOUNT_TICK,
+               priceInterval=PRICE_INTERVAL, batchSize=None, lean=False, historyInterval=HISTORY_INTERVAL,
+               traderHistory=None, metricsHistory=None) -> None:
+    self.backend = backend
+    self.workers = workers
+    self.apiBase = apiBase
+    self.parseMode = parseMode
+    self.lean = lean
+    self.leaderboardInterval = leaderboardInterval
+    self.accountTick = accountTick
+    self.priceInterval = priceInterval
+    self.historyInterval = historyInterval
+    # Optional core.traderHistory.TraderHistory that every scraped account is recorded to
+    self.traderHistory = traderHistory
+    # Optional core.history.MetricsHistory that a published report is recorded to every historyInterval
+    self.metricsHistory = metricsHistory
+    # Bounds one tick so the other jobs are not held up for long
+    self.batchSize = batchSize or workers * 5
+
+    self.urls = []
+    self.signals = {}
+    self.traders = {}
+    self.state = AggregateState()
+    self.nextRefresh = {}
+    # Consecutive failed scrapes per account, for the retry backoff
+    self.failures = {}
+    self.prices = {}
+
+    self.lock = threading.Lock()
+    self.latest = None
+    self.version = 0
+    self.lastRecorded = 0.0
+
+    self.pool = None
+    self.rateBudgets = {}
+    self.fetcher = None
+    self.scheduler = None
+    self.thread = None
+
+  def warmUp(self) -> None:
+    if self.backend == 'http':
+      self.fetcher = DataFetcher(apiBase=self.apiBase, workers=self.workers)
+    else:
+      self.pool = DriverPool(size=self.workers, headless=True, lean=self.lean)
+
+  def tearDown(self) -> None:
+    if self.pool is not None:
+      self.pool.close()
+      self.pool = None
+    if self.fetcher is not None:
+      self.fetcher.close()
+      self.fetcher = None
+
+  # Jobs found below
+
+  def refreshLeaderboard(self) -> None:
+    signals = {}
+    if self.backend == 'http':
+      urls = self.fetcher.leaderboardAccounts(signals)
+    else:
+      urls = accountURLScraper(signals=signals, pool=self.pool)
+
+    with self.lock:
+      self.urls = sorted(urls)
+      for url in list(self.nextRefresh):
+        if url not in urls:
+          del self.nextRefresh[url]
+          self.failures.pop(url, None)
+          self.traders.pop(url, None)
+          self.state.remove_trader(url)
+      for url in self.urls:
+        # New accounts and accounts whose leaderboard row moved are due right away, unless backing off
+        if url in self.failures:
+          continue
+        if url not in self.nextRefresh or signals.get(url) != self.signals.get(url):
+          self.nextRefresh[url] = 0
+      self.signals = signals
+      # IDs follow sorted URL order, as in a one-shot scrape
+      for traderID, url in enumerate(self.urls):
+        if url in self.traders:
+          self.traders[url].traderID = traderID
+
+  def refreshAccounts(self) -> None:
+    now = time.monotonic()
+    with self.lock:
+      due = sorted((self.nextRefresh[url], url) for url in self.urls if self.nextRefresh.get(url, 0) <= now)
+      ids = {url: traderID for traderID, url in enumerate(self.urls)}
+    jobs = [(ids[url], url) for _, url in due[:self.batchSize]]
+    if not jobs:
+      return
+
+    traders = self.scrapeBatch(jobs)
+    now = time.monotonic()
+    with self.lock:
+      for trader in traders:
+        if trader.url in ids:
+          self.traders[trader.url] = trader
+          self.state.update_trader(trader)
+          self.nextRefresh[trader.url] = now + REFRESH_INTERVALS[accountTier(trader, self.prices)]
+          self.failures.pop(trader.url, None)
+      scraped = {trader.url for trader in traders}
+      for _, url in jobs:
+        if url not in scraped and url in self.nextRefresh:
+          self.failures[url] = self.failures.get(url, 0) + 1
+          self.nextRefresh[url] = now + retryDelay(self.failures[url])
+    if self.traderHistory is not None:
+      self.traderHistory.record(traders)
+    self.publish()
+
+  def refreshPrices(self) -> None:
+    with self.lock:
+      assets = {pos.asset for trader in self.traders.values() for pos in trader.positions}
+    if not assets:
+      return
+    self.prices = fetch_live_prices(assets, stale_while_revalidate=False)
+    self.state.update_prices(self.prices)
+    self.publish()
+
+  def scrapeBatch(self, jobs) -> list:
+    if self.backend == 'http':
+      async def fetchAll():
+        return await asyncio.gather(*(self.fetcher.fetchTraderAsync(traderID, url) for traderID, url in jobs),
+                                    return_exceptions=True)
+      return [trader for trader in asyncio.run(fetchAll()) if not isinstance(trader, Exception)]
+
+    shards = [jobs[i::self.workers] for i in range(self.workers)]
+    with ThreadPoolExecutor(max_workers=self.workers) as executor:
+      results = executor.map(self.scrapeShard, shards)
+      return [trader for traders in results for trader in traders]
+
+  def scrapeShard(self, shard) -> list:
+    traders = []
+    with self.pool.lease() as pooled:
+      rateBudget = self.rateBudgets.setdefault(pooled.driverID, RateBudget())
+      for traderID, url in shard:
+        rateBudget.beforeLoad()
+        try:
+          trader, pooled.orderButtonTracker = scrapeAccount(pooled.driver, url, traderID, pooled.orderButtonTracker,
+                                                            parseMode=self.parseMode)
+          traders.append(trader)
+        except Exception as error:
+          # refreshAccounts backs the account off and retries it after retryDelay
+          print(f'Failed to scrape {url}: {error!r}\n')
+        rateBudget.afterLoad()
+        self.pool.countPage(pooled)
+    return traders
+
+  def publish(self) -> None:
+    if not len(self.state):
+      return
+
+    analysis = self.state.report()
+    with self.lock:
+      analysis['pending_accounts'] = len(self.urls) - len(self.traders)
+      self.latest = analysis
+      self.version += 1
+      record = (self.metricsHistory is not None
+                and analysis['generated_at'] - self.lastRecorded >= self.historyInterval)
+      if record:
+        self.lastRecorded = analysis['generated_at']
+    if record:
+      self.metricsHistory.record(analysis)
+
+  # Lifecycle found below
+
+  def latestAnalysis(self):
+    """The most recent AggregateState report, or None before the first accounts are in."""
+    with self.lock:
+      return self.latest
+
+  def start(self) -> None:
+    self.warmUp()
+    self.scheduler = Scheduler()
+    self.scheduler.every('leaderboard', self.leaderboardInterval, self.refreshLeaderboard)
+    self.scheduler.every('accounts', self.accountTick, self.refreshAccounts, delay=0.001)
+    self.scheduler.every('prices', self.priceInterval, self.refreshPrices, delay=0.002)
+    self.thread = threading.Thread(target=self.scheduler.run, daemon=True)
+    self.thread.start()
+
+  def stop(self) -> None:
+    if self.scheduler is not None:
+      self.scheduler.stop()
+      self.thread.join()
+    self.tearDown()
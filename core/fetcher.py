@@ -0,0 +1,244 @@
+from .classes import Position, Order, Trader
+from .routes import apiRoutes
+from .asyncHttp import AsyncHttpClient
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urljoin, urlsplit, quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+import asyncio
+import threading
+import os
+import re
+
+
+ADDRESS = re.compile(r'0x[0-9a-fA-F]{40}')
+
+# Leaderboard fields whose change means an account's book moved
+LEADERBOARD_SIGNAL_FIELDS = ('pnl', 'size', 'openPositions')
+
+
+def makeSession(poolSize=8, retries=3) -> requests.Session:
+  """A requests.Session whose connection pool is large enough for `poolSize` concurrent fetches."""
+  session = requests.Session()
+  retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']))
+  adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=retry)
+  session.mount('http://', adapter)
+  session.mount('https://', adapter)
+  session.headers.update({'Accept': 'application/json'})
+  return session
+
+
+def accountAddress(url) -> str:
+  match = ADDRESS.search(url)
+  if match is None:
+    raise ValueError(f'No wallet address found in {url}')
+  return match.group(0)
+
+
+def recordingName(path) -> str:
+  """Maps a request path (with query) to the file name it is recorded under."""
+  return quote(path.lstrip('/'), safe='') + '.json'
+
+
+# Payload helpers found below. The schema is this project's own (see apiRoutes in core.routes), not a
+# GMX API: each item is a JSON object, markets are 'ETH/USD' style, and
+#   positions: market, isLong, leverage, pnl, pnlPercentage, collateralUsd, liquidationPrice, entryPrice
+#   orders:    market, isLong, orderType, sizeDeltaUsd, triggerPrice
+
+# GMX v2 order types (the Order.OrderType enum, by number or name) mapped to the labels the account page
+# shows, so orders from either backend group together in the analysis
+ORDER_TYPE_LABELS = {
+  0: 'Market Swap', 1: 'Limit Swap', 2: 'Market', 3: 'Limit', 4: 'Market', 5: 'Take Profit',
+  6: 'Stop Loss', 7: 'Liquidation',
+  'MarketSwap': 'Market Swap', 'LimitSwap': 'Limit Swap', 'MarketIncrease': 'Market', 'LimitIncrease': 'Limit',
+  'MarketDecrease': 'Market', 'LimitDecrease': 'Take Profit', 'StopLossDecrease': 'Stop Loss',
+  'Liquidation': 'Liquidation',
+}
+
+def assetFromMarket(market) -> str:
+  return market.split('/')[0] if market else 'Unknown'
+
+
+def positionFromPayload(item) -> Position:
+  liq = item.get('liquidationPrice')
+  return Position(assetFromMarket(item.get('market')),
+                  float(item.get('leverage', 1.0)),
+                  not item.get('isLong', True),
+                  float(item.get('pnl', 0.0)),
+                  float(item.get('pnlPercentage', 0.0)),
+                  float(item.get('collateralUsd', 0.0)),
+                  float(liq) if liq is not None else None,
+                  float(item.get('entryPrice', 0.0)))
+
+
+def orderTypeLabel(orderType) -> str:
+  """Account page label for a payload order type; labels already in that form pass through unchanged."""
+  if isinstance(orderType, str) and orderType.isdigit():
+    orderType = int(orderType)
+  return ORDER_TYPE_LABELS.get(orderType, orderType if isinstance(orderType, str) else str(orderType))
+
+
+def orderFromPayload(item) -> Order:
+  return Order(assetFromMarket(item.get('market')),
+               not item.get('isLong', True),
+               orderTypeLabel(item.get('orderType', '')),
+               float(item.get('sizeDeltaUsd', 0.0)),
+               float(item.get('triggerPrice', 0.0)))
+
+
+def itemsOf(payload, key) -> list:
+  """Accepts either a bare JSON list or an object wrapping the list under `key`."""
+  if isinstance(payload, list):
+    return payload
+  return payload.get(key, [])
+
+
+class DataFetcher:
+  """Fetches leaderboard and account data as JSON over pooled HTTP connections, no browser involved.
+
+  Requests run on an AsyncHttpClient, so up to `workers` accounts are in flight
+  at once under the per-host rate limits. `apiBase` can point at a
+  RecordedServer to replay stored responses, and `recordDir` stores every
+  response fetched so it can be replayed later.
+
+  The routes and payload fields are a placeholder schema, not a GMX API (see
+  apiRoutes); `apiBase` has to be a service that implements it.
+  """
+
+  def __init__(self, apiBase=None, workers=8, recordDir=None, timeout=15, session=None) -> None:
+    self.apiBase = apiBase or apiRoutes['API_BASE_URL']
+    if not self.apiBase:
+      raise ValueError('The HTTP backend has no default endpoint: GMX serves no REST API for account positions. '
+                       'Pass --api-base with a service implementing the apiRoutes schema, or a RecordedServer URL.')
+    self.workers = workers
+    self.recordDir = recordDir
+    # Retries are handled by the async client, with jitter, instead of urllib3
+    self.session = session or makeSession(poolSize=workers, retries=0)
+    self.client = AsyncHttpClient(concurrency=workers, timeout=timeout, session=self.session)
+
+  async def getJSON(self, route, **params):
+    url = urljoin(self.apiBase, apiRoutes[route].format(**params))
+    response = await self.client.get(url)
+
+    if self.recordDir:
+      os.makedirs(self.recordDir, exist_ok=True)
+      parts = urlsplit(url)
+      path = parts.path + ('?' + parts.query if parts.query else '')
+      with open(os.path.join(self.recordDir, recordingName(path)), 'wb') as file:
+        file.write(response.content)
+
+    return response.json()
+
+  async def leaderboardAccountsAsync(self, signals=None) -> set:
+    payload = await self.getJSON('LEADERBOARD_API')
+    urls = set()
+    for item in itemsOf(payload, 'accounts'):
+      account = item['account'] if isinstance(item, dict) else item
+      url = apiRoutes['ACCOUNT_URL'].format(account=account)
+      urls.add(url)
+      if signals is not None and isinstance(item, dict):
+        signals.setdefault(url, []).append('|'.join(str(item.get(key)) for key in LEADERBOARD_SIGNAL_FIELDS))
+    return urls
+
+  def leaderboardAccounts(self, signals=None) -> set:
+    """Returns the account URLs on the leaderboard, in the same format the browser scraper yields."""
+    return asyncio.run(self.leaderboardAccountsAsync(signals))
+
+  async def fetchTraderAsync(self, traderID, url) -> Trader:
+    account = accountAddress(url)
+    positions, orders = await asyncio.gather(self.getJSON('POSITIONS_API', account=account),
+                                             self.getJSON('ORDERS_API', account=account))
+
+    trader = Trader(traderID, url)
+    trader.addPositionLst([positionFromPayload(item) for item in itemsOf(positions, 'positions')])
+    trader.addOrderLst([orderFromPayload(item) for item in itemsOf(orders, 'orders')])
+    return trader
+
+  async def fetchTradersAsync(self, accountURLS) -> list[Trader]:
+    """Fetches every account concurrently; an account that fails is reported and left out, like the browser scraper."""
+    jobs = list(enumerate(sorted(accountURLS)))
+    results = await asyncio.gather(*(self.fetchTraderAsync(traderID, url) for traderID, url in jobs),
+                                   return_exceptions=True)
+
+    traders = []
+    for (traderID, url), result in zip(jobs, results):
+      if isinstance(result, BaseException):
+        print(f'Failed to fetch Trader # {traderID}, skipping it: {result!r}\n')
+      else:
+        traders.append(result)
+    return traders
+
+  def fetchTrader(self, traderID, url) -> Trader:
+    return asyncio.run(self.fetchTraderAsync(traderID, url))
+
+  def fetchTraders(self, accountURLS) -> list[Trader]:
+    """Fetches every account concurrently; IDs follow sorted URL order like accountPageScraper."""
+    return asyncio.run(self.fetchTradersAsync(accountURLS))
+
+  def close(self):
+    self.session.close()
+
+
+def accountAPIScraper(accountURLS=None, apiBase=None, workers=8, recordDir=None) -> list[Trader]:
+  """HTTP counterpart of accountURLScraper + accountPageScraper."""
+  fetcher = DataFetcher(apiBase=apiBase, workers=workers, recordDir=recordDir)
+
+  async def run():
+    urls = accountURLS
+    if urls is None:
+      urls = await fetcher.leaderboardAccountsAsync()
+    print(f'Fetching {len(urls)} accounts over HTTP\n')
+    return await fetcher.fetchTradersAsync(urls)
+
+  try:
+    return asyncio.run(run())
+  finally:
+    fetcher.close()
+
+
+# Local stub server serving recorded responses found below
+
+class RecordedHandler(BaseHTTPRequestHandler):
+  recordDir = None
+
+  def do_GET(self):
+    filePath = os.path.join(self.recordDir, recordingName(self.path))
+    if not os.path.exists(filePath):
+      self.send_error(404, f'No recording for {self.path}')
+      return
+
+    with open(filePath, 'rb') as file:
+      body = file.read()
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+
+class RecordedServer:
+  """Serves the responses stored by DataFetcher(recordDir=...) on localhost.
+
+  Usage:
+    with RecordedServer('data/recordings') as server:
+      traders = accountAPIScraper(apiBase=server.url)
+  """
+
+  def __init__(self, recordDir, port=0) -> None:
+    handler = type('Handler', (RecordedHandler,), {'recordDir': recordDir})
+    self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    self.url = f'http://127.0.0.1:{self.server.server_port}/'
+    self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+  def __enter__(self):
+    self.thread.start()
+    return self
+
+  def __exit__(self, *exc):
+    self.server.shutdown()
+    self.server.server_close()
@@ -0,0 +1,169 @@
+import math
+import os
+import sqlite3
+import threading
+
+
+# Market-wide metrics stored per run, in column order, with their SQLite types
+RUN_COLUMNS = {
+    "traders": "INTEGER", "positions": "INTEGER", "long_count": "INTEGER", "short_count": "INTEGER",
+    "long_size": "REAL", "short_size": "REAL", "long_short_ratio": "REAL", "long_short_size_ratio": "REAL",
+    "average_leverage": "REAL", "max_leverage": "REAL", "average_pnl": "REAL", "median_pnl": "REAL",
+    "total_collateral": "REAL", "average_collateral": "REAL",
+}
+# Per-asset metrics stored per run
+ASSET_COLUMNS = {
+    "longs": "INTEGER", "shorts": "INTEGER", "positions": "INTEGER", "average_leverage": "REAL",
+    "average_pnl": "REAL", "price": "REAL", "pending_longs": "INTEGER", "pending_shorts": "INTEGER",
+}
+
+AGGREGATES = {"avg": "AVG", "min": "MIN", "max": "MAX"}
+
+
+def finite(value):
+    """Infinite ratios (no shorts at all) and missing values are stored as NULL."""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def run_row(analysis):
+    long_count, short_count, long_short_ratio = analysis["long_vs_short"]
+    long_size, short_size, long_short_size_ratio = analysis["long_vs_short_size"]
+    leverage = analysis["leverage_dist"] or {}
+    pnl = analysis["pnl_stats"] or {}
+    collateral = analysis["collateral_dist"] or {}
+    return (
+        analysis["traders"], analysis["positions"], long_count, short_count, long_size, short_size,
+        finite(long_short_ratio), finite(long_short_size_ratio),
+        finite(leverage.get("average_leverage")), finite(leverage.get("max_leverage")),
+        finite(pnl.get("average_pnl")), finite(pnl.get("median_pnl")),
+        finite(collateral.get("total_collateral")), finite(collateral.get("average_collateral")),
+    )
+
+
+def asset_rows(analysis):
+    prices = analysis["prices"] or {}
+    pending = analysis["pending_orders"]
+    for asset, data in analysis["asset_data"].items():
+        orders = pending.get(asset, {})
+        yield asset, (
+            data["longs"], data["shorts"], data["positions"], finite(data["average_leverage"]),
+            finite(data["average_pnl"]), finite(prices.get(asset)), orders.get("longs", 0), orders.get("shorts", 0),
+        )
+
+
+class MetricsHistory:
+    """Append-only time series of every run's market metrics, in a SQLite file.
+
+    One row per run in `runs` and one row per run and asset in `asset_runs`,
+    both keyed by the analysis' generated_at timestamp; asset rows are
+    clustered by (asset, ts), so a trend for one asset is one index range
+    scan. Reads return columns as lists, ready to chart, and downsample()
+    averages into fixed time buckets inside SQLite.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or ":memory:"
+        self.lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS runs (ts REAL PRIMARY KEY, {', '.join(f'{c} {t}' for c, t in RUN_COLUMNS.items())})"
+        )
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS asset_runs (asset TEXT NOT NULL, ts REAL NOT NULL, "
+            f"{', '.join(f'{c} {t}' for c, t in ASSET_COLUMNS.items())}, PRIMARY KEY (asset, ts)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS asset_runs_ts ON asset_runs (ts)")
+        self.conn.commit()
+
+    def record(self, analysis):
+        """Appends one run from a compute_analysis() or AggregateState.report() dict; re-recording a run replaces it."""
+        ts = analysis["generated_at"]
+        run = (ts,) + run_row(analysis)
+        assets = [(asset, ts) + row for asset, row in asset_rows(analysis)]
+        with self.lock, self.conn:
+            self.conn.execute(f"INSERT OR REPLACE INTO runs VALUES ({', '.join('?' * len(run))})", run)
+            if assets:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO asset_runs VALUES ({', '.join('?' * len(assets[0]))})", assets
+                )
+
+    # Queries found below
+
+    def columns(self, requested, allowed):
+        requested = tuple(allowed) if requested is None else tuple(requested)
+        unknown = [column for column in requested if column not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown history columns: {', '.join(unknown)}")
+        return requested
+
+    def select(self, sql, params, names):
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+    def span(self, asset, start, end):
+        """WHERE clause and parameters for a time range, optionally of one asset."""
+        clauses, params = [], []
+        if asset is not None:
+            clauses.append("asset = ?")
+            params.append(asset)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def runs(self, start=None, end=None, columns=None):
+        """Market-wide metrics of every run with start <= ts <= end, as {'ts': [...], column: [...]}."""
+        columns = self.columns(columns, RUN_COLUMNS)
+        where, params = self.span(None, start, end)
+        return self.select(f"SELECT ts, {', '.join(columns)} FROM runs{where} ORDER BY ts", params,
+                           ("ts",) + columns)
+
+    def asset_history(self, asset, start=None, end=None, columns=None):
+        """One asset's metrics over time, as {'ts': [...], column: [...]}."""
+        columns = self.columns(columns, ASSET_COLUMNS)
+        where, params = self.span(asset, start, end)
+        return self.select(f"SELECT ts, {', '.join(columns)} FROM asset_runs{where} ORDER BY ts", params,
+                           ("ts",) + columns)
+
+    def downsample(self, bucket_seconds, start=None, end=None, columns=None, asset=None, how="avg"):
+        """Runs grouped into bucket_seconds-wide buckets, each reduced with avg, min or max.
+
+        Market-wide metrics by default, or one asset's with `asset`. Each
+        bucket is labelled with its start time and carries a 'runs' count.
+        """
+        if how not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {how!r}, expected one of {', '.join(AGGREGATES)}")
+        table, allowed = ("runs", RUN_COLUMNS) if asset is None else ("asset_runs", ASSET_COLUMNS)
+        columns = self.columns(columns, allowed)
+        where, params = self.span(asset, start, end)
+        aggregate = AGGREGATES[how]
+        selected = ", ".join(f"{aggregate}({column})" for column in columns)
+        return self.select(
+            f"SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, COUNT(*), {selected} FROM {table}{where} "
+            f"GROUP BY bucket ORDER BY bucket",
+            [bucket_seconds, bucket_seconds] + params,
+            ("ts", "runs") + columns,
+        )
+
+    def assets(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT asset FROM asset_runs ORDER BY asset")]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,247 @@
+from .classes import Trader
+from .parser import positionFromCells, orderFromCells
+from .routes import routes, accountRoutes
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import hashlib
+import json
+import os
+import re
+import threading
+
+
+# Elements that never have children or a closing tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+
+# Elements whose boundaries become line breaks in innerText
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset',
+              'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+              'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'thead',
+              'tfoot', 'tr', 'ul'}
+
+# Elements whose text never shows up in innerText
+HIDDEN_TAGS = {'script', 'style', 'noscript', 'template', 'head', 'title', 'svg'}
+
+WHITESPACE = re.compile(r'\s+')
+BLANK_LINES = re.compile(r'\s*\n\s*')
+STEP = re.compile(r'^([\w*-]+)(?:\[(\d+)\])?$')
+ID_STEP = re.compile(r'^\*\[@id=["\']([^"\']+)["\']\]$')
+ADDRESS = re.compile(r'0x[0-9a-fA-F]{40}')
+
+# Worker drivers share one snapshot index
+snapshotLock = threading.Lock()
+
+
+class DomNode:
+  def __init__(self, tag, attrs=None, parent=None) -> None:
+    self.tag = tag
+    self.attrs = dict(attrs or [])
+    self.parent = parent
+    self.children = []
+
+  def elements(self, tag=None):
+    return [child for child in self.children
+            if isinstance(child, DomNode) and (tag is None or tag == '*' or child.tag == tag)]
+
+  def iter(self, tag=None):
+    for child in self.children:
+      if isinstance(child, DomNode):
+        if tag is None or child.tag == tag:
+          yield child
+        yield from child.iter(tag)
+
+  def innerText(self) -> str:
+    """Approximates the browser's innerText: block boundaries become newlines, runs of spaces collapse."""
+    pieces = []
+    self.collectText(pieces)
+    text = ''.join(pieces)
+    return BLANK_LINES.sub('\n', text).strip()
+
+  def collectText(self, pieces):
+    if self.tag in HIDDEN_TAGS:
+      return
+    block = self.tag in BLOCK_TAGS
+    if block:
+      pieces.append('\n')
+    for child in self.children:
+      if isinstance(child, DomNode):
+        if child.tag == 'br':
+          pieces.append('\n')
+        else:
+          child.collectText(pieces)
+      else:
+        pieces.append(child)
+    if block:
+      pieces.append('\n')
+
+
+class DomBuilder(HTMLParser):
+  def __init__(self) -> None:
+    super().__init__(convert_charrefs=True)
+    self.root = DomNode('#document')
+    self.current = self.root
+
+  def handle_starttag(self, tag, attrs):
+    node = DomNode(tag, attrs, self.current)
+    self.current.children.append(node)
+    if tag not in VOID_TAGS:
+      self.current = node
+
+  def handle_startendtag(self, tag, attrs):
+    self.current.children.append(DomNode(tag, attrs, self.current))
+
+  def handle_endtag(self, tag):
+    # Close back up to the matching element, tolerating unclosed children
+    node = self.current
+    while node is not self.root and node.tag != tag:
+      node = node.parent
+    if node is not self.root:
+      self.current = node.parent
+
+  def handle_data(self, data):
+    text = WHITESPACE.sub(' ', data)
+    if text:
+      self.current.children.append(text)
+
+
+def parseHTML(html) -> DomNode:
+  builder = DomBuilder()
+  builder.feed(html)
+  builder.close()
+  return builder.root
+
+
+def resolveXPath(root, xpath):
+  """Resolves the absolute, positional XPaths used in routes.py, e.g. //*[@id="root"]/div/div[1]/table/tbody."""
+  if xpath.startswith('//'):
+    head, _, rest = xpath[2:].partition('/')
+    idMatch = ID_STEP.match(head)
+    if idMatch is None:
+      raise ValueError(f'Unsupported XPath start: {head}')
+    node = next((elem for elem in root.iter() if elem.attrs.get('id') == idMatch.group(1)), None)
+    steps = rest.split('/') if rest else []
+  else:
+    node = root
+    steps = xpath.strip('/').split('/')
+
+  for step in steps:
+    if node is None:
+      return None
+    stepMatch = STEP.match(step)
+    if stepMatch is None:
+      raise ValueError(f'Unsupported XPath step: {step}')
+    candidates = node.elements(stepMatch.group(1))
+    index = int(stepMatch.group(2) or 1) - 1
+    node = candidates[index] if index < len(candidates) else None
+
+  return node
+
+
+def tableRowsFromHTML(html, xpath) -> list[list[str]]:
+  """Returns the text of every cell of the tbody at `xpath`, the offline twin of parser.tableRows."""
+  root = parseHTML(html) if isinstance(html, str) else html
+  body = resolveXPath(root, xpath)
+  if body is None:
+    return []
+
+  rows = []
+  for row in body.elements('tr'):
+    rows.append([cell.innerText() for cell in row.elements() if cell.tag in ('td', 'th')])
+  return rows
+
+
+def positionsFromHTML(html) -> list:
+  return [positionFromCells(cells) for cells in tableRowsFromHTML(html, accountRoutes['POS_TABLE'])]
+
+
+def ordersFromHTML(html) -> list:
+  return [orderFromCells(cells) for cells in tableRowsFromHTML(html, accountRoutes['ORD_TABLE'])]
+
+
+def accountURLsFromHTML(html, outputSet=None) -> set:
+  """Collects the account links of a leaderboard page snapshot."""
+  outputSet = set() if outputSet is None else outputSet
+  root = parseHTML(html) if isinstance(html, str) else html
+  table = resolveXPath(root, routes['TABLE_X'])
+  if table is None:
+    return outputSet
+
+  for aTag in table.iter('a'):
+    href = aTag.attrs.get('href')
+    if href:
+      outputSet.add(urljoin(routes['BASE_URL'], href))
+  return outputSet
+
+
+def traderFromHTML(traderID, url, positionsHTML=None, ordersHTML=None) -> Trader:
+  trader = Trader(traderID, url)
+  if positionsHTML:
+    trader.addPositionLst(positionsFromHTML(positionsHTML))
+  if ordersHTML:
+    trader.addOrderLst(ordersFromHTML(ordersHTML))
+  return trader
+
+
+# Snapshot storage and replay found below
+
+def snapshotName(url, tab) -> str:
+  match = ADDRESS.search(url)
+  key = match.group(0) if match else hashlib.sha1(url.encode()).hexdigest()[:16]
+  return f'{key}.{tab}.html'
+
+
+def saveAccountSnapshot(snapshotDir, url, pages: dict) -> None:
+  """Stores the page source of each rendered account tab ('positions'/'orders') and indexes them by URL.
+
+  Accounts without positions or orders are indexed with no pages so a replay
+  still yields an empty Trader for them.
+  """
+  os.makedirs(snapshotDir, exist_ok=True)
+  entry = {}
+  for tab, html in pages.items():
+    fileName = snapshotName(url, tab)
+    with open(os.path.join(snapshotDir, fileName), 'w', encoding='utf-8') as file:
+      file.write(html)
+    entry[tab] = fileName
+
+  indexPath = os.path.join(snapshotDir, 'accounts.json')
+  with snapshotLock:
+    index = {}
+    if os.path.exists(indexPath):
+      with open(indexPath, 'r', encoding='utf-8') as file:
+        index = json.load(file)
+    index[url] = entry
+    with open(indexPath, 'w', encoding='utf-8') as file:
+      json.dump(index, file, indent=1)
+
+
+def saveLeaderboardSnapshot(snapshotDir, pageNumber, html) -> None:
+  os.makedirs(snapshotDir, exist_ok=True)
+  with open(os.path.join(snapshotDir, f'leaderboard-{pageNumber}.html'), 'w', encoding='utf-8') as file:
+    file.write(html)
+
+
+def replayLeaderboard(snapshotDir) -> set:
+  """Rebuilds the set of account URLs from stored leaderboard pages."""
+  urls = set()
+  for fileName in sorted(os.listdir(snapshotDir)):
+    if fileName.startswith('leaderboard-') and fileName.endswith('.html'):
+      with open(os.path.join(snapshotDir, fileName), 'r', encoding='utf-8') as file:
+        accountURLsFromHTML(file.read(), urls)
+  return urls
+
+
+def replayAccountPages(snapshotDir) -> list[Trader]:
+  """Rebuilds the Trader list from stored account pages, with the same ID order as the live scraper."""
+  with open(os.path.join(snapshotDir, 'accounts.json'), 'r', encoding='utf-8') as file:
+    index = json.load(file)
+
+  def read(fileName):
+    if fileName is None:
+      return None
+    with open(os.path.join(snapshotDir, fileName), 'r', encoding='utf-8') as file:
+      return file.read()
+
+  return [traderFromHTML(traderID, url, read(tabs.get('positions')), read(tabs.get('orders')))
+          for traderID, (url, tabs) in enumerate(sorted(index.items()))]
@@ -0,0 +1,127 @@
+from .classes import Trader
+import hashlib
+import json
+import os
+import re
+import time
+
+
+# Leaderboard cells carrying money or percentages (PnL, size, win rate); rank cells are left out
+SIGNAL_CELL = re.compile(r'[$%]')
+
+# Accounts are re-scraped at least this often even if their leaderboard row is unchanged,
+# since new or cancelled orders do not move PnL or size
+MAX_STATE_AGE = 6 * 60 * 60
+
+
+def rowSignal(cells) -> str:
+  """Condenses one leaderboard row into the part that changes when the account's book does."""
+  return '|'.join(cell.strip() for cell in cells if SIGNAL_CELL.search(cell))
+
+
+def combineSignals(rowSignals) -> str:
+  """An account can appear in several leaderboard views; its signal covers all of them."""
+  joined = '\n'.join(sorted(set(rowSignals)))
+  return hashlib.sha1(joined.encode()).hexdigest()
+
+
+class AccountStateStore:
+  """Last known leaderboard signal and scraped Trader per account URL, kept in a JSON file."""
+
+  def __init__(self, path) -> None:
+    self.path = path
+    self.accounts = {}
+    if os.path.exists(path):
+      with open(path, 'r', encoding='utf-8') as file:
+        self.accounts = json.load(file)
+
+  def get(self, url):
+    return self.accounts.get(url)
+
+  def update(self, trader, signal, scrapedAt=None) -> None:
+    self.accounts[trader.url] = {
+      'signal': signal,
+      'scrapedAt': time.time() if scrapedAt is None else scrapedAt,
+      'trader': trader.toDict()
+    }
+
+  def prune(self, accountURLS) -> list:
+    """Drops accounts that are no longer in `accountURLS` (off the leaderboard) and returns their URLs."""
+    keep = set(accountURLS)
+    removed = sorted(url for url in self.accounts if url not in keep)
+    for url in removed:
+      del self.accounts[url]
+    return removed
+
+  def save(self) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+    tmpPath = self.path + '.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as file:
+      json.dump(self.accounts, file)
+    os.replace(tmpPath, self.path)
+
+
+def planRefresh(store, accountURLS, signals, maxAge=MAX_STATE_AGE, now=None) -> tuple:
+  """Splits accounts into those to scrape and those whose cached Trader is still good.
+
+  Accounts are scraped when they are new, their leaderboard signal changed, no
+  signal was captured, or their cached state is older than `maxAge`. Stale
+  accounts come last so that changed ones are scraped first.
+  """
+  now = time.time() if now is None else now
+  changed, stale, unchanged = [], [], []
+
+  for url in sorted(accountURLS):
+    state = store.get(url)
+    signal = combineSignals(signals[url]) if signals.get(url) else None
+    if state is None or signal is None or state['signal'] != signal:
+      changed.append(url)
+    elif maxAge is not None and now - state['scrapedAt'] > maxAge:
+      stale.append(url)
+    else:
+      unchanged.append(url)
+
+  return changed + stale, unchanged
+
+
+class IncrementalResult:
+  def __init__(self, traders, changed, unchanged, removed) -> None:
+    self.traders = traders
+    self.changed = changed
+    self.unchanged = unchanged
+    self.removed = removed
+
+
+def incrementalScrape(accountURLS, signals, store, scrapeFn, maxAge=MAX_STATE_AGE) -> IncrementalResult:
+  """Scrapes only the accounts that moved and merges cached Traders back in for the rest.
+
+  `scrapeFn(urls)` is any backend returning Traders for those URLs (for example
+  accountPageScraper). The merged list gets trader IDs from sorted URL order,
+  like a full scrape; `changed` holds just the freshly scraped Traders and
+  `removed` the URLs of accounts that left the leaderboard, which are pruned
+  from the store so it does not grow with every account ever seen.
+  """
+  toScrape, unchanged = planRefresh(store, accountURLS, signals, maxAge=maxAge)
+  print(f'Incremental scrape: {len(toScrape)} accounts to refresh, {len(unchanged)} unchanged\n')
+
+  fresh = {trader.url: trader for trader in scrapeFn(toScrape)} if toScrape else {}
+  for url, trader in fresh.items():
+    store.update(trader, combineSignals(signals[url]) if signals.get(url) else None)
+  removed = store.prune(accountURLS)
+  store.save()
+
+  traders = []
+  changed = []
+  for traderID, url in enumerate(sorted(accountURLS)):
+    if url in fresh:
+      trader = fresh[url]
+      trader.traderID = traderID
+      changed.append(trader)
+    elif store.get(url) is not None:
+      trader = Trader.fromDict(store.get(url)['trader'], traderID=traderID)
+    else:
+      # A new account whose scrape failed has nothing cached to fall back on
+      continue
+    traders.append(trader)
+
+  return IncrementalResult(traders, changed, unchanged, removed)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from .positionFrame import as_frame
+
+
+# Default price-shock grid: -20% to +20% in 0.5% steps
+DEFAULT_MOVES = np.round(np.linspace(-0.20, 0.20, 81), 4)
+
+
+def liquidation_moves(frame, prices):
+    """Signed price move, as a fraction of the live price, at which each position is liquidated.
+
+    A long at liq 1,900 with ETH at 2,000 returns -0.05; a short returns a
+    positive move. NaN where the position has no liquidation price or its
+    asset has no live price.
+    """
+    asset_prices = np.array([prices.get(asset, np.nan) for asset in frame.assets] or [np.nan], dtype=np.float64)
+    live = asset_prices[frame.asset] if len(frame) else np.empty(0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return frame.liq / live - 1
+
+
+class LiquidationCurves:
+    """Notional liquidated per asset as a function of the asset's price move.
+
+    For every asset the liquidation moves of its longs and shorts are kept
+    sorted with cumulative sizes, so the notional liquidated at any move, or
+    a whole grid of moves, is a searchsorted away. A long is liquidated by any
+    move at or below its liquidation move, a short by any move at or above it.
+    """
+
+    def __init__(self, frame, prices):
+        frame = as_frame(frame)
+        moves = liquidation_moves(frame, prices)
+        known = ~np.isnan(moves)
+        size = frame.size.astype(np.float64)
+
+        self.assets = {}
+        for code in np.unique(frame.asset[known]):
+            in_asset = known & (frame.asset == code)
+            longs = in_asset & ~frame.short
+            shorts = in_asset & frame.short
+
+            long_order = np.argsort(moves[longs], kind='stable')
+            long_moves = moves[longs][long_order]
+            # Notional of longs[k:], i.e. every long liquidated at or above long_moves[k]
+            long_suffix = np.append(np.cumsum(size[longs][long_order][::-1])[::-1], 0.0)
+
+            short_order = np.argsort(moves[shorts], kind='stable')
+            short_moves = moves[shorts][short_order]
+            # Notional of shorts[:k]
+            short_prefix = np.append(0.0, np.cumsum(size[shorts][short_order]))
+
+            self.assets[frame.assets[code]] = (long_moves, long_suffix, short_moves, short_prefix)
+
+    def liquidated(self, asset, moves):
+        """Long and short notional liquidated if `asset` moves by `moves` (a fraction or an array of them)."""
+        if asset not in self.assets:
+            zeros = np.zeros_like(np.asarray(moves, dtype=np.float64))
+            return zeros, zeros
+        long_moves, long_suffix, short_moves, short_prefix = self.assets[asset]
+        moves = np.asarray(moves, dtype=np.float64)
+        longs = long_suffix[np.searchsorted(long_moves, moves, side='left')]
+        shorts = short_prefix[np.searchsorted(short_moves, moves, side='right')]
+        return longs, shorts
+
+    def at(self, asset, move):
+        """Total notional liquidated by one move, e.g. curves.at('ETH', -0.07)."""
+        longs, shorts = self.liquidated(asset, move)
+        return float(longs + shorts)
+
+    def curve(self, asset, moves=DEFAULT_MOVES):
+        longs, shorts = self.liquidated(asset, moves)
+        return {'moves': np.asarray(moves), 'longs': longs, 'shorts': shorts, 'total': longs + shorts}
+
+    def curves(self, moves=DEFAULT_MOVES):
+        """The cascade curve of every asset over the same grid of moves."""
+        return {asset: self.curve(asset, moves) for asset in self.assets}
+
+
+def calculate_liquidation_curves(tradersLst, prices, moves=DEFAULT_MOVES):
+    return LiquidationCurves(tradersLst, prices).curves(moves)
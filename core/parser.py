@@ -5,10 +5,48 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 
 
+# Reads every cell of a tbody in one WebDriver round trip
+TABLE_ROWS_JS = """
+var rows = arguments[0].rows;
+var out = [];
+for (var i = 0; i < rows.length; i++) {
+  var cells = rows[i].cells;
+  var row = [];
+  for (var j = 0; j < cells.length; j++) {
+    row.push(cells[j].innerText);
+  }
+  out.push(row);
+}
+return out;
+"""
+
+
+def tableRows(tableElem) -> list[list[str]]:
+  """Returns the innerText of every cell of a tbody element as a 2-D list of strings."""
+  return tableElem.parent.execute_script(TABLE_ROWS_JS, tableElem)
+
+
+
+# Patterns are compiled once; the clean* helpers below are the per-cell fallback of positionFromCells
+ASSET_PATTERN = re.compile(r'(\w+)\s*(\d+\.\d+)x\s*(\w+)')
+PNL_PATTERN = re.compile(r'[-\+]?\$([\d,]+\.\d+)\s*([-\+])\$([\d,]+\.\d+)\s*\(([-\+]?\d+\.\d+)%\)')
+DOLLAR_PATTERN = re.compile(r'\$([\d,]+\.\d+)')
+
+# positionFromCells joins the five cells it reads with this separator and parses them in one match
+CELL_SEPARATOR = '\x1f'
+
+# Strict single-pass pattern for the usual row layout; any row it rejects goes through the clean* helpers
+POSITION_ROW = re.compile(
+  r'(\w+)\s*(\d+\.\d+)x\s*(\w+)[^\x1f]*\x1f'                                        # asset, leverage, side
+  r'[^\x1f$]*\$[\d,]+\.\d+\s*([-+])\$([\d,]+\.\d+)\s*\(([-+]?\d+\.\d+)%\)[^\x1f]*\x1f'  # net value, pnl, pnl %
+  r'[^\x1f$]*\$([\d,]+\.\d+)[^\x1f]*\x1f'                                             # collateral
+  r'[^\x1f$]*\$([\d,]+\.\d+)[^\x1f]*\x1f'                                             # entry price
+  r'[^\x1f$]*(?:\$([\d,]+\.\d+)[^\x1f]*)?'                                              # liquidation price, if any
+)
+
 
 def cleanAssetText(text, outputDict):
-    pattern = r'(\w+)\s*(\d+\.\d+)x\s*(\w+)'
-    match = re.match(pattern, text)
+    match = ASSET_PATTERN.match(text)
 
     if match:
         asset = match.group(1)
@@ -33,16 +71,15 @@ def cleanAssetText(text, outputDict):
 
 
 def cleanPnlText(text, outputDict):
-  pattern = r'[-\+]?\$([\d,]+\.\d+)\s*[-\+]\$([\d,]+\.\d+)\s*\(([-\+]?\d+\.\d+)%\)'
-  match = re.search(pattern, text)
+  match = PNL_PATTERN.search(text)
 
-  if match:
-    pnl = float(match.group(2).replace(',', ''))
-    if text.find('-$' + match.group(2)) != -1: 
-      pnl *= -1
-    percentage = float(match.group(3))
-    if text.find('-' + match.group(3)) != -1:
-      percentage *= -1
+  if not match:
+    raise ValueError(f"No PnL found in {text!r}")
+
+  pnl = float(match.group(3).replace(',', ''))
+  if match.group(2) == '-':
+    pnl *= -1
+  percentage = float(match.group(4))
 
   outputDict['pnl'] = pnl
   outputDict['pnlPerc'] = percentage
@@ -50,32 +87,29 @@ def cleanPnlText(text, outputDict):
 
 
 def cleanCollatText(text, outputDict):
-  pattern = r'\$([\d,]+\.\d+)'
-  match = re.search(pattern, text)
+  match = DOLLAR_PATTERN.search(text)
 
-  if match:
-    collat = float(match.group(1).replace(',', ''))
+  if not match:
+    raise ValueError(f"No collateral found in {text!r}")
 
-  outputDict['collateral'] = collat
+  outputDict['collateral'] = float(match.group(1).replace(',', ''))
 
 
 
 def cleanEntryText(text, outputDict):
-  pattern = r'\$([\d,]+\.\d+)'
-  match = re.search(pattern, text)
+  match = DOLLAR_PATTERN.search(text)
 
-  if match:
-    entry = float(match.group(1).replace(',', ''))
+  if not match:
+    raise ValueError(f"No entry price found in {text!r}")
 
-  outputDict['entry'] = entry
+  outputDict['entry'] = float(match.group(1).replace(',', ''))
 
 
 
 def cleanLiqText(text, outputDict):
   liq = None
   
-  pattern = r'\$([\d,]+\.\d+)'
-  match = re.search(pattern, text)
+  match = DOLLAR_PATTERN.search(text)
 
   if match:
     liq = float(match.group(1).replace(',', ''))
@@ -97,27 +131,44 @@ def cleanPositionBlock(rawCargo) -> dict:
   return outputDict
 
 
-def positionDataParser(rowElem) -> Position:
-  dataElems = rowElem.find_elements(By.TAG_NAME, 'td')
+def positionFromCells(cells) -> Position:
+  """Builds a Position from the text of one positions-table row.
 
-  if len(dataElems) < 7:  # 7 expected elements based on your code
-    raise ValueError(f"Expected at least 7 elements in dataElems, but got {len(dataElems)}. Check the page structure.")
+  The fast path parses all fields with one POSITION_ROW match over the joined
+  cells; rows it does not recognise fall back to the per-cell clean* helpers.
+  """
+  if len(cells) < 7:  # 7 expected elements based on your code
+    raise ValueError(f"Expected at least 7 elements in dataElems, but got {len(cells)}. Check the page structure.")
 
+  rowText = CELL_SEPARATOR.join((cells[0], cells[2], cells[3], cells[4], cells[6]))
+  match = POSITION_ROW.fullmatch(rowText)
 
-  assetText = dataElems[0].get_attribute('innerText')
-  pnlText = dataElems[2].get_attribute('innerText')
-  collatText = dataElems[3].get_attribute('innerText')
-  entryText = dataElems[4].get_attribute('innerText')
-  liqText = dataElems[6].get_attribute('innerText')
+  if match:
+    asset, leverage, side, pnlSign, pnl, pnlPerc, collat, entry, liq = match.groups()
+    pnl = float(pnl.replace(',', ''))
+    return Position(asset, float(leverage), side == 'Short',
+                    -pnl if pnlSign == '-' else pnl, float(pnlPerc),
+                    float(collat.replace(',', '')),
+                    float(liq.replace(',', '')) if liq is not None else None,
+                    float(entry.replace(',', '')))
 
-  rawCargo = [assetText, pnlText, collatText, entryText, liqText]
-  cleanCargo = cleanPositionBlock(rawCargo=rawCargo)
+  cleanCargo = cleanPositionBlock(rawCargo=[cells[0], cells[2], cells[3], cells[4], cells[6]])
 
   return Position(cleanCargo['asset'], cleanCargo['leverage'],
                   cleanCargo['short'], cleanCargo['pnl'], cleanCargo['pnlPerc'],
                   cleanCargo['collateral'], cleanCargo['liq'], cleanCargo['entry'])
 
 
+def positionDataParser(rowElem) -> Position:
+  dataElems = rowElem.find_elements(By.TAG_NAME, 'td')
+  return positionFromCells([elem.get_attribute('innerText') for elem in dataElems])
+
+
+def positionTableParser(tableElem) -> list[Position]:
+  """Parses a whole positions tbody with a single round trip."""
+  return [positionFromCells(cells) for cells in tableRows(tableElem)]
+
+
 
 
 
@@ -167,17 +218,26 @@ def cleanTriggerTextO(text):
 
 
 
-def orderDataParser(rowElem) -> Order:
-  dataElems = rowElem.find_elements(By.TAG_NAME, 'td')
-
-  assetText = dataElems[0].get_attribute('innerText')
-  typeText = dataElems[1].get_attribute('innerText')
-  sizeText = dataElems[2].get_attribute('innerText')
-  triggerText = dataElems[3].get_attribute('innerText')
+def orderFromCells(cells) -> Order:
+  """Builds an Order from the text of one orders-table row."""
+  assetText = cells[0]
+  typeText = cells[1]
+  sizeText = cells[2]
+  triggerText = cells[3]
 
   assetO, shortO = cleanAssetTextO(assetText)
   orderType = cleanTypeTextO(typeText)
   size = cleanSizeTextO(sizeText)
   trigger = cleanTriggerTextO(triggerText)
 
-  return Order(assetO, shortO, orderType, size, trigger)
\ No newline at end of file
+  return Order(assetO, shortO, orderType, size, trigger)
+
+
+def orderDataParser(rowElem) -> Order:
+  dataElems = rowElem.find_elements(By.TAG_NAME, 'td')
+  return orderFromCells([elem.get_attribute('innerText') for elem in dataElems[:4]])
+
+
+def orderTableParser(tableElem) -> list[Order]:
+  """Parses a whole orders tbody with a single round trip."""
+  return [orderFromCells(cells) for cells in tableRows(tableElem)]
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+class PositionFrame:
+    """Struct-of-arrays view of every open position, built once per analysis run.
+
+    Each column is a NumPy array with one entry per position, ordered trader by
+    trader; `trader_index` maps a position back to its trader and `offsets`
+    gives each trader's slice. Assets are integer codes into `assets`, and a
+    missing liquidation price is NaN.
+    """
+
+    def __init__(self, traders, assets, asset, leverage, short, pnl, collateral, size, liq, entry, offsets):
+        self.traders = traders
+        self.assets = list(assets)
+        self.asset = asset
+        self.leverage = leverage
+        self.short = short
+        self.pnl = pnl
+        self.collateral = collateral
+        self.size = size
+        self.liq = liq
+        self.entry = entry
+        self.offsets = offsets
+        self.n_traders = len(offsets) - 1
+        self.trader_index = np.repeat(np.arange(self.n_traders), np.diff(offsets))
+
+    @classmethod
+    def from_traders(cls, tradersLst):
+        tradersLst = list(tradersLst)
+        positions = [pos for trader in tradersLst for pos in trader.positions]
+        counts = [len(trader.positions) for trader in tradersLst]
+        offsets = np.zeros(len(tradersLst) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        codes = {}
+        asset = np.fromiter((codes.setdefault(pos.asset, len(codes)) for pos in positions),
+                            dtype=np.int32, count=len(positions))
+        n = len(positions)
+        return cls(
+            tradersLst,
+            codes.keys(),
+            asset,
+            np.fromiter((pos.leverage for pos in positions), dtype=np.float64, count=n),
+            np.fromiter((pos.short for pos in positions), dtype=np.bool_, count=n),
+            np.fromiter((pos.pnl for pos in positions), dtype=np.float64, count=n),
+            np.fromiter((pos.collateral for pos in positions), dtype=np.float64, count=n),
+            np.fromiter((pos.size for pos in positions), dtype=np.int64, count=n),
+            np.fromiter((np.nan if pos.liq is None else pos.liq for pos in positions), dtype=np.float64, count=n),
+            np.fromiter((pos.entry for pos in positions), dtype=np.float64, count=n),
+            offsets,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Builds the frame straight from a core.snapshot.Snapshot's columns, no Position objects involved.
+
+        The position columns are used as loaded; only the orders, which the
+        order views still walk trader by trader, are turned into objects.
+        """
+        pos = snapshot.positions
+        collateral = np.asarray(pos['collateral'])
+        leverage = np.asarray(pos['leverage'])
+        return cls(
+            SnapshotTraders(snapshot),
+            snapshot.assets,
+            np.asarray(pos['asset'], dtype=np.int32),
+            leverage,
+            np.asarray(pos['short']),
+            np.asarray(pos['pnl']),
+            collateral,
+            (collateral * leverage).astype(np.int64),
+            np.asarray(pos['liq']),
+            np.asarray(pos['entry']),
+            np.asarray(snapshot.posOffsets, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.asset)
+
+    def asset_code(self, name):
+        return self.assets.index(name) if name in self.assets else -1
+
+    def per_trader_sum(self, values):
+        return np.bincount(self.trader_index, weights=values, minlength=self.n_traders)
+
+    def per_trader_max(self, values, mask=None, default=0.0):
+        """Max of `values` within each trader's positions (restricted to `mask`), `default` where none qualify."""
+        values = np.asarray(values, dtype=np.float64)
+        if mask is not None:
+            values = np.where(mask, values, -np.inf)
+        result = np.full(self.n_traders, -np.inf)
+        non_empty = np.flatnonzero(np.diff(self.offsets) > 0)
+        if len(values):
+            result[non_empty] = np.maximum.reduceat(values, self.offsets[non_empty])
+        result[np.isneginf(result)] = default
+        return result
+
+    def per_asset_count(self, mask=None):
+        codes = self.asset if mask is None else self.asset[mask]
+        return np.bincount(codes, minlength=len(self.assets))
+
+    def per_asset_sum(self, values, mask=None):
+        codes, values = (self.asset, values) if mask is None else (self.asset[mask], values[mask])
+        return np.bincount(codes, weights=values, minlength=len(self.assets))
+
+
+class SnapshotTraders:
+    """The traders of a frame built from a snapshot, each built on first access.
+
+    They carry identity and orders only: their positions are the frame's
+    columns, so code holding such a frame reads positions from it, never from
+    trader.positions. `snapshot` is kept for views that take one directly.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, i):
+        if i not in self.cache:
+            self.cache[i] = self.snapshot.trader(i, positions=False)
+        return self.cache[i]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def as_frame(data):
+    """Accepts either a PositionFrame or a list of traders."""
+    if isinstance(data, PositionFrame):
+        return data
+    return PositionFrame.from_traders(data)
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+# Seconds a price stays fresh; thin, fast-moving assets expire sooner.
+# These suit the daemon and the lookups made while one scrape streams in. One-shot runs are usually
+# further apart than MAX_STALE_AGE, so across runs the cache rarely saves a request; mainAnalysis
+# therefore asks for fresh prices rather than serving stale ones to a process that is about to exit.
+DEFAULT_PRICE_TTL = 60
+PRICE_TTLS = {
+    "PEPE": 30, "SHIB": 30, "WIF": 30, "SATS": 30, "ORDI": 30,
+}
+# Stale prices older than this are never served, even in stale-while-revalidate mode
+MAX_STALE_AGE = 15 * 60
+
+
+class PriceCache:
+    """Per-asset TTL cache of USD prices backed by a SQLite file, so prices survive between runs.
+
+    Lookups are served from an in-memory mirror of the table; writes go to both.
+    Every lookup is counted as a hit (fresh), a stale hit or a miss.
+    """
+
+    def __init__(self, path=None, ttls=None, default_ttl=DEFAULT_PRICE_TTL, max_stale_age=MAX_STALE_AGE):
+        self.path = path or ":memory:"
+        self.ttls = dict(PRICE_TTLS)
+        self.ttls.update(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_stale_age = max_stale_age
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "stale": 0, "misses": 0, "writes": 0}
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS prices (ticker TEXT PRIMARY KEY, price REAL NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.entries = {
+            ticker: (price, fetched_at)
+            for ticker, price, fetched_at in self.conn.execute("SELECT ticker, price, fetched_at FROM prices")
+        }
+
+    def ttl(self, ticker):
+        return self.ttls.get(ticker, self.default_ttl)
+
+    def lookup(self, tickers, now=None):
+        """Splits tickers into fresh prices, stale-but-usable prices and misses."""
+        now = time.time() if now is None else now
+        fresh, stale, missing = {}, {}, []
+
+        with self.lock:
+            for ticker in tickers:
+                entry = self.entries.get(ticker)
+                if entry is None:
+                    missing.append(ticker)
+                    self.counters["misses"] += 1
+                    continue
+                price, fetched_at = entry
+                age = now - fetched_at
+                if age <= self.ttl(ticker):
+                    fresh[ticker] = price
+                    self.counters["hits"] += 1
+                elif age <= self.max_stale_age:
+                    stale[ticker] = price
+                    self.counters["stale"] += 1
+                else:
+                    missing.append(ticker)
+                    self.counters["misses"] += 1
+        return fresh, stale, missing
+
+    def update(self, prices, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows = [(ticker, float(price), fetched_at) for ticker, price in prices.items()]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?)", rows)
+            self.conn.commit()
+            for ticker, price, stamp in rows:
+                self.entries[ticker] = (price, stamp)
+            self.counters["writes"] += len(rows)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
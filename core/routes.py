@@ -13,6 +13,20 @@ routes = {
 accountRoutes = {
   'POSITIONS_TAB': '//*[@id="root"]/div/div[1]/div/div/div[2]/div[2]/div[1]/div/div[1]',
   'ORDERS_TAB': '//*[@id="root"]/div/div[1]/div/div/div[2]/div[2]/div[1]/div/div[2]/div',
+  'TAB_CONTENT': '//*[@id="root"]/div/div[1]/div/div/div[2]/div[2]/div[2]',
   'POS_TABLE': '//*[@id="root"]/div/div[1]/div/div/div[2]/div[2]/div[2]/table/tbody',
   'ORD_TABLE': '//*[@id="root"]/div/div[1]/div/div/div[2]/div[2]/div[2]/table/tbody'
-}
\ No newline at end of file
+}
+
+# Structured data endpoints used by core.fetcher; '{account}' is the wallet address.
+# PLACEHOLDERS: GMX publishes no REST endpoint for per-account positions and orders (the app reads them
+# from its subgraph and on-chain Reader contract), so these paths describe the schema the HTTP backend
+# expects, not a real GMX API. There is no default base URL; --api-base must point at a service (e.g. an
+# adapter over the subgraph, or a core.fetcher.RecordedServer) that serves this schema.
+apiRoutes = {
+  'API_BASE_URL': None,
+  'LEADERBOARD_API': 'leaderboard/accounts',
+  'POSITIONS_API': 'accounts/{account}/positions',
+  'ORDERS_API': 'accounts/{account}/orders',
+  'ACCOUNT_URL': 'https://app.gmx.io/#/accounts/{account}?network=arbitrum&v=2'
+}
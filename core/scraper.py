@@ -1,15 +1,21 @@
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
 import time
-from .routes import routes, accountRoutes
+from .routes import routes
 from .classes import Position, Order, Trader
-from .parser import positionDataParser, orderDataParser
+from .parser import positionTableParser, orderTableParser
+from .waits import waitEngine, routeXPath
+from .incremental import rowSignal
+from .htmlParser import positionsFromHTML, ordersFromHTML, saveAccountSnapshot, saveLeaderboardSnapshot
+import itertools
 import random
-
-
-WAIT = 12
-MINIWAIT = 7
+import os
+import queue
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 
 
 def random_sleep(min_seconds, max_seconds):
@@ -17,8 +23,34 @@ def random_sleep(min_seconds, max_seconds):
 
 
 
-def accountURLAccumulator(tableElement, outputSet) -> None:
-  """Uses selenium to accumulate URL's of accounts of interests."""
+# Reads each leaderboard row's account link and cell texts in one round trip
+LEADERBOARD_ROWS_JS = """
+var rows = arguments[0].rows;
+var out = [];
+for (var i = 0; i < rows.length; i++) {
+  var link = rows[i].querySelector('a');
+  if (!link) continue;
+  var cells = [];
+  for (var j = 0; j < rows[i].cells.length; j++) {
+    cells.push(rows[i].cells[j].innerText);
+  }
+  out.push([link.href, cells]);
+}
+return out;
+"""
+
+
+def accountURLAccumulator(tableElement, outputSet, signals=None) -> None:
+  """Uses selenium to accumulate URL's of accounts of interests.
+
+  With a `signals` dict, each account's leaderboard row (PnL, size, ...) is also
+  recorded as a cheap change signal for incremental scraping.
+  """
+  if signals is not None:
+    for href, cells in tableElement.parent.execute_script(LEADERBOARD_ROWS_JS, tableElement):
+      outputSet.add(href)
+      signals.setdefault(href, []).append(rowSignal(cells))
+    return
 
   aTags = tableElement.find_elements(By.TAG_NAME, 'a')
 
@@ -27,50 +59,58 @@ def accountURLAccumulator(tableElement, outputSet) -> None:
     outputSet.add(href)
 
 
-def accumulateTable(driver, outputSet, interval: int) -> None:
-  time.sleep(interval)
-  
-  tableElement = driver.find_element(By.XPATH, routes['TABLE_X'])
+def accumulateTable(driver, outputSet, previous=None, snapshotDir=None, pageNumber=0, signals=None) -> str:
+  """Accumulates the leaderboard table once it has rendered (or changed from `previous`) and returns its text."""
+  if previous is None:
+    tableElement = waitEngine.waitFor(driver, 'TABLE_X')
+  else:
+    tableElement = waitEngine.waitForChange(driver, 'TABLE_X', previous)
+
+  if snapshotDir:
+    saveLeaderboardSnapshot(snapshotDir, pageNumber, driver.page_source)
+
   print(' Successfully Accumulated Table! '.center(50, '_'), '\n')
-  accountURLAccumulator(tableElement=tableElement, outputSet=outputSet)
+  accountURLAccumulator(tableElement=tableElement, outputSet=outputSet, signals=signals)
+  return waitEngine.currentText(driver, 'TABLE_X')
 
 
 def traverseDriver(driver, route):
-  random_sleep(1, 3)
-  traverser = driver.find_element(By.XPATH, routes[route])
+  traverser = waitEngine.waitFor(driver, route, populated=False)
   traverser.click()
 
 
-def accountURLScraper() -> list:
-  """Uses selenium to accumulate URL's of accounts of interests."""
+def accountURLScraper(snapshotDir=None, signals=None, pool=None) -> list:
+  """Uses selenium to accumulate URL's of accounts of interests.
+
+  With a snapshotDir every leaderboard page is also stored for offline replay,
+  and a `signals` dict is filled with each account's leaderboard row signals.
+  Without a DriverPool a visible browser is launched just for this phase.
+  """
   setOfAccountURLS = set()
 
   scanUrl = routes['BASE_URL'] + routes['LEADERBOARD_ROUTE']
-  driver = webdriver.Firefox()
-
-  driver.get(scanUrl)
-  accumulateTable(driver, setOfAccountURLS, WAIT)
-
-  traverseDriver(driver, 'PAGE2_X')
-  accumulateTable(driver, setOfAccountURLS, MINIWAIT)
-
-  traverseDriver(driver, 'LAST30BUTTON_X')
-  accumulateTable(driver, setOfAccountURLS, WAIT)
-
-  traverseDriver(driver, 'PAGE1_X')
-  accumulateTable(driver, setOfAccountURLS, MINIWAIT)
-
-  traverseDriver(driver, 'LAST7BUTTON_X')
-  accumulateTable(driver, setOfAccountURLS, WAIT)
-
-  traverseDriver(driver, 'PAGE2_X')
-  accumulateTable(driver, setOfAccountURLS, MINIWAIT)
-
-  traverseDriver(driver, 'TOP_POS_X')
-  accumulateTable(driver, setOfAccountURLS, WAIT)
-
-  traverseDriver(driver, 'PAGE2_X')
-  accumulateTable(driver, setOfAccountURLS, MINIWAIT)
+  ownPool = pool is None
+  if ownPool:
+    pool = DriverPool(size=1, headless=False)
+  try:
+    pooled = pool.acquire()
+    try:
+      driver = pooled.driver
+
+      driver.get(scanUrl)
+      tableText = accumulateTable(driver, setOfAccountURLS, snapshotDir=snapshotDir, signals=signals)
+
+      pageRoutes = ['PAGE2_X', 'LAST30BUTTON_X', 'PAGE1_X', 'LAST7BUTTON_X', 'PAGE2_X', 'TOP_POS_X', 'PAGE2_X']
+      for pageNumber, route in enumerate(pageRoutes, start=1):
+        traverseDriver(driver, route)
+        tableText = accumulateTable(driver, setOfAccountURLS, previous=tableText,
+                                    snapshotDir=snapshotDir, pageNumber=pageNumber, signals=signals)
+      pool.countPage(pooled)
+    finally:
+      pool.release(pooled)
+  finally:
+    if ownPool:
+      pool.close()
 
   print('Links accumulated:\n')
   for i in setOfAccountURLS:
@@ -79,40 +119,83 @@ def accountURLScraper() -> list:
   print('\n', f'Total amount of links: {len(setOfAccountURLS)}\n')
   print('EXPECTED: 160')
 
-  driver.quit()
-
   return setOfAccountURLS
 
 
 # Functions dedicated to scraping trader data found below
 
 
-def accountPositionsAccumulator(tableElem) -> list[Position]:
-  positionsLst = []
-  
-  #Each row represents a position
-  rowElems = tableElem.find_elements(By.TAG_NAME, 'tr')
+def accountPositionsAccumulator(tableElem, pageSource=None) -> list[Position]:
+  #Each row represents a position; the whole table is read in one round trip,
+  #or parsed locally when the page source has already been fetched
+  if pageSource is not None:
+    return positionsFromHTML(pageSource)
+  return positionTableParser(tableElem)
+
+
+def accountOrdersAccumulator(driver, previous=None, parseMode='script', pages=None) -> list[Order]:
+  if previous is None:
+    tableElem = waitEngine.waitFor(driver, 'ORD_TABLE')
+  else:
+    tableElem = waitEngine.waitForChange(driver, 'ORD_TABLE', previous)
 
-  for rowElem in rowElems:
-    position = positionDataParser(rowElem=rowElem)
-    positionsLst.append(position)
+  pageSource = pageSourceFor(driver, 'orders', parseMode, pages)
+  if pageSource is not None and parseMode == 'html':
+    return ordersFromHTML(pageSource)
+  return orderTableParser(tableElem)
 
-  return positionsLst
 
+def pageSourceFor(driver, tab, parseMode, pages):
+  """Fetches the page source once if it is parsed offline ('html' mode) or kept as a snapshot."""
+  if parseMode != 'html' and pages is None:
+    return None
+  pageSource = driver.page_source
+  if pages is not None:
+    pages[tab] = pageSource
+  return pageSource
 
-def accountOrdersAccumulator(driver) -> list[Order]:
-  ordersLst = []
 
+# Reads both tab labels and whether the account's data has loaded, in one round trip.
+# The labels read 'Positions' / 'Orders' as soon as the page renders and only gain their
+# counts once the account has loaded, so a bare label means "no positions" only once the
+# tab content shows a table with rows or an empty-state message instead of a loader.
+ACCOUNT_TABS_JS = """
+function node(xpath) {
+  return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+var positions = node(arguments[0]), orders = node(arguments[1]), content = node(arguments[2]);
+if (!positions || !orders) return null;
+var loaded = false;
+if (content) {
+  var text = content.innerText.trim();
+  loaded = content.querySelectorAll('tbody tr').length > 0 || (text !== '' && !/loading/i.test(text));
+}
+return [positions.innerText, orders.innerText, loaded];
+"""
 
 
-  tableElem = driver.find_element(By.XPATH, accountRoutes['ORD_TABLE'])
-  rowElems = tableElem.find_elements(By.TAG_NAME, 'tr')
+def tabHasCount(label) -> bool:
+  return any(char.isdigit() for char in label)
 
-  for rowElem in rowElems:
-    order = orderDataParser(rowElem=rowElem)
-    ordersLst.append(order)
 
-  return ordersLst
+def waitForAccountTabs(driver) -> tuple:
+  """Waits until the positions and orders tab labels can be trusted and returns both elements.
+
+  That is once either label shows its count, or the tab content holds the
+  position table or the empty-state node. Waiting for the labels' text alone
+  returns on the bare 'Positions' label, before the account has loaded.
+  """
+  xpaths = [routeXPath('POSITIONS_TAB'), routeXPath('ORDERS_TAB'), routeXPath('TAB_CONTENT')]
+
+  def settled(driver):
+    state = driver.execute_script(ACCOUNT_TABS_JS, *xpaths)
+    if state is None:
+      return False
+    positionsText, ordersText, loaded = state
+    return loaded or tabHasCount(positionsText) or tabHasCount(ordersText)
+
+  waitEngine.until(driver, 'POSITIONS_TAB', settled)
+  return driver.find_element(By.XPATH, xpaths[0]), driver.find_element(By.XPATH, xpaths[1])
 
 
 def positionsAndOrdersCheck(elemTuple: tuple) -> tuple:
@@ -128,58 +211,485 @@ def positionsAndOrdersCheck(elemTuple: tuple) -> tuple:
   return (posBool, ordBool)
 
 
-def accountPageScraper(accountURLS: set) -> list[Trader]:
+# Window size the XPaths were written against; set once at launch instead of maximising per page
+WINDOW_SIZE = (1920, 1080)
+
+# Hosts the account pages pull in that the scraper never reads: analytics, web fonts, wallet SDKs
+BLOCKED_HOSTS = [
+  'googletagmanager.com',
+  'google-analytics.com',
+  'fonts.googleapis.com',
+  'fonts.gstatic.com',
+  'sentry.io',
+  'walletconnect.com',
+  'walletconnect.org',
+  'web3modal.org',
+  'intercom.io',
+  'hotjar.com',
+  'segment.io',
+  'mixpanel.com'
+]
+
+# Firefox preferences of the lean profile: no images, no web fonts, no media autoplay
+LEAN_PREFERENCES = {
+  'permissions.default.image': 2,
+  'browser.display.use_document_fonts': 0,
+  'gfx.downloadable_fonts.enabled': False,
+  'media.autoplay.default': 5,
+  'media.autoplay.blocking_policy': 2,
+  'dom.webnotifications.enabled': False,
+  'browser.chrome.site_icons': False
+}
+
+
+def blockingPAC(blockedHosts) -> str:
+  """A proxy auto-config script that sends requests for `blockedHosts` (and subdomains) to a dead port."""
+  checks = ' || '.join(f'dnsDomainIs(host, ".{host}") || host == "{host}"' for host in blockedHosts)
+  script = f'function FindProxyForURL(url, host) {{ if ({checks}) return "PROXY 127.0.0.1:9"; return "DIRECT"; }}'
+  return 'data:text/javascript,' + quote(script)
+
+
+def makeDriver(headless=False, lean=False, blockedHosts=None):
+  """Launches a Firefox driver, optionally without a visible window.
+
+  The lean profile only loads what the tables need: it is headless, skips
+  images and web fonts, routes `blockedHosts` (default BLOCKED_HOSTS) to a
+  dead proxy, and returns from driver.get() once the DOM is ready instead of
+  waiting for every subresource. The waits in core.waits cover the rest.
+  """
+  options = webdriver.FirefoxOptions()
+  headless = headless or lean
+  if headless:
+    options.add_argument('-headless')
+    options.add_argument(f'--width={WINDOW_SIZE[0]}')
+    options.add_argument(f'--height={WINDOW_SIZE[1]}')
+
+  if lean:
+    options.page_load_strategy = 'eager'
+    for name, value in LEAN_PREFERENCES.items():
+      options.set_preference(name, value)
+    options.set_preference('network.proxy.type', 2)
+    options.set_preference('network.proxy.autoconfig_url', blockingPAC(blockedHosts or BLOCKED_HOSTS))
+
+  driver = webdriver.Firefox(options=options)
+  if not headless:
+    driver.maximize_window()
+  return driver
+
+
+def processTreeRSS(pid) -> float:
+  """Resident memory in MB of a process and all its descendants, read from /proc; None where unavailable."""
+  if not os.path.isdir('/proc'):
+    return None
+
+  children = {}
+  for entry in os.listdir('/proc'):
+    if not entry.isdigit():
+      continue
+    try:
+      with open(f'/proc/{entry}/stat', 'r') as file:
+        # The command name may contain spaces, so the parent pid is read after its closing paren
+        ppid = int(file.read().rsplit(')', 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+      continue
+    children.setdefault(ppid, []).append(int(entry))
+
+  totalKB = 0
+  stack = [pid]
+  while stack:
+    current = stack.pop()
+    stack.extend(children.get(current, []))
+    try:
+      with open(f'/proc/{current}/status', 'r') as file:
+        for line in file:
+          if line.startswith('VmRSS:'):
+            totalKB += int(line.split()[1])
+            break
+    except OSError:
+      continue
+  return totalKB / 1024
+
+
+class PooledDriver:
+  """One pooled browser plus the per-browser state that has to survive between pages."""
+
+  def __init__(self, driverID, driver) -> None:
+    self.driverID = driverID
+    self.driver = driver
+    self.pages = 0
+    self.totalPages = 0
+    self.launches = 1
+    self.orderButtonTracker = False
+    # Set once a relaunch failed and the pool gave up this slot; releasing it is then a no-op
+    self.retired = False
+
+  def pid(self):
+    service = getattr(self.driver, 'service', None)
+    process = getattr(service, 'process', None)
+    return getattr(process, 'pid', None)
+
+
+class DriverPool:
+  """Starts browsers once and lends them out across the leaderboard and account phases.
+
+  Drivers are launched lazily up to `size`, health-checked whenever they are
+  acquired, and quit and relaunched after `recycleAfter` pages so memory growth
+  inside a long-lived Firefox stays bounded. Usage:
+
+    with DriverPool(size=4) as pool:
+      urls = accountURLScraper(pool=pool)
+      traders = accountPageScraper(urls, workers=4, pool=pool)
+      pool.printReport()
+  """
+
+  def __init__(self, size=1, headless=True, recycleAfter=200, factory=None, lean=False) -> None:
+    self.size = size
+    self.headless = headless
+    self.lean = lean
+    self.recycleAfter = recycleAfter
+    self.factory = factory or (lambda: makeDriver(headless=self.headless, lean=self.lean))
+    self.idle = queue.Queue()
+    self.drivers = []
+    self.launched = 0
+    self.driverIDs = itertools.count()
+    self.lock = threading.Lock()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def acquire(self) -> PooledDriver:
+    """Returns an idle healthy driver, launching one if the pool is not full yet, else waits for one."""
+    try:
+      pooled = self.idle.get_nowait()
+    except queue.Empty:
+      with self.lock:
+        launch = self.launched < self.size
+        self.launched += launch
+      if launch:
+        return self.launch()
+      pooled = self.idle.get()
+
+    if not self.healthy(pooled):
+      print(f'Driver {pooled.driverID} failed its health check, relaunching\n')
+      self.recycle(pooled)
+    return pooled
+
+  def launch(self) -> PooledDriver:
+    try:
+      driver = self.factory()
+    except Exception:
+      with self.lock:
+        self.launched -= 1
+      raise
+    with self.lock:
+      pooled = PooledDriver(next(self.driverIDs), driver)
+      self.drivers.append(pooled)
+    return pooled
+
+  def release(self, pooled) -> None:
+    if not pooled.retired:
+      self.idle.put(pooled)
+
+  def lease(self):
+    """Context manager form of acquire/release."""
+    pool = self
+
+    class Lease:
+      def __enter__(self):
+        self.pooled = pool.acquire()
+        return self.pooled
+
+      def __exit__(self, *exc):
+        pool.release(self.pooled)
+
+    return Lease()
+
+  def healthy(self, pooled) -> bool:
+    try:
+      pooled.driver.current_url
+      return True
+    except WebDriverException:
+      return False
+
+  def recycle(self, pooled) -> None:
+    """Quits and relaunches a driver. If the relaunch fails the slot is given up, so a later
+    acquire() launches a fresh driver instead of waiting for this one, and the error is raised."""
+    try:
+      pooled.driver.quit()
+    except WebDriverException:
+      pass
+    try:
+      pooled.driver = self.factory()
+    except Exception:
+      with self.lock:
+        pooled.retired = True
+        if pooled in self.drivers:
+          self.drivers.remove(pooled)
+          self.launched -= 1
+      raise
+    pooled.pages = 0
+    pooled.launches += 1
+    pooled.orderButtonTracker = False
+
+  def countPage(self, pooled) -> None:
+    """Records a page load, recycling the driver once it reaches `recycleAfter` pages."""
+    pooled.pages += 1
+    pooled.totalPages += 1
+    if self.recycleAfter and pooled.pages >= self.recycleAfter:
+      print(f'Recycling driver {pooled.driverID} after {pooled.pages} pages\n')
+      self.recycle(pooled)
+
+  def report(self) -> list[dict]:
+    rows = []
+    for pooled in self.drivers:
+      pid = pooled.pid()
+      rows.append({
+        'driver': pooled.driverID,
+        'pages': pooled.pages,
+        'totalPages': pooled.totalPages,
+        'launches': pooled.launches,
+        'rssMB': processTreeRSS(pid) if pid else None
+      })
+    return rows
+
+  def printReport(self) -> None:
+    print(' Driver Pool '.center(50, '_'), '\n')
+    for row in self.report():
+      memory = f"{row['rssMB']:.0f} MB" if row['rssMB'] is not None else 'n/a'
+      print(f"Driver {row['driver']}: {row['totalPages']} pages ({row['pages']} since launch), "
+            f"{row['launches']} launches, RSS {memory}")
+    print()
+
+  def close(self) -> None:
+    with self.lock:
+      for pooled in self.drivers:
+        try:
+          pooled.driver.quit()
+        except WebDriverException:
+          pass
+      self.drivers = []
+      self.launched = 0
+      self.idle = queue.Queue()
+
+
+class RateBudget:
+  """Paces a single driver: a gap between page loads and a longer break every `breakEvery` pages."""
+
+  def __init__(self, minInterval=2, breakEvery=50, breakRange=(15, 30)) -> None:
+    self.minInterval = minInterval
+    self.breakEvery = breakEvery
+    self.breakRange = breakRange
+    self.pages = 0
+    self.lastLoad = None
+
+  def beforeLoad(self):
+    if self.lastLoad is not None:
+      elapsed = time.monotonic() - self.lastLoad
+      if elapsed < self.minInterval:
+        time.sleep(self.minInterval - elapsed)
+    self.lastLoad = time.monotonic()
+
+  def afterLoad(self):
+    self.pages += 1
+    if self.pages % self.breakEvery == 0:
+      print('\nTaking a short break to avoid rate limiting!\n')
+      random_sleep(*self.breakRange)
 
-  tradersData = []
-  traderIDTracker = 0
 
-  driver = webdriver.Firefox()
-  orderButtonTracker = False
+def scrapeAccount(driver, URL, traderID, orderButtonTracker, parseMode='script', snapshotDir=None) -> tuple:
+  """Scrapes one account page. Returns the Trader and the updated orders-tab state of the driver.
 
-  for i, URL in enumerate(accountURLS):
-    print(f'Accumulating Info: Trader # {traderIDTracker}\n')
-    positions = []
-    orders = []
+  parseMode 'script' reads the tables with one execute_script each; 'html' fetches
+  the page source once per tab and parses it with core.htmlParser. With a
+  snapshotDir the page sources are also stored for offline replay.
+  """
+  pages = {} if snapshotDir else None
+  print(f'Accumulating Info: Trader # {traderID}\n')
+  positions = []
+  orders = []
 
-    driver.get(URL)
-    driver.maximize_window()
-    random_sleep(5, 8)
+  driver.get(URL)
 
-    positionsElem = driver.find_element(By.XPATH, accountRoutes['POSITIONS_TAB'])
-    ordersElem = driver.find_element(By.XPATH, accountRoutes['ORDERS_TAB'])
+  positionsElem, ordersElem = waitForAccountTabs(driver)
 
-    elemTuple = (positionsElem, ordersElem)
-    posTrue, ordTrue = positionsAndOrdersCheck(elemTuple=elemTuple)
+  elemTuple = (positionsElem, ordersElem)
+  posTrue, ordTrue = positionsAndOrdersCheck(elemTuple=elemTuple)
 
-    if posTrue:
-      if orderButtonTracker:
-        positionsElem.click()
-        orderButtonTracker = False
-      time.sleep(3)
-      tableElem = driver.find_element(By.XPATH, accountRoutes['POS_TABLE'])
-      positions = accountPositionsAccumulator(tableElem=tableElem)
+  previous = None
 
-    if ordTrue:
-      if orderButtonTracker == False:
-        ordersElem.click()
-        time.sleep(5)
-      orders = accountOrdersAccumulator(driver=driver)
-      orderButtonTracker = True
+  if posTrue:
+    if orderButtonTracker:
+      previous = waitEngine.currentText(driver, 'POS_TABLE')
+      positionsElem.click()
+      orderButtonTracker = False
 
-    newTrader = Trader(traderIDTracker, URL)
-    newTrader.addPositionLst(positions)
-    newTrader.addOrderLst(orders)
+    if previous is None:
+      tableElem = waitEngine.waitFor(driver, 'POS_TABLE')
+    else:
+      tableElem = waitEngine.waitForChange(driver, 'POS_TABLE', previous)
+    pageSource = pageSourceFor(driver, 'positions', parseMode, pages)
+    positions = accountPositionsAccumulator(tableElem=tableElem,
+                                            pageSource=pageSource if parseMode == 'html' else None)
+    previous = waitEngine.currentText(driver, 'POS_TABLE')
 
-    tradersData.append(newTrader)
-    traderIDTracker += 1
+  if ordTrue:
+    if orderButtonTracker == False:
+      ordersElem.click()
+    else:
+      previous = None
+    orders = accountOrdersAccumulator(driver=driver, previous=previous, parseMode=parseMode, pages=pages)
+    orderButtonTracker = True
 
+  if snapshotDir:
+    saveAccountSnapshot(snapshotDir, URL, pages)
 
-    if (i + 1) % 50 == 0:
-      print('\nTaking a short break to avoid rate limiting!\n')
-      random_sleep(15, 30)
+  newTrader = Trader(traderID, URL)
+  newTrader.addPositionLst(positions)
+  newTrader.addOrderLst(orders)
+
+  return newTrader, orderButtonTracker
+
+
+def scrapeShard(shard, headless=False, rateBudget=None, parseMode='script', snapshotDir=None, pool=None,
+                checkpoint=None, sink=None, stop=None) -> list[Trader]:
+  """Scrapes a list of (traderID, URL) pairs with one pooled driver and a dedicated rate budget.
+
+  Each finished Trader is appended to `checkpoint` (a core.checkpoint.ScrapeCheckpoint)
+  and handed to `sink` straight away. An account that raises is logged to the
+  checkpoint as failed and skipped, and the shard carries on with the next one.
+  Setting the `stop` Event ends the shard before its next account.
+  """
+  tradersData = []
+  rateBudget = rateBudget or RateBudget()
+
+  ownPool = pool is None
+  if ownPool:
+    pool = DriverPool(size=1, headless=headless)
+  pooled = pool.acquire()
+
+  try:
+    for traderID, URL in shard:
+      if stop is not None and stop.is_set():
+        break
+      rateBudget.beforeLoad()
+      try:
+        newTrader, pooled.orderButtonTracker = scrapeAccount(pooled.driver, URL, traderID, pooled.orderButtonTracker,
+                                                             parseMode=parseMode, snapshotDir=snapshotDir)
+      except Exception as error:
+        print(f'Failed to scrape Trader # {traderID}, skipping it: {error!r}\n')
+        if checkpoint is not None:
+          checkpoint.fail(URL, error)
+        if not pool.healthy(pooled):
+          pool.recycle(pooled)
+        else:
+          # The failure may have left either tab selected; clicking Positions first is safe in both cases
+          pooled.orderButtonTracker = True
+        rateBudget.afterLoad()
+        pool.countPage(pooled)
+        continue
+
+      tradersData.append(newTrader)
+      if checkpoint is not None:
+        checkpoint.append(newTrader)
+      if sink is not None:
+        sink(newTrader)
+      rateBudget.afterLoad()
+      pool.countPage(pooled)
+  finally:
+    pool.release(pooled)
+    if ownPool:
+      pool.close()
+
+  return tradersData
 
 
-  driver.quit()
+# Marks the end of one shard on the streamAccountPages queue
+SHARD_DONE = object()
+
+
+def streamAccountPages(accountURLS: set, workers: int = 1, headless: bool = None,
+                       parseMode: str = 'script', snapshotDir: str = None, pool=None, checkpoint=None):
+  """Yields each Trader as soon as a worker has scraped it, in completion order.
+
+  Trader IDs follow sorted URL order as in accountPageScraper. Accounts already
+  in `checkpoint` are yielded first without being scraped. Accounts that fail
+  are skipped by their shard (and logged to the checkpoint). Without a
+  checkpoint an error outside an account, such as failing to launch a
+  driver, is raised from the generator; with one, the failing shard is
+  reported and the stream carries on with the others. If the generator is
+  closed early or raises, the shards stop after their current account and
+  are waited for, so no worker is still using a driver afterwards.
+  """
+  if headless is None:
+    headless = workers > 1
+
+  jobs = list(enumerate(sorted(accountURLS)))
+  if checkpoint is not None:
+    yield from checkpoint.traders(accountURLS)
+    jobs = [(traderID, URL) for traderID, URL in jobs if not checkpoint.isDone(URL)]
+  if not jobs:
+    return
+
+  results = queue.Queue()
+  # Set when the consumer stops early, so shards finish their current account and return
+  stop = threading.Event()
+
+  def runShard(shard):
+    try:
+      scrapeShard(shard, headless, RateBudget(), parseMode, snapshotDir, pool, checkpoint, sink=results.put,
+                  stop=stop)
+    except Exception as error:
+      if checkpoint is None:
+        results.put(error)
+      else:
+        print(f'Scrape shard failed, continuing with the accounts checkpointed so far: {error!r}\n')
+    finally:
+      results.put(SHARD_DONE)
+
+  workers = max(1, min(workers, len(jobs)))
+  shards = [jobs[i::workers] for i in range(workers)]
+
+  executor = ThreadPoolExecutor(max_workers=workers)
+  try:
+    for shard in shards:
+      executor.submit(runShard, shard)
+
+    running = len(shards)
+    while running:
+      item = results.get()
+      if item is SHARD_DONE:
+        running -= 1
+      elif isinstance(item, Exception):
+        raise item
+      else:
+        yield item
+  finally:
+    # Shards must be done with their drivers before the caller closes the pool
+    stop.set()
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def accountPageScraper(accountURLS: set, workers: int = 1, headless: bool = None,
+                       parseMode: str = 'script', snapshotDir: str = None, pool=None,
+                       checkpoint=None) -> list[Trader]:
+  """Scrapes every account page, sharding the URLs across `workers` drivers.
+
+  URLs are sorted before IDs are assigned so trader IDs do not depend on set
+  ordering or on which worker finishes first. Workers run headless by default
+  when there is more than one of them. With a DriverPool the workers borrow
+  its drivers instead of launching their own.
+
+  An account that fails is left out of the result. With a ScrapeCheckpoint,
+  accounts it already holds are skipped and a failing shard no longer aborts
+  the scrape: whatever completed is returned, and the failed and remaining
+  accounts are scraped when the job is resumed.
+  """
+  tradersData = list(streamAccountPages(accountURLS, workers=workers, headless=headless, parseMode=parseMode,
+                                        snapshotDir=snapshotDir, pool=pool, checkpoint=checkpoint))
+  tradersData.sort(key=lambda trader: trader.traderID)
   return tradersData
 
 
@@ -5,81 +5,227 @@ from rich.console import Console
 from rich.table import Table
 from collections import defaultdict
 import numpy as np
-import math
 import time
-from rich.markdown import Markdown
 import os
 import datetime
-import re
 import webbrowser
+import html
+import json
+import csv
+import concurrent.futures
+import threading
+from .asyncHttp import AsyncHttpClient, LoopThread
+from .priceCache import PriceCache
+from .history import MetricsHistory
+from .positionFrame import SnapshotTraders, as_frame
+from .liquidation import LiquidationCurves
+from .triggerIndex import TriggerIndex
+from .snapshotDiff import diffSnapshots
 
 # Initialize Rich console
-console = Console(record=True)
+console = Console()
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '../data')
 
 
-# Caching for live prices
-price_cache = {}
+# Caching for live prices, persisted between runs; opened by get_price_cache on first use, so importing
+# this module (for hotspot_windows, say) creates nothing under data/
+PRICE_CACHE_FILE = 'prices.sqlite'
+price_cache = None
 
+# Every run's headline metrics, kept as a time series for trend charts; opened by mainAnalysis when it records
+HISTORY_FILE = 'history.sqlite'
 
-def manage_output_files():
-    """Rotates output files and manages naming based on run history."""
-    new_file = os.path.join(OUTPUT_DIR, 'new.html')
-    prev_file = os.path.join(OUTPUT_DIR, 'prev.html')
-    old_file = os.path.join(OUTPUT_DIR, 'old.html')
 
-    # Delete old.html if it exists
-    if os.path.exists(old_file):
-        os.remove(old_file)
+def manage_output_files(extension='html'):
+    """Rotates the reports of one format: new becomes prev and prev becomes old.
 
-    # Move prev.html to old.html if it exists
-    if os.path.exists(prev_file):
-        os.rename(prev_file, old_file)
+    Each step is a single os.replace, which overwrites its target atomically,
+    so there is never a moment where a report is half moved.
+    """
+    new_file = os.path.join(OUTPUT_DIR, f'new.{extension}')
+    prev_file = os.path.join(OUTPUT_DIR, f'prev.{extension}')
+    old_file = os.path.join(OUTPUT_DIR, f'old.{extension}')
 
-    # Move new.html to prev.html if it exists
+    # prev replaces old, then new replaces prev
+    if os.path.exists(prev_file):
+        os.replace(prev_file, old_file)
     if os.path.exists(new_file):
-        os.rename(new_file, prev_file)
-
-def save_html_output():
-    """Saves the current console output to new.html with timestamp information and enforces dark mode styling."""
-    # Ensure the data directory exists
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        
-    date_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    console.print(f"\n[b]Analysis Run Date:[/b] {date_str}\n")
+        os.replace(new_file, prev_file)
 
-    # Manage file rotation before saving the new file
-    manage_output_files()
 
-    # Save new.html file in the data directory
-    new_output_path = os.path.join(OUTPUT_DIR, 'new.html')
-    console.save_html(new_output_path)
+# Report writing found below: the report is rendered straight from the analysis dict, not from console output
 
-    # Open the saved HTML file and apply inline dark mode styling directly to the <body> tag
-    with open(new_output_path, 'r+', encoding='utf-8') as file:
-        html_content = file.read()
+# Formats written every run; JSON and CSV can be added per call
+REPORT_FORMATS = ('html',)
 
-        # Directly modify the <body> tag to include dark mode inline styling
-        html_content = html_content.replace(
-            "<body>", "<body style='color: white; background-color: black;'>"
-        )
-        
-        # Write the modified content back to the file
-        file.seek(0)
-        file.write(html_content)
-        file.truncate()  # Clears any remaining content if new content is shorter
+REPORT_STYLE = (
+    "body { color: white; background-color: black; font-family: Menlo, 'DejaVu Sans Mono', consolas, monospace; }\n"
+    "table { border-collapse: collapse; margin: 0 0 1.5em 0; }\n"
+    "caption { font-style: italic; padding: 0.3em; }\n"
+    "th, td { border: 1px solid #555; padding: 0.15em 0.6em; text-align: right; }\n"
+    "h2 { color: #00afaf; }\n"
+    "a { color: #d7d700; }\n"
+)
 
 
-def strip_html_tags(text):
-    """Removes HTML tags from the given text."""
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
+def report_tables(analysis):
+    """Yields every report table as (section, title, columns, rows), with cells formatted as in the console tables."""
+    long_count, short_count, long_short_ratio = analysis["long_vs_short"]
+    long_size, short_size, long_short_size_ratio = analysis["long_vs_short_size"]
+    yield "Market Data", "Long vs Short", ("Type", "Count", "Size", "Ratio"), [
+        ("Long", str(long_count), str(long_size), f"{long_short_ratio:.2f}"),
+        ("Short", str(short_count), str(short_size), f"{long_short_size_ratio:.2f}"),
+    ]
+    leverage_dist = analysis["leverage_dist"]
+    if leverage_dist:
+        yield "Market Data", "Leverage Distribution", ("Average Leverage", "Max Leverage"), [
+            (f"{leverage_dist['average_leverage']:.2f}", f"{leverage_dist['max_leverage']:.2f}")]
+    pnl_stats = analysis["pnl_stats"]
+    if pnl_stats:
+        yield "Market Data", "PnL Distribution", ("Average PnL", "Median PnL"), [
+            (f"{pnl_stats['average_pnl']:.2f}", f"{pnl_stats['median_pnl']:.2f}")]
+    collateral_dist = analysis["collateral_dist"]
+    if collateral_dist:
+        yield "Market Data", "Collateral Distribution", ("Total Collateral", "Average Collateral"), [
+            (f"{collateral_dist['total_collateral']:.2f}", f"{collateral_dist['average_collateral']:.2f}")]
+
+    for key, title, column in (("top_profitable_traders", "Most Profitable Traders", "PnL"),
+                               ("top_losing_traders", "Most Losing Traders", "PnL"),
+                               ("largest_position_holders", "Largest Position Holders", "Position Size"),
+                               ("top_leveraged_traders", "Top 10 Leveraged Traders (<= 50x)", "Leverage")):
+        yield "Trader Data", title, ("Trader ID", column, "URL"), [
+            (str(trader.traderID), f"{value:.2f}", trader.url) for trader, value in analysis[key]]
+
+    yield "Asset Data", "Asset Data (Excluding 'Unknown')", \
+        ("Asset", "Longs", "Shorts", "Average Leverage", "Average PnL"), [
+            (asset, str(data['longs']), str(data['shorts']), f"{data['average_leverage']:.2f}",
+             f"{data['average_pnl']:.2f}")
+            for asset, data in sorted(analysis["asset_data"].items(), key=lambda x: x[1]['average_pnl'], reverse=True)]
+    yield "Asset Data", "Pending Orders", ("Asset", "Long Orders", "Short Orders", "Total Orders"), [
+        (asset, str(data['longs']), str(data['shorts']), str(len(data['orders'])))
+        for asset, data in sorted(analysis["pending_orders"].items(), key=lambda x: len(x[1]['orders']), reverse=True)]
+    if analysis.get("trigger_index") is not None and analysis["prices"]:
+        yield "Asset Data", "Order Walls Around Spot", \
+            ("Asset", "Spot", "Wall Below", "Size Below", "Wall Above", "Size Above", "Size ±5%"), \
+            trigger_wall_rows(analysis["trigger_index"], analysis["prices"])
+
+    yield "Order Hotspot Analysis", "Order Hotspots", \
+        ("Asset", "Cluster Price", "Direction", "Trader ID", "Order Type", "Price", "URL"), [
+            (asset, f"{cluster['cluster_price']:.2f}", direction, str(order['trader_id']), order['type'],
+             f"{order['price']:.2f}", order['trader_url'])
+            for asset, clusters in analysis["hotspots"].items()
+            for cluster in clusters
+            for direction in ("Long", "Short")
+            for order in cluster[direction]]
+
+    yield "Liquidation Risk Analysis", "Liquidation Risk", \
+        ("Trader ID", "Asset", "Leverage", "Position Size", "PnL", "Collateral", "Liq Price", "Current Price",
+         "Difference %", "URL"), [
+            (str(pos["trader_id"]), pos["asset"], f"{pos['leverage']}x", f"${pos['size']:.2f}", f"${pos['pnl']:.2f}",
+             f"${pos['collateral']:.2f}", f"${pos['liq_price']:.2f}", f"${pos['current_price']:.2f}",
+             f"{pos['difference_percent']:.2f}%", pos['trader_url'])
+            for pos in analysis["risk_positions"] or []]
+    curves = analysis.get("liquidation_curves")
+    if curves is not None and curves.assets:
+        yield "Liquidation Risk Analysis", "Notional Liquidated by Price Move", \
+            ("Asset",) + tuple(f"{move * 100:+.0f}%" for move in CASCADE_MOVES), [
+                (asset,) + tuple(f"${value:,.0f}" for value in curves.curve(asset, CASCADE_MOVES)['total'])
+                for asset in sorted(curves.assets)]
+
+    diff = analysis.get("snapshot_diff")
+    if diff is not None:
+        section = "Changes Since Previous Scrape"
+        yield section, "Summary", ("Change", "Count"), [
+            (name, str(count)) for name, count in diff.summary().items()]
+        yield section, "Largest Position Changes (top 15)", POSITION_CHANGE_COLUMNS, position_change_rows(diff)
+        yield section, "Largest Order Changes (top 15)", ORDER_CHANGE_COLUMNS, order_change_rows(diff)
+
+
+def write_html_report(file, analysis, tables):
+    """Writes the report as one HTML page, a row at a time."""
+    escape = html.escape
+    date_str = datetime.datetime.fromtimestamp(analysis["generated_at"]).strftime('%Y-%m-%d %H:%M:%S')
+    file.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"UTF-8\">\n<title>Crypto Whale Tracker {date_str}</title>\n"
+               f"<style>\n{REPORT_STYLE}</style>\n</head>\n<body style='color: white; background-color: black;'>\n")
+
+    prices = analysis["prices"] or {}
+    file.write("<h2>Live Prices for Tracked Assets</h2>\n<p>")
+    file.write("<br>\n".join(f"{escape(asset)}: ${price:.2f}" for asset, price in prices.items()))
+    file.write("</p>\n")
+
+    section = None
+    for table_section, title, columns, rows in tables:
+        if table_section != section:
+            section = table_section
+            file.write(f"<h2>{escape(section)}</h2>\n")
+        links = [column == "URL" for column in columns]
+        file.write(f"<table>\n<caption>{escape(title)}</caption>\n<tr>")
+        file.write("".join(f"<th>{escape(column)}</th>" for column in columns))
+        file.write("</tr>\n")
+        for row in rows:
+            file.write("<tr>" + "".join(
+                f"<td><a href=\"{escape(cell)}\">{escape(cell)}</a></td>" if link else f"<td>{escape(cell)}</td>"
+                for cell, link in zip(row, links)) + "</tr>\n")
+        file.write("</table>\n")
+
+    file.write(f"<p><b>Analysis Run Date:</b> {date_str}</p>\n</body>\n</html>\n")
+
+
+def write_json_report(file, analysis, tables):
+    json.dump({
+        "generated_at": analysis["generated_at"],
+        "prices": analysis["prices"],
+        "tables": [{"section": section, "title": title, "columns": list(columns), "rows": [list(row) for row in rows]}
+                   for section, title, columns, rows in tables],
+    }, file)
+
+
+def write_csv_report(file, analysis, tables):
+    """One long-format CSV for every table: table, row number, column, value."""
+    writer = csv.writer(file)
+    writer.writerow(("table", "row", "column", "value"))
+    for _, title, columns, rows in tables:
+        for number, row in enumerate(rows):
+            writer.writerows((title, number, column, cell) for column, cell in zip(columns, row))
+
+
+REPORT_WRITERS = {'html': write_html_report, 'json': write_json_report, 'csv': write_csv_report}
+
+
+def write_report(analysis, formats=REPORT_FORMATS):
+    """Writes the report in each format to new.<format> and returns {format: (seconds, bytes)}.
+
+    Each report is written in full to a temporary file first and only moved
+    into place, with the older reports rotated, once it is complete.
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timings = {}
+    tables = list(report_tables(analysis))
+    for extension in formats:
+        start = time.perf_counter()
+        path = os.path.join(OUTPUT_DIR, f'new.{extension}')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as file:
+            REPORT_WRITERS[extension](file, analysis, tables)
+        manage_output_files(extension)
+        os.replace(tmp_path, path)
+        timings[extension] = (time.perf_counter() - start, os.path.getsize(path))
+    return timings
+
+
+def save_html_output(analysis, formats=REPORT_FORMATS):
+    """Writes the report files and prints the run date and how long rendering took."""
+    date_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    console.print(f"\n[b]Analysis Run Date:[/b] {date_str}\n")
 
+    timings = write_report(analysis, formats)
+    console.print("[dim]Report written: " + ", ".join(
+        f"new.{extension} {seconds * 1000:.1f} ms, {size / 1024:.0f} KB"
+        for extension, (seconds, size) in timings.items()) + "[/dim]")
 
 
 def compare_output_files():
-    """Compares prev.html and new.html, opens both files in the browser without printing differences to the console."""
+    """Opens new.html and prev.html in the browser; what changed between the scrapes is in the report itself."""
     new_file = os.path.join(OUTPUT_DIR, 'new.html')
     prev_file = os.path.join(OUTPUT_DIR, 'prev.html')
 
@@ -92,19 +238,6 @@ def compare_output_files():
     # Display message if prev.html does not exist
     if not os.path.exists(prev_file):
         console.print("[yellow]No previous output file found to compare with.[/yellow]")
-        return
-
-    # Remove the console print of differences
-    with open(prev_file, 'r', encoding='utf-8') as file:
-        prev_content = strip_html_tags(file.read()).splitlines()
-    with open(new_file, 'r', encoding='utf-8') as file:
-        new_content = strip_html_tags(file.read()).splitlines()
-
-    # Find differences without printing them
-    differences = [line for line in new_content if line not in prev_content]
-
-    # Optionally, you can log differences to a file or simply omit this step
-
 
 
 def convert_asset_ticker(asset):
@@ -122,54 +255,129 @@ def convert_asset_ticker(asset):
     return asset_mapping.get(ticker, ticker.lower()), ticker  # Return both formats
 
 
-def fetch_live_prices(assets, delay=3):
+COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd"
+
+# Shared client so the CoinGecko token bucket spans every lookup in the process. All price I/O runs on
+# price_loop, so the client is only ever used from that one loop, whichever thread asks for prices.
+# Both are created by their getters on the first price lookup.
+price_client = None
+price_loop = None
+price_io_lock = threading.Lock()
+# Stale-while-revalidate refreshes still running; see wait_for_price_refreshes
+price_refreshes = set()
+
+
+def get_price_cache():
+    """Returns the process-wide PriceCache, opening data/prices.sqlite on the first call."""
     global price_cache
-    asset_mapping = {ticker: convert_asset_ticker(ticker)[0] for ticker in assets}
-    coingecko_ids = ','.join(set(asset_mapping.values()))
+    with price_io_lock:
+        if price_cache is None:
+            price_cache = PriceCache(os.path.join(OUTPUT_DIR, PRICE_CACHE_FILE))
+        return price_cache
+
+
+def get_price_client():
+    global price_client
+    with price_io_lock:
+        if price_client is None:
+            price_client = AsyncHttpClient(concurrency=4)
+        return price_client
+
+
+def get_price_loop():
+    global price_loop
+    with price_io_lock:
+        if price_loop is None:
+            price_loop = LoopThread("price-loop")
+        return price_loop
+
+
+async def fetch_coingecko_prices(tickers, client=None):
+    """Fetches USD prices for the given tickers; rate limiting is left to the client's token bucket."""
+    client = client or get_price_client()
+    asset_mapping = {ticker: convert_asset_ticker(ticker)[0] for ticker in tickers}
+    if not asset_mapping:
+        return {}
+
+    url = COINGECKO_PRICE_URL.format(ids=','.join(sorted(set(asset_mapping.values()))))
+    try:
+        data = await client.getJSON(url)
+    except requests.RequestException:
+        return {}
+
+    prices = {}
+    for original_ticker, coingecko_ticker in asset_mapping.items():
+        price = data.get(coingecko_ticker, {}).get("usd")
+        if price is not None:
+            prices[original_ticker] = price
+    get_price_cache().update(prices)
+    return prices
+
+
+async def fetch_live_prices_async(assets, client=None, stale_while_revalidate=True):
+    """Serves prices from the cache, fetching only expired or missing ones.
+
+    With stale_while_revalidate, recently expired prices are returned as-is and
+    refreshed in the background instead of holding up the caller. With the
+    shared price_client this must run on price_loop; fetch_live_prices and
+    start_price_fetch take care of that.
+    """
+    fresh, stale, missing = get_price_cache().lookup(set(assets))
+    prices = dict(fresh)
 
-    cached_prices = {ticker: price_cache[ticker] for ticker in asset_mapping if ticker in price_cache}
-    remaining_assets = {ticker: asset_mapping[ticker] for ticker in asset_mapping if ticker not in price_cache}
+    if missing or not stale_while_revalidate:
+        # A round trip is needed anyway, so refresh the stale prices in the same request
+        prices.update(stale)
+        prices.update(await fetch_coingecko_prices(missing + list(stale), client))
+    elif stale:
+        prices.update(stale)
+        refresh = get_price_loop().submit(fetch_coingecko_prices(list(stale), client))
+        price_refreshes.add(refresh)
+        refresh.add_done_callback(price_refreshes.discard)
+    return prices
 
-    if not remaining_assets:
-        return cached_prices
 
-    time.sleep(delay)
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={','.join(set(remaining_assets.values()))}&vs_currencies=usd"
-    response = requests.get(url)
+def wait_for_price_refreshes(timeout=None):
+    """Blocks until background price refreshes are done, so their results reach the cache before exit."""
+    concurrent.futures.wait(list(price_refreshes), timeout=timeout)
 
-    if response.status_code == 200:
-        data = response.json()
-        for original_ticker, coingecko_ticker in remaining_assets.items():
-            price = data.get(coingecko_ticker, {}).get("usd")
-            if price is not None:
-                price_cache[original_ticker] = price
-                cached_prices[original_ticker] = price
-    return cached_prices
 
+def fetch_live_prices(assets, stale_while_revalidate=True):
+    return get_price_loop().run(fetch_live_prices_async(assets, stale_while_revalidate=stale_while_revalidate))
 
-def calculate_liquidation_risk(tradersLst, threshold_percent=5):
-    risk_positions = []
-    assets_in_use = set(pos.asset for trader in tradersLst for pos in trader.positions)
-    prices = fetch_live_prices(assets_in_use)
 
-    for trader in tradersLst:
-        for pos in trader.positions:
-            live_price = prices.get(pos.asset)
-            if pos.liq is not None and live_price is not None:
-                liquidation_diff = abs((pos.liq - live_price) / live_price) * 100
-                if liquidation_diff <= threshold_percent:
-                    risk_positions.append({
-                        "trader_id": trader.traderID,
-                        "trader_url": trader.url,
-                        "asset": pos.asset,
-                        "leverage": pos.leverage,
-                        "size": pos.size,
-                        "pnl": pos.pnl,
-                        "collateral": pos.collateral,
-                        "liq_price": pos.liq,
-                        "current_price": live_price,
-                        "difference_percent": liquidation_diff
-                    })
+def start_price_fetch(assets, stale_while_revalidate=True):
+    """Starts the price lookup in the background and returns a Future, so analysis can run meanwhile."""
+    return get_price_loop().submit(fetch_live_prices_async(assets, stale_while_revalidate=stale_while_revalidate))
+
+
+def calculate_liquidation_risk(tradersLst, threshold_percent=5, prices=None):
+    frame = as_frame(tradersLst)
+    if prices is None:
+        prices = fetch_live_prices(frame.assets)
+
+    # Live price per position, NaN where the asset has no price
+    asset_prices = np.array([prices.get(asset, np.nan) for asset in frame.assets] or [np.nan], dtype=np.float64)
+    live = asset_prices[frame.asset] if len(frame) else np.empty(0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        liquidation_diff = np.abs((frame.liq - live) / live) * 100
+    at_risk = np.flatnonzero(liquidation_diff <= threshold_percent)
+
+    risk_positions = []
+    for i in at_risk:
+        trader = frame.traders[frame.trader_index[i]]
+        risk_positions.append({
+            "trader_id": trader.traderID,
+            "trader_url": trader.url,
+            "asset": frame.assets[frame.asset[i]],
+            "leverage": float(frame.leverage[i]),
+            "size": int(frame.size[i]),
+            "pnl": float(frame.pnl[i]),
+            "collateral": float(frame.collateral[i]),
+            "liq_price": float(frame.liq[i]),
+            "current_price": float(live[i]),
+            "difference_percent": float(liquidation_diff[i])
+        })
 
     return risk_positions
 
@@ -210,80 +418,145 @@ def print_liquidation_risk(risk_positions):
     console.print(table)
 
 
+# Price moves shown in the liquidation cascade table
+CASCADE_MOVES = (-0.20, -0.10, -0.07, -0.05, 0.05, 0.07, 0.10, 0.20)
+
+
+def print_liquidation_cascade(curves):
+    if curves is None or not curves.assets:
+        console.print("[yellow]No priced positions with a liquidation price.[/yellow]")
+        return
+
+    table = Table(title="Notional Liquidated by Price Move")
+    table.add_column("Asset", justify="right", style="magenta")
+    for move in CASCADE_MOVES:
+        table.add_column(f"{move * 100:+.0f}%", justify="right", style="red" if move < 0 else "green")
+
+    for asset in sorted(curves.assets):
+        curve = curves.curve(asset, CASCADE_MOVES)
+        table.add_row(asset, *(f"${value:,.0f}" for value in curve['total']))
+    console.print(table)
+
+
 # Example of integration in the main analysis
-def mainAnalysis(tradersLst):
-    # Fetch and print live prices for assets in positions
-    assets_in_use = set(pos.asset for trader in tradersLst for pos in trader.positions)
-    console.print("[bold cyan]Live Prices for Tracked Assets[/bold cyan]")
-    
-    # Fetch prices for all assets at once
-    prices = fetch_live_prices(assets_in_use)
+def compute_analysis(tradersLst, prices=None):
+    """Computes every statistic mainAnalysis reports and returns them in a dict, printing nothing.
 
-    for asset, price in prices.items():
+    Liquidation risk needs live prices, so it is only included when `prices` is given.
+    """
+    # Every position statistic below is computed from this one columnar frame
+    frame = as_frame(tradersLst)
+    traders = frame.traders
+
+    long_vs_short, long_vs_short_size = calculate_long_short_ratios(frame)
+    analysis = {
+        "generated_at": time.time(),
+        "traders": len(traders),
+        "positions": len(frame),
+        "long_vs_short": long_vs_short,
+        "long_vs_short_size": long_vs_short_size,
+        "leverage_dist": calculate_leverage_distribution(frame),
+        "pnl_stats": calculate_pnl_stats(frame),
+        "collateral_dist": calculate_collateral_distribution(frame),
+        "top_profitable_traders": get_top_traders(frame, top=True),
+        "top_losing_traders": get_top_traders(frame, top=False),
+        "largest_position_holders": get_largest_position_holders(frame),
+        "top_leveraged_traders": get_top_leveraged_traders(frame),
+        "asset_data": calculate_asset_stats(frame),
+        "pending_orders": calculate_pending_orders(traders),
+        "trigger_index": TriggerIndex(traders),
+        "hotspots": calculate_order_hotspots(traders),
+        "prices": prices,
+        "risk_positions": None,
+        "liquidation_curves": None,
+    }
+    if prices is not None:
+        analysis["risk_positions"] = calculate_liquidation_risk(frame, threshold_percent=5, prices=prices)
+        analysis["liquidation_curves"] = LiquidationCurves(frame, prices)
+    return analysis
+
+
+def print_analysis(analysis):
+    # Print live prices
+    console.print("[bold cyan]Live Prices for Tracked Assets[/bold cyan]")
+    for asset, price in (analysis["prices"] or {}).items():
         console.print(f"{asset}: ${price:.2f}")
 
+    cache_stats = get_price_cache().stats()
+    console.print(f"[dim]Price cache: {cache_stats['hits']} fresh, {cache_stats['stale']} stale, "
+                  f"{cache_stats['misses']} missed[/dim]")
+
     # Market Data Section
     console.print("\n[bold cyan]Market Data[/bold cyan]")
-    long_vs_short, long_vs_short_size = calculate_long_short_ratios(tradersLst)
-    leverage_dist = calculate_leverage_distribution(tradersLst)
-    pnl_stats = calculate_pnl_stats(tradersLst)
-    collateral_dist = calculate_collateral_distribution(tradersLst)
-    
-    # Print Market Data
-    print_long_short_data(long_vs_short, long_vs_short_size)
-    print_leverage_distribution(leverage_dist)
-    print_pnl_distribution(pnl_stats)
-    print_collateral_distribution(collateral_dist)
+    print_long_short_data(analysis["long_vs_short"], analysis["long_vs_short_size"])
+    print_leverage_distribution(analysis["leverage_dist"])
+    print_pnl_distribution(analysis["pnl_stats"])
+    print_collateral_distribution(analysis["collateral_dist"])
     
     # Trader Data Section
     console.print("\n[bold cyan]Trader Data[/bold cyan]")
-    top_10_profitable_traders = get_top_traders(tradersLst, top=True)
-    top_10_losing_traders = get_top_traders(tradersLst, top=False)
-    largest_position_holders = get_largest_position_holders(tradersLst)
-    top_leveraged_traders = get_top_leveraged_traders(tradersLst)
-    
-    # Print Trader Data
-    print_top_traders(top_10_profitable_traders, "Most Profitable Traders")
-    print_top_traders(top_10_losing_traders, "Most Losing Traders")
-    print_largest_position_holders(largest_position_holders)
-    print_top_leveraged_traders(top_leveraged_traders)
+    print_top_traders(analysis["top_profitable_traders"], "Most Profitable Traders")
+    print_top_traders(analysis["top_losing_traders"], "Most Losing Traders")
+    print_largest_position_holders(analysis["largest_position_holders"])
+    print_top_leveraged_traders(analysis["top_leveraged_traders"])
     
     # Asset Data Section
     console.print("\n[bold cyan]Asset Data[/bold cyan]")
-    asset_data = calculate_asset_stats(tradersLst)
-    pending_orders = calculate_pending_orders(tradersLst)
-    
-    # Print Asset Data
-    print_asset_data(asset_data)
-    print_pending_orders(pending_orders)
+    print_asset_data(analysis["asset_data"])
+    print_pending_orders(analysis["pending_orders"])
+    print_trigger_walls(analysis.get("trigger_index"), analysis["prices"])
 
     # Order Hotspot Analysis
     console.print("\n[bold cyan]Order Hotspot Analysis[/bold cyan]")
-    hotspots = calculate_order_hotspots(tradersLst)
-    print_order_hotspots(hotspots)
+    print_order_hotspots(analysis["hotspots"])
 
     # Liquidation Risk Analysis
     console.print("\n[bold cyan]Liquidation Risk Analysis[/bold cyan]")
-    risk_positions = calculate_liquidation_risk(tradersLst, threshold_percent=5)
-    print_liquidation_risk(risk_positions)
-
-    save_html_output()
+    print_liquidation_risk(analysis["risk_positions"] or [])
+    print_liquidation_cascade(analysis.get("liquidation_curves"))
+
+    # Changes since the previous scrape
+    if "snapshot_diff" in analysis:
+        console.print("\n[bold cyan]Changes Since Previous Scrape[/bold cyan]")
+        print_snapshot_diff(analysis["snapshot_diff"])
+
+
+def mainAnalysis(tradersLst, previous=None):
+    """Runs, prints and saves the full analysis of a list of Traders or a PositionFrame (e.g. one
+    built with PositionFrame.from_snapshot); `previous` is the last scrape (a Snapshot or Traders)
+    to report changes against, if there is one."""
+    frame = as_frame(tradersLst)
+    # A snapshot-backed frame's traders hold no positions, so the diff reads the snapshot itself
+    current = frame.traders.snapshot if isinstance(frame.traders, SnapshotTraders) else frame.traders
+
+    # Start fetching live prices for assets in positions; the statistics don't need them.
+    # The report is final, so expired prices are refetched rather than served stale
+    position_assets = [frame.assets[code] for code in np.unique(frame.asset)]
+    prices_future = start_price_fetch(position_assets, stale_while_revalidate=False)
+    analysis = compute_analysis(frame)
+
+    prices = prices_future.result()
+    analysis["prices"] = prices
+    analysis["risk_positions"] = calculate_liquidation_risk(frame, threshold_percent=5, prices=prices)
+    analysis["liquidation_curves"] = LiquidationCurves(frame, prices)
+    analysis["snapshot_diff"] = diffSnapshots(previous, current) if previous is not None else None
+    history = MetricsHistory(os.path.join(OUTPUT_DIR, HISTORY_FILE))
+    history.record(analysis)
+    history.close()
+
+    print_analysis(analysis)
+    save_html_output(analysis)
     compare_output_files()
+    return analysis
 
 # Helper functions
 
 def calculate_long_short_ratios(tradersLst):
-    long_count, short_count = 0, 0
-    long_size, short_size = 0, 0
-
-    for trader in tradersLst:
-        for pos in trader.positions:
-            if pos.short:
-                short_count += 1
-                short_size += pos.size
-            else:
-                long_count += 1
-                long_size += pos.size
+    frame = as_frame(tradersLst)
+    short_count = int(np.count_nonzero(frame.short))
+    long_count = len(frame) - short_count
+    short_size = int(frame.size[frame.short].sum())
+    long_size = int(frame.size[~frame.short].sum())
 
     long_short_ratio = long_count / short_count if short_count != 0 else np.inf
     long_short_size_ratio = long_size / short_size if short_size != 0 else np.inf
@@ -291,8 +564,9 @@ def calculate_long_short_ratios(tradersLst):
 
 def calculate_leverage_distribution(tradersLst):
     # Filter out positions with leverage above 50
-    leverage_values = [pos.leverage for trader in tradersLst for pos in trader.positions if pos.leverage <= 50]
-    if not leverage_values:
+    frame = as_frame(tradersLst)
+    leverage_values = frame.leverage[frame.leverage <= 50]
+    if not len(leverage_values):
         return None
     return {
         'average_leverage': np.mean(leverage_values),
@@ -301,63 +575,60 @@ def calculate_leverage_distribution(tradersLst):
 
 def calculate_pnl_stats(tradersLst):
     # Only keep Average PnL and Median PnL
-    pnls = [pos.pnl for trader in tradersLst for pos in trader.positions]
-    if not pnls:
+    frame = as_frame(tradersLst)
+    if not len(frame):
         return None
     return {
-        'average_pnl': np.mean(pnls),
-        'median_pnl': np.median(pnls),
+        'average_pnl': np.mean(frame.pnl),
+        'median_pnl': np.median(frame.pnl),
     }
 
 def calculate_collateral_distribution(tradersLst):
-    collateral_values = [pos.collateral for trader in tradersLst for pos in trader.positions]
-    if not collateral_values:
+    frame = as_frame(tradersLst)
+    if not len(frame):
         return None
     return {
-        'total_collateral': np.sum(collateral_values),
-        'average_collateral': np.mean(collateral_values)
+        'total_collateral': np.sum(frame.collateral),
+        'average_collateral': np.mean(frame.collateral)
     }
 
+def rank_traders(frame, values, n, descending=True):
+    # Stable sort keeps list order between equal values, like list.sort(reverse=...)
+    order = np.argsort(-values if descending else values, kind='stable')[:n]
+    return [(frame.traders[i], float(values[i])) for i in order]
+
 def get_top_traders(tradersLst, top=True, n=15):
-    all_traders = [(trader, sum([pos.pnl for pos in trader.positions])) for trader in tradersLst]
-    all_traders.sort(key=lambda x: x[1], reverse=top)
-    return all_traders[:n]
+    frame = as_frame(tradersLst)
+    return rank_traders(frame, frame.per_trader_sum(frame.pnl), n, descending=top)
 
 def get_largest_position_holders(tradersLst, n=15):
-    traders_positions = [(trader, max([pos.size for pos in trader.positions], default=0)) for trader in tradersLst]
-    traders_positions.sort(key=lambda x: x[1], reverse=True)
-    return traders_positions[:n]
+    frame = as_frame(tradersLst)
+    return rank_traders(frame, frame.per_trader_max(frame.size), n)
 
 def get_top_leveraged_traders(tradersLst, n=15):
-    # Exclude traders with positions having leverage above 50
-    traders_leverage = [
-        (trader, max([pos.leverage for pos in trader.positions if pos.leverage <= 50], default=0))
-        for trader in tradersLst
-    ]
-    traders_leverage = [item for item in traders_leverage if item[1] <= 50]
-    traders_leverage.sort(key=lambda x: x[1], reverse=True)
-    return traders_leverage[:n]
+    # Exclude positions having leverage above 50
+    frame = as_frame(tradersLst)
+    return rank_traders(frame, frame.per_trader_max(frame.leverage, mask=frame.leverage <= 50), n)
 
 def calculate_asset_stats(tradersLst):
-    asset_stats = defaultdict(lambda: {'longs': 0, 'shorts': 0, 'positions': 0, 'leverage': [], 'pnl': []})
-    
-    for trader in tradersLst:
-        for pos in trader.positions:
-            if pos.asset == "Unknown":  # Skip assets marked as "Unknown"
-                continue
-            asset_data = asset_stats[pos.asset]
-            asset_data['positions'] += 1
-            asset_data['leverage'].append(pos.leverage)
-            asset_data['pnl'].append(pos.pnl)
-            if pos.short:
-                asset_data['shorts'] += 1
-            else:
-                asset_data['longs'] += 1
-
-    # Compute average leverage and pnl for each asset
-    for asset, data in asset_stats.items():
-        data['average_leverage'] = np.mean(data['leverage']) if data['leverage'] else None
-        data['average_pnl'] = np.mean(data['pnl']) if data['pnl'] else None
+    frame = as_frame(tradersLst)
+    known = frame.asset != frame.asset_code("Unknown")  # Skip assets marked as "Unknown"
+
+    positions = frame.per_asset_count(known)
+    shorts = frame.per_asset_count(known & frame.short)
+    leverage_sums = frame.per_asset_sum(frame.leverage, known)
+    pnl_sums = frame.per_asset_sum(frame.pnl, known)
+
+    asset_stats = {}
+    for code in np.flatnonzero(positions):
+        count = int(positions[code])
+        asset_stats[frame.assets[code]] = {
+            'longs': count - int(shorts[code]),
+            'shorts': int(shorts[code]),
+            'positions': count,
+            'average_leverage': leverage_sums[code] / count,
+            'average_pnl': pnl_sums[code] / count,
+        }
 
     return asset_stats
 
@@ -376,71 +647,90 @@ def calculate_pending_orders(tradersLst):
     return pending_orders
 
 
+def cluster_starts(sorted_prices, price_range_percent):
+    """Sweeps ascending prices into windows: each window opens at the lowest unclustered price p
+    and takes every later price t with t * (1 - range) <= p, i.e. p lies within ±range of t."""
+    starts = []
+    factor = 1 - price_range_percent / 100
+    i, n = 0, len(sorted_prices)
+    while i < n:
+        starts.append(i)
+        if factor <= 0:
+            break
+        anchor = sorted_prices[i]
+        end = int(np.searchsorted(sorted_prices, anchor / factor, side='right'))
+        # Settle rounding at the window edge with the exact membership test
+        while end < n and sorted_prices[end] * factor <= anchor:
+            end += 1
+        while end > i + 1 and sorted_prices[end - 1] * factor > anchor:
+            end -= 1
+        i = end
+    return np.asarray(starts, dtype=np.int64)
+
+
 def calculate_order_hotspots(tradersLst, price_range_percent=3, min_traders=3):
     """
     Identifies hotspot zones where traders have placed orders within a specified price range.
+    Orders are sorted by trigger price per asset and swept into windows, so the result no
+    longer depends on the order traders were scraped in and runs in O(n log n).
     Parameters:
     - tradersLst: List of Trader objects
     - price_range_percent: The range within which prices are considered a cluster
-    - min_traders: Minimum number of traders for a cluster to be considered a hotspot
-    
+    - min_traders: Minimum number of distinct traders, on one side, for a cluster to be a hotspot
+
     Returns:
     A dictionary with asset as keys and clusters of prices with associated order statistics.
     """
-    # Dictionary to track hotspots by asset
-    hotspots = defaultdict(lambda: defaultdict(lambda: {'Long': [], 'Short': []}))
-
-    # Process each trader's orders
-    for trader in tradersLst:
+    by_asset = defaultdict(list)
+    for trader_index, trader in enumerate(tradersLst):
         for order in trader.orders:
-            # Determine the price range for clustering
-            trigger_price = order.trigger
-            lower_bound = trigger_price * (1 - price_range_percent / 100)
-            upper_bound = trigger_price * (1 + price_range_percent / 100)
-
-            # Add order to relevant hotspot cluster
-            direction = "Short" if order.short else "Long"
-            clusters = hotspots[order.asset]
-            found_cluster = False
-
-            for cluster_price, data in clusters.items():
-                if lower_bound <= cluster_price <= upper_bound:
-                    # Attach trader URL to each order entry
-                    data[direction].append({
-                        'trader_id': trader.traderID,
-                        'price': trigger_price,
-                        'type': order.orderType,
-                        'trader_url': trader.url  # Add the trader URL here
-                    })
-                    found_cluster = True
-                    break
-
-            if not found_cluster:
-                # Create a new cluster if none matched
-                clusters[trigger_price][direction].append({
-                    'trader_id': trader.traderID,
-                    'price': trigger_price,
-                    'type': order.orderType,
-                    'trader_url': trader.url  # Add the trader URL here
-                })
-
-    # Filter clusters to identify hotspots
+            by_asset[order.asset].append((order.trigger, trader_index, order.short, order))
+
     final_hotspots = {}
-    for asset, clusters in hotspots.items():
-        for cluster_price, data in clusters.items():
-            long_traders = len({order['trader_id'] for order in data['Long']})
-            short_traders = len({order['trader_id'] for order in data['Short']})
-            if long_traders >= min_traders or short_traders >= min_traders:
-                if asset not in final_hotspots:
-                    final_hotspots[asset] = []
-                final_hotspots[asset].append({
-                    'cluster_price': cluster_price,
-                    'Long': data['Long'],
-                    'Short': data['Short']
-                })
+    for asset, rows in by_asset.items():
+        prices = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        order_idx = np.argsort(prices, kind='stable')
+        clusters = hotspot_windows(prices[order_idx], [rows[k] for k in order_idx], tradersLst,
+                                   price_range_percent, min_traders)
+        if clusters:
+            final_hotspots[asset] = clusters
     return final_hotspots
 
 
+def hotspot_windows(sorted_prices, sorted_rows, tradersLst, price_range_percent=3, min_traders=3):
+    """Hotspot clusters of one asset's orders, given as (trigger, trader_index, short, order) rows
+    already sorted by trigger price; trader_index points into tradersLst."""
+    n_rows = len(sorted_rows)
+    sorted_prices = np.asarray(sorted_prices, dtype=np.float64)
+    traders = np.fromiter((row[1] for row in sorted_rows), dtype=np.int64, count=n_rows)
+    shorts = np.fromiter((row[2] for row in sorted_rows), dtype=np.bool_, count=n_rows)
+
+    starts = cluster_starts(sorted_prices, price_range_percent)
+    cluster_of = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n_rows)))
+
+    # Distinct traders per (cluster, direction): unique keys, then count them per cluster
+    n_traders = len(tradersLst) + 1
+    keys = np.unique((cluster_of * 2 + shorts) * n_traders + traders)
+    side_counts = np.bincount(keys // n_traders, minlength=2 * len(starts)).reshape(-1, 2)
+    qualifying = np.flatnonzero((side_counts >= min_traders).any(axis=1))
+
+    clusters = []
+    for cluster in qualifying:
+        start = starts[cluster]
+        stop = starts[cluster + 1] if cluster + 1 < len(starts) else n_rows
+        data = {'cluster_price': float(sorted_prices[start]), 'Long': [], 'Short': []}
+        for trigger_price, trader_index, short, order in sorted_rows[start:stop]:
+            trader = tradersLst[trader_index]
+            data["Short" if short else "Long"].append({
+                'trader_id': trader.traderID,
+                'price': trigger_price,
+                'type': order.orderType,
+                'trader_url': trader.url
+            })
+        clusters.append(data)
+    return clusters
+
+
 
 # Output formatting functions using Rich
 def print_long_short_data(long_short, long_short_size):
@@ -551,6 +841,98 @@ def print_pending_orders(pending_orders):
     console.print(table)
 
 
+def trigger_wall_rows(index, prices, window_percent=5):
+    """Per priced asset: spot, the nearest wall below and above it, and the trigger size within ±window_percent."""
+    rows = []
+    for asset in sorted(index.assets):
+        spot = prices.get(asset)
+        if spot is None:
+            continue
+        below = index.nearest_wall(asset, spot, above=False)
+        above = index.nearest_wall(asset, spot, above=True)
+        near = index.size_between(asset, spot * (1 - window_percent / 100), spot * (1 + window_percent / 100))
+        rows.append((
+            asset,
+            f"${spot:,.2f}",
+            f"${below['price_low']:,.2f}" if below else "-",
+            f"${below['total_size']:,.0f}" if below else "-",
+            f"${above['price_low']:,.2f}" if above else "-",
+            f"${above['total_size']:,.0f}" if above else "-",
+            f"${near:,.0f}",
+        ))
+    return rows
+
+
+def print_trigger_walls(index, prices, window_percent=5):
+    """Nearest order walls on either side of spot, and trigger size within ±window_percent of it."""
+    if index is None or not prices:
+        return
+
+    table = Table(title="Order Walls Around Spot")
+    table.add_column("Asset", justify="right", style="cyan")
+    table.add_column("Spot", justify="right", style="white")
+    table.add_column("Wall Below", justify="right", style="red")
+    table.add_column("Size Below", justify="right", style="red")
+    table.add_column("Wall Above", justify="right", style="green")
+    table.add_column("Size Above", justify="right", style="green")
+    table.add_column(f"Size ±{window_percent}%", justify="right", style="yellow")
+
+    for row in trigger_wall_rows(index, prices, window_percent):
+        table.add_row(*row)
+    console.print(table)
+
+
+def snapshot_diff_summary(diff):
+    summary = diff.summary()
+    return (f"Accounts: {summary['joined']} new, {summary['left']} gone | "
+            f"Positions: {summary['opened']} opened, {summary['closed']} closed, "
+            f"{summary['increased']} increased, {summary['reduced']} reduced | "
+            f"Orders: {summary['newOrders']} new, {summary['cancelledOrders']} cancelled")
+
+
+def position_change_rows(diff, n=15):
+    """The n largest position changes by size, as (change, asset, direction, previous size, size, delta, url)."""
+    changes = [("Opened", record) for record in diff.opened] + [("Closed", record) for record in diff.closed] \
+        + [("Increased", record) for record in diff.increased] + [("Reduced", record) for record in diff.reduced]
+    changes.sort(key=lambda item: -abs(item[1]['change']))
+    return [(kind, record['asset'], "Short" if record['short'] else "Long", f"${record['previousSize']:,}",
+             f"${record['size']:,}", f"{record['change']:+,}", record['url'])
+            for kind, record in changes[:n]]
+
+
+def order_change_rows(diff, n=15):
+    """The n largest new or cancelled orders, as (change, asset, direction, type, size, trigger, url)."""
+    orders = [("New", record) for record in diff.newOrders] + [("Cancelled", record) for record in diff.cancelledOrders]
+    orders.sort(key=lambda item: -abs(item[1]['size']))
+    return [(kind, record['asset'], "Short" if record['short'] else "Long", record['orderType'],
+             f"{'-' if record['size'] < 0 else ''}${abs(record['size']):,.2f}", f"{record['trigger']:.2f}", record['url'])
+            for kind, record in orders[:n]]
+
+
+POSITION_CHANGE_COLUMNS = ("Change", "Asset", "Direction", "Previous Size", "Size", "Delta", "URL")
+ORDER_CHANGE_COLUMNS = ("Change", "Asset", "Direction", "Order Type", "Size", "Trigger", "URL")
+
+
+def print_snapshot_diff(diff, n=15):
+    """Prints what changed since the previous scrape: accounts, the largest position changes, and orders."""
+    if diff is None:
+        console.print("[yellow]No previous snapshot to compare with.[/yellow]")
+        return
+
+    console.print(snapshot_diff_summary(diff))
+
+    for title, columns, rows in ((f"Largest Position Changes (top {n})", POSITION_CHANGE_COLUMNS, position_change_rows(diff, n)),
+                                 (f"Largest Order Changes (top {n})", ORDER_CHANGE_COLUMNS, order_change_rows(diff, n))):
+        if not rows:
+            continue
+        table = Table(title=title)
+        for column, style in zip(columns, ("cyan", "magenta", "white", "yellow", "yellow", "green", "yellow")):
+            table.add_column(column, justify="right", style=style)
+        for row in rows:
+            table.add_row(*row[:-1], f"[link={row[-1]}] {row[-1]} [/link]")
+        console.print(table)
+
+
 def print_order_hotspots(hotspots):
     """
     Prints out hotspots with details on traders and orders within each cluster.
@@ -0,0 +1,161 @@
+from .classes import Position, Order, Trader
+import numpy as np
+import datetime
+import json
+import os
+import shutil
+
+
+SNAPSHOT_VERSION = 1
+
+POSITION_COLUMNS = {
+  'asset': np.int16,
+  'leverage': np.float64,
+  'short': np.bool_,
+  'pnl': np.float64,
+  'pnlPerc': np.float64,
+  'collateral': np.float64,
+  'liq': np.float64,
+  'entry': np.float64
+}
+
+ORDER_COLUMNS = {
+  'asset': np.int16,
+  'short': np.bool_,
+  'orderType': np.int16,
+  'size': np.float64,
+  'trigger': np.float64
+}
+
+
+class Interner:
+  """Maps repeated strings (assets, order types) to small integer codes."""
+
+  def __init__(self, values=None) -> None:
+    self.values = list(values or [])
+    self.codes = {value: code for code, value in enumerate(self.values)}
+
+  def code(self, value) -> int:
+    if value not in self.codes:
+      self.codes[value] = len(self.values)
+      self.values.append(value)
+    return self.codes[value]
+
+
+class Snapshot:
+  """A columnar view of one scrape: a NumPy array per Position/Order field plus per-trader offsets.
+
+  Trader i owns positions[posOffsets[i]:posOffsets[i + 1]] and likewise for
+  orders. Assets and order types are stored as codes into `assets` and
+  `orderTypes`; a missing liquidation price is NaN.
+  """
+
+  def __init__(self, meta, positions, orders, posOffsets, ordOffsets) -> None:
+    self.meta = meta
+    self.assets = meta['assets']
+    self.orderTypes = meta['orderTypes']
+    self.urls = meta['urls']
+    self.traderIDs = meta['traderIDs']
+    self.positions = positions
+    self.orders = orders
+    self.posOffsets = posOffsets
+    self.ordOffsets = ordOffsets
+
+  def __len__(self) -> int:
+    return len(self.urls)
+
+  def trader(self, i, positions=True) -> Trader:
+    """Trader i as objects; without `positions` only its identity and orders are built."""
+    trader = Trader(self.traderIDs[i], self.urls[i])
+
+    start, end = int(self.posOffsets[i]), int(self.posOffsets[i + 1])
+    if positions and end > start:
+      cols = {name: self.positions[name][start:end].tolist() for name in POSITION_COLUMNS}
+      for j in range(end - start):
+        liq = cols['liq'][j]
+        trader.addPosition(Position(self.assets[cols['asset'][j]], cols['leverage'][j], cols['short'][j],
+                                    cols['pnl'][j], cols['pnlPerc'][j], cols['collateral'][j],
+                                    None if liq != liq else liq, cols['entry'][j]))
+
+    start, end = int(self.ordOffsets[i]), int(self.ordOffsets[i + 1])
+    if end > start:
+      cols = {name: self.orders[name][start:end].tolist() for name in ORDER_COLUMNS}
+      for j in range(end - start):
+        trader.addOrder(Order(self.assets[cols['asset'][j]], cols['short'][j],
+                              self.orderTypes[cols['orderType'][j]], cols['size'][j], cols['trigger'][j]))
+    return trader
+
+  def traders(self) -> list[Trader]:
+    """Materialises every Trader; mainAnalysis takes PositionFrame.from_snapshot(snapshot) instead."""
+    return [self.trader(i) for i in range(len(self))]
+
+
+def saveSnapshot(tradersLst, path) -> None:
+  """Writes the traders as one .npy file per column under `path`, replacing any previous snapshot."""
+  assets = Interner()
+  orderTypes = Interner()
+  positions = {name: [] for name in POSITION_COLUMNS}
+  orders = {name: [] for name in ORDER_COLUMNS}
+  posOffsets = [0]
+  ordOffsets = [0]
+
+  for trader in tradersLst:
+    for pos in trader.positions:
+      positions['asset'].append(assets.code(pos.asset))
+      positions['leverage'].append(pos.leverage)
+      positions['short'].append(pos.short)
+      positions['pnl'].append(pos.pnl)
+      positions['pnlPerc'].append(pos.pnlPerc)
+      positions['collateral'].append(pos.collateral)
+      positions['liq'].append(np.nan if pos.liq is None else pos.liq)
+      positions['entry'].append(pos.entry)
+    for order in trader.orders:
+      orders['asset'].append(assets.code(order.asset))
+      orders['short'].append(order.short)
+      orders['orderType'].append(orderTypes.code(order.orderType))
+      orders['size'].append(order.size)
+      orders['trigger'].append(order.trigger)
+    posOffsets.append(len(positions['asset']))
+    ordOffsets.append(len(orders['asset']))
+
+  meta = {
+    'version': SNAPSHOT_VERSION,
+    'created': datetime.datetime.now().isoformat(timespec='seconds'),
+    'assets': assets.values,
+    'orderTypes': orderTypes.values,
+    'urls': [trader.url for trader in tradersLst],
+    'traderIDs': [trader.traderID for trader in tradersLst]
+  }
+
+  tmpPath = path.rstrip(os.sep) + '.tmp'
+  shutil.rmtree(tmpPath, ignore_errors=True)
+  os.makedirs(tmpPath)
+
+  for name, dtype in POSITION_COLUMNS.items():
+    np.save(os.path.join(tmpPath, f'pos_{name}.npy'), np.asarray(positions[name], dtype=dtype))
+  for name, dtype in ORDER_COLUMNS.items():
+    np.save(os.path.join(tmpPath, f'ord_{name}.npy'), np.asarray(orders[name], dtype=dtype))
+  np.save(os.path.join(tmpPath, 'pos_offsets.npy'), np.asarray(posOffsets, dtype=np.int64))
+  np.save(os.path.join(tmpPath, 'ord_offsets.npy'), np.asarray(ordOffsets, dtype=np.int64))
+  with open(os.path.join(tmpPath, 'meta.json'), 'w', encoding='utf-8') as file:
+    json.dump(meta, file)
+
+  shutil.rmtree(path, ignore_errors=True)
+  os.rename(tmpPath, path)
+
+
+def loadSnapshot(path, mmap=True) -> Snapshot:
+  """Opens a snapshot; with `mmap` the columns are memory-mapped rather than read into memory."""
+  mode = 'r' if mmap else None
+
+  def column(name):
+    return np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+
+  with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as file:
+    meta = json.load(file)
+  if meta.get('version') != SNAPSHOT_VERSION:
+    raise ValueError(f"Unsupported snapshot version {meta.get('version')} in {path}")
+
+  positions = {name: column(f'pos_{name}') for name in POSITION_COLUMNS}
+  orders = {name: column(f'ord_{name}') for name in ORDER_COLUMNS}
+  return Snapshot(meta, positions, orders, column('pos_offsets'), column('ord_offsets'))
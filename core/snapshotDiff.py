@@ -0,0 +1,131 @@
+from .snapshot import Snapshot, POSITION_COLUMNS, ORDER_COLUMNS
+from collections import Counter
+
+
+class SnapshotDiff:
+  """What changed between two scrapes, keyed by trader URL.
+
+  A position is identified by (url, asset, short); positions of one trader
+  sharing that key are summed, as they add to one exposure. Orders have no
+  identity on the page, so they are compared as a multiset of
+  (url, asset, short, orderType, size, trigger): an edited order shows up as
+  one cancelled and one new order.
+  """
+
+  def __init__(self) -> None:
+    self.joined = []
+    self.left = []
+    self.opened = []
+    self.closed = []
+    self.increased = []
+    self.reduced = []
+    self.newOrders = []
+    self.cancelledOrders = []
+
+  def summary(self) -> dict:
+    return {name: len(getattr(self, name)) for name in
+            ('joined', 'left', 'opened', 'closed', 'increased', 'reduced', 'newOrders', 'cancelledOrders')}
+
+  def isEmpty(self) -> bool:
+    return not any(self.summary().values())
+
+
+def positionTotals(source) -> dict:
+  """{(url, asset, short): {'size', 'collateral', 'pnl'}} for a Snapshot or a list of Traders."""
+  totals = {}
+
+  def add(key, size, collateral, pnl):
+    entry = totals.get(key)
+    if entry is None:
+      totals[key] = {'size': size, 'collateral': collateral, 'pnl': pnl}
+    else:
+      entry['size'] += size
+      entry['collateral'] += collateral
+      entry['pnl'] += pnl
+
+  if isinstance(source, Snapshot):
+    cols = {name: source.positions[name].tolist() for name in POSITION_COLUMNS}
+    offsets = source.posOffsets.tolist()
+    for i, url in enumerate(source.urls):
+      for j in range(offsets[i], offsets[i + 1]):
+        collateral, leverage = cols['collateral'][j], cols['leverage'][j]
+        add((url, source.assets[cols['asset'][j]], cols['short'][j]),
+            int(collateral * leverage), collateral, cols['pnl'][j])
+  else:
+    for trader in source:
+      for pos in trader.positions:
+        add((trader.url, pos.asset, pos.short), pos.size, pos.collateral, pos.pnl)
+  return totals
+
+
+def orderCounts(source) -> Counter:
+  if isinstance(source, Snapshot):
+    cols = {name: source.orders[name].tolist() for name in ORDER_COLUMNS}
+    offsets = source.ordOffsets.tolist()
+    return Counter((url, source.assets[cols['asset'][j]], cols['short'][j], source.orderTypes[cols['orderType'][j]],
+                    cols['size'][j], cols['trigger'][j])
+                   for i, url in enumerate(source.urls) for j in range(offsets[i], offsets[i + 1]))
+  return Counter((trader.url, order.asset, order.short, order.orderType, order.size, order.trigger)
+                 for trader in source for order in trader.orders)
+
+
+def traderURLs(source) -> list:
+  return list(source.urls) if isinstance(source, Snapshot) else [trader.url for trader in source]
+
+
+def positionRecord(key, previous, current) -> dict:
+  url, asset, short = key
+  previousSize = previous['size'] if previous else 0
+  size = current['size'] if current else 0
+  return {'url': url, 'asset': asset, 'short': short, 'previousSize': previousSize, 'size': size,
+          'change': size - previousSize, 'pnl': (current or previous)['pnl']}
+
+
+def orderRecord(key, count) -> dict:
+  url, asset, short, orderType, size, trigger = key
+  return {'url': url, 'asset': asset, 'short': short, 'orderType': orderType, 'size': size,
+          'trigger': trigger, 'count': count}
+
+
+def diffSnapshots(previous, current) -> SnapshotDiff:
+  """Diffs two scrapes, each a Snapshot or a list of Traders, in time linear in their size.
+
+  Only accounts present in both scrapes are compared position by position,
+  so a trader who dropped off the leaderboard is reported under `left`
+  rather than as having closed everything.
+  """
+  diff = SnapshotDiff()
+  previousURLs = set(traderURLs(previous))
+  currentURLs = set(traderURLs(current))
+  diff.joined = sorted(currentURLs - previousURLs)
+  diff.left = sorted(previousURLs - currentURLs)
+  common = previousURLs & currentURLs
+
+  before = positionTotals(previous)
+  after = positionTotals(current)
+  for key, entry in after.items():
+    if key[0] not in common:
+      continue
+    old = before.get(key)
+    if old is None:
+      diff.opened.append(positionRecord(key, None, entry))
+    elif entry['size'] > old['size']:
+      diff.increased.append(positionRecord(key, old, entry))
+    elif entry['size'] < old['size']:
+      diff.reduced.append(positionRecord(key, old, entry))
+  for key, entry in before.items():
+    if key[0] in common and key not in after:
+      diff.closed.append(positionRecord(key, entry, None))
+
+  beforeOrders = orderCounts(previous)
+  afterOrders = orderCounts(current)
+  for key, count in (afterOrders - beforeOrders).items():
+    if key[0] in common:
+      diff.newOrders.append(orderRecord(key, count))
+  for key, count in (beforeOrders - afterOrders).items():
+    if key[0] in common:
+      diff.cancelledOrders.append(orderRecord(key, count))
+
+  for records in (diff.opened, diff.closed, diff.increased, diff.reduced):
+    records.sort(key=lambda record: -abs(record['change']))
+  return diff
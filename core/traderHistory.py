@@ -0,0 +1,248 @@
+from .classes import Position, Order, Trader, walletAddress
+from collections import Counter
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# A full copy of the book is stored after this many deltas, bounding how many deltas a lookup replays
+KEYFRAME_EVERY = 20
+
+
+def positionKey(position, seen) -> str:
+  """'ETH:L:0' style key; the counter tells apart positions of one trader sharing an asset and direction.
+
+  Such positions are told apart by page order only, so closing the first of
+  two reads as the second one being closed and the first one changing.
+  """
+  base = f"{position.asset}:{'S' if position.short else 'L'}"
+  index = seen[base]
+  seen[base] += 1
+  return f'{base}:{index}'
+
+
+def orderKey(order) -> str:
+  return json.dumps([order.asset, order.short, order.orderType, order.size, order.trigger])
+
+
+def bookOf(trader) -> dict:
+  """A trader's book as plain data: positions by key and orders as a multiset."""
+  seen = Counter()
+  return {'url': trader.url,
+          'positions': {positionKey(pos, seen): pos.toDict() for pos in trader.positions},
+          'orders': dict(Counter(orderKey(order) for order in trader.orders))}
+
+
+def bookDelta(old, new) -> dict:
+  """What turns book `old` into book `new`; empty when nothing changed.
+
+  New positions are stored whole under 'set'. For positions that were already
+  open only the fields that moved are stored under 'fields', so a scrape where
+  just pnl and pnlPerc ticked costs those two numbers, not the whole position.
+  """
+  delta = {}
+  opened = {}
+  fields = {}
+  for key, pos in new['positions'].items():
+    previous = old['positions'].get(key)
+    if previous is None:
+      opened[key] = pos
+    elif previous != pos:
+      fields[key] = {name: value for name, value in pos.items() if previous.get(name) != value}
+  dropped = [key for key in old['positions'] if key not in new['positions']]
+  orders = {key: new['orders'].get(key, 0) - old['orders'].get(key, 0)
+            for key in old['orders'].keys() | new['orders'].keys()}
+  orders = {key: change for key, change in orders.items() if change}
+  if opened:
+    delta['set'] = opened
+  if fields:
+    delta['fields'] = fields
+  if dropped:
+    delta['drop'] = dropped
+  if orders:
+    delta['orders'] = orders
+  if new['url'] != old['url']:
+    delta['url'] = new['url']
+  return delta
+
+
+def applyDelta(book, delta) -> dict:
+  positions = dict(book['positions'])
+  positions.update(delta.get('set', {}))
+  for key, fields in delta.get('fields', {}).items():
+    positions[key] = dict(positions[key], **fields)
+  for key in delta.get('drop', []):
+    positions.pop(key, None)
+  orders = Counter(book['orders'])
+  orders.update(delta.get('orders', {}))
+  return {'url': delta.get('url', book['url']), 'positions': positions,
+          'orders': {key: count for key, count in orders.items() if count > 0}}
+
+
+def encode(data) -> str:
+  return json.dumps(data, separators=(',', ':'))
+
+
+def traderFromBook(book, traderID=None) -> Trader:
+  trader = Trader(traderID, book['url'])
+  trader.addPositionLst([Position.fromDict(pos) for pos in book['positions'].values()])
+  for key, count in book['orders'].items():
+    asset, short, orderType, size, trigger = json.loads(key)
+    trader.addOrderLst([Order(asset, short, orderType, size, trigger) for _ in range(count)])
+  return trader
+
+
+class TraderHistory:
+  """Per-trader history of positions and orders, stored as deltas between scrapes.
+
+  Traders are keyed by wallet address, so the history follows a trader
+  across runs whatever their traderID. Each scrape of a trader appends a
+  delta against their previous book, or nothing if it is unchanged. Deltas
+  hold only the position fields that changed, so entry, leverage, collateral
+  and liquidation price are not repeated on every scrape that only moved
+  PnL. Every KEYFRAME_EVERY deltas a keyframe (the full book) is stored
+  instead, so rebuilding a book at any time replays at most that many deltas
+  from the nearest keyframe. Events live in one SQLite table keyed by (address, ts).
+  """
+
+  def __init__(self, path=None, keyframeEvery=KEYFRAME_EVERY) -> None:
+    self.path = path or ':memory:'
+    self.keyframeEvery = keyframeEvery
+    self.lock = threading.Lock()
+    # Latest book and deltas since the last keyframe, per address seen in this process
+    self.latest = {}
+    self.sinceKeyframe = {}
+
+    if self.path != ':memory:':
+      os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+    self.conn = sqlite3.connect(self.path, check_same_thread=False)
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute('CREATE TABLE IF NOT EXISTS trader_events (address TEXT NOT NULL, ts REAL NOT NULL, '
+                      'keyframe INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (address, ts)) WITHOUT ROWID')
+    self.conn.commit()
+
+  def record(self, traders, ts=None) -> int:
+    """Appends the current book of each trader, as of `ts`; returns how many events were written."""
+    ts = time.time() if ts is None else ts
+    rows = []
+    with self.lock:
+      for trader in traders:
+        address = trader.address
+        book = bookOf(trader)
+        previous = self.latestBook(address)
+        if previous is None or self.sinceKeyframe[address] + 1 >= self.keyframeEvery:
+          if previous is not None and not bookDelta(previous, book):
+            continue
+          rows.append((address, ts, 1, encode(book)))
+          self.sinceKeyframe[address] = 0
+        else:
+          delta = bookDelta(previous, book)
+          if not delta:
+            continue
+          rows.append((address, ts, 0, encode(delta)))
+          self.sinceKeyframe[address] += 1
+        self.latest[address] = book
+
+      with self.conn:
+        self.conn.executemany('INSERT OR REPLACE INTO trader_events VALUES (?, ?, ?, ?)', rows)
+    return len(rows)
+
+  def latestBook(self, address):
+    """The newest stored book of `address`, loaded from the file the first time it is asked for."""
+    if address not in self.latest:
+      events = self.eventsSinceKeyframe(address, None)
+      self.latest[address] = self.replay(events)
+      self.sinceKeyframe[address] = max(len(events) - 1, 0)
+    return self.latest[address]
+
+  def eventsSinceKeyframe(self, address, ts) -> list:
+    """Events from the last keyframe at or before `ts` (or the newest keyframe) up to `ts`, oldest first."""
+    bound, params = ('', [address]) if ts is None else (' AND ts <= ?', [address, ts])
+    row = self.conn.execute(f'SELECT ts FROM trader_events WHERE address = ? AND keyframe = 1{bound} '
+                            f'ORDER BY ts DESC LIMIT 1', params).fetchone()
+    if row is None:
+      return []
+    return self.conn.execute(f'SELECT ts, keyframe, data FROM trader_events WHERE address = ? AND ts >= ?{bound} '
+                             f'ORDER BY ts', [address, row[0]] + params[1:]).fetchall()
+
+  @staticmethod
+  def replay(events):
+    book = None
+    for _, keyframe, data in events:
+      book = json.loads(data) if keyframe else applyDelta(book, json.loads(data))
+    return book
+
+  # Queries found below
+
+  def bookAt(self, addressOrURL, ts=None, traderID=None):
+    """The trader's book as of `ts` (default: latest) as a Trader, or None if they were not seen by then."""
+    address = walletAddress(addressOrURL)
+    with self.lock:
+      book = self.replay(self.eventsSinceKeyframe(address, ts))
+    return None if book is None else traderFromBook(book, traderID)
+
+  def history(self, addressOrURL, start=None, end=None):
+    """Yields (ts, book) for the book as of `start`, then for every stored change up to `end`."""
+    address = walletAddress(addressOrURL)
+    with self.lock:
+      events = self.eventsSinceKeyframe(address, start) if start is not None else []
+      book = self.replay(events)
+      params = [address, events[-1][0] if events else float('-inf')]
+      bound = ''
+      if end is not None:
+        bound = ' AND ts <= ?'
+        params.append(end)
+      later = self.conn.execute(f'SELECT ts, keyframe, data FROM trader_events WHERE address = ? AND ts > ?{bound} '
+                                f'ORDER BY ts', params).fetchall()
+    if book is not None:
+      yield events[-1][0], book
+    for ts, keyframe, data in later:
+      book = json.loads(data) if keyframe else applyDelta(book, json.loads(data))
+      yield ts, book
+
+  def behaviour(self, addressOrURL, start=None, end=None) -> dict:
+    """Realised vs unrealised PnL and trading activity between start and end.
+
+    PnL is only observed at scrapes, so a close or reduction realises the
+    PnL last seen on that position (pro rata for a reduction); unrealised
+    PnL is that of the positions still open at `end`.
+    """
+    stats = {'realised_pnl': 0.0, 'unrealised_pnl': 0.0, 'opened': 0, 'increased': 0, 'reduced': 0,
+             'closed': 0, 'winning_closes': 0, 'orders_placed': 0, 'orders_cancelled': 0, 'snapshots': 0}
+    previous = None
+    for _, book in self.history(addressOrURL, start, end):
+      stats['snapshots'] += 1
+      if previous is not None:
+        for key, old in previous['positions'].items():
+          new = book['positions'].get(key)
+          oldSize = old['collateral'] * old['leverage']
+          newSize = new['collateral'] * new['leverage'] if new else 0.0
+          if new is None:
+            stats['closed'] += 1
+            stats['realised_pnl'] += old['pnl']
+            stats['winning_closes'] += old['pnl'] > 0
+          elif newSize < oldSize:
+            stats['reduced'] += 1
+            stats['realised_pnl'] += old['pnl'] * (1 - newSize / oldSize)
+          elif newSize > oldSize:
+            stats['increased'] += 1
+        stats['opened'] += sum(key not in previous['positions'] for key in book['positions'])
+        for key in previous['orders'].keys() | book['orders'].keys():
+          change = book['orders'].get(key, 0) - previous['orders'].get(key, 0)
+          stats['orders_placed' if change > 0 else 'orders_cancelled'] += abs(change)
+      previous = book
+
+    if previous is not None:
+      stats['unrealised_pnl'] = sum(pos['pnl'] for pos in previous['positions'].values())
+    stats['win_rate'] = stats['winning_closes'] / stats['closed'] if stats['closed'] else None
+    return stats
+
+  def addresses(self) -> list:
+    with self.lock:
+      return [row[0] for row in self.conn.execute('SELECT DISTINCT address FROM trader_events ORDER BY address')]
+
+  def close(self) -> None:
+    with self.lock:
+      self.conn.close()
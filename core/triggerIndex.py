@@ -0,0 +1,184 @@
+import numpy as np
+
+
+# Width of one heatmap price level, as a percent of price; levels are log-spaced so it holds for every asset
+DEFAULT_BUCKET_PERCENT = 0.5
+
+# Without an explicit size, a wall is a price level at or above this percentile of the asset's levels
+WALL_PERCENTILE = 90
+
+# Direction filters: either, longs only, shorts only
+SIDES = (None, False, True)
+
+
+def sparse_max(values):
+    """Sparse table for range-max queries: table[k][i] is max(values[i:i + 2**k])."""
+    table = [np.asarray(values, dtype=np.float64)]
+    width = 1
+    while 2 * width <= len(values):
+        previous = table[-1]
+        table.append(np.maximum(previous[:-width], previous[width:]))
+        width *= 2
+    return table
+
+
+def first_at_least(table, start, threshold):
+    """Index of the first value at or after `start` that is >= threshold, or len(values) if none is."""
+    n = len(table[0])
+    i = start
+    for k in range(len(table) - 1, -1, -1):
+        if i + (1 << k) <= n and table[k][i] < threshold:
+            i += 1 << k
+    return i
+
+
+def last_at_least(table, end, threshold):
+    """Index of the last value at or before `end` that is >= threshold, or -1 if none is."""
+    i = end
+    for k in range(len(table) - 1, -1, -1):
+        if i - (1 << k) + 1 >= 0 and table[k][i - (1 << k) + 1] < threshold:
+            i -= 1 << k
+    return i
+
+
+class TriggerIndex:
+    """Pending order triggers of one snapshot, indexed per asset for price-range queries.
+
+    Built once from the traders' orders. For every asset, and for every
+    direction / order type filter, triggers are kept sorted with a cumulative
+    size array, so the size between two prices is two searchsorted calls.
+    Triggers are also binned into log-spaced price levels (the heatmap), with
+    a range-max table over level sizes so the nearest level holding at least a
+    given size, a wall, is found in O(log levels) in either direction.
+
+    Sizes are absolute order sizes in USD; decrease orders scrape as negative.
+    """
+
+    def __init__(self, tradersLst, bucket_percent=DEFAULT_BUCKET_PERCENT):
+        self.bucket_percent = bucket_percent
+        self.log_step = np.log1p(bucket_percent / 100)
+
+        rows = [(order.asset, order.short, order.orderType, abs(order.size), order.trigger)
+                for trader in tradersLst for order in trader.orders if order.trigger and order.trigger > 0]
+        by_asset = {}
+        for row in rows:
+            by_asset.setdefault(row[0], []).append(row)
+
+        self.order_types = sorted({row[2] for row in rows})
+        self.ranges = {}
+        self.levels = {}
+        self.walls = {}
+        self.wall_sizes = {}
+        for asset, asset_rows in by_asset.items():
+            self.index_asset(asset, asset_rows)
+
+    @property
+    def assets(self):
+        return list(self.levels)
+
+    def index_asset(self, asset, rows):
+        n = len(rows)
+        triggers = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        sizes = np.fromiter((row[3] for row in rows), dtype=np.float64, count=n)
+        shorts = np.fromiter((row[1] for row in rows), dtype=np.bool_, count=n)
+        types = np.array([row[2] for row in rows], dtype=object)
+
+        order = np.argsort(triggers, kind='stable')
+        triggers, sizes, shorts, types = triggers[order], sizes[order], shorts[order], types[order]
+
+        # Sorted triggers and cumulative sizes for every (direction, order type) filter; None means any
+        for short in SIDES:
+            side_mask = np.ones(n, dtype=np.bool_) if short is None else shorts == short
+            for order_type in [None] + self.order_types:
+                mask = side_mask if order_type is None else side_mask & (types == order_type)
+                if order_type is not None and not mask.any():
+                    continue
+                self.ranges[(asset, short, order_type)] = (triggers[mask], np.append(0.0, np.cumsum(sizes[mask])))
+
+        # Heatmap: bin triggers into log-spaced levels and sum sizes per level and direction
+        buckets = np.floor(np.log(triggers) / self.log_step).astype(np.int64)
+        level_ids, level_of = np.unique(buckets, return_inverse=True)
+        n_levels = len(level_ids)
+        long_size = np.bincount(level_of, weights=np.where(shorts, 0.0, sizes), minlength=n_levels)
+        short_size = np.bincount(level_of, weights=np.where(shorts, sizes, 0.0), minlength=n_levels)
+        counts = np.bincount(level_of, minlength=n_levels)
+
+        self.levels[asset] = {
+            'low': np.exp(level_ids * self.log_step),
+            'high': np.exp((level_ids + 1) * self.log_step),
+            'long_size': long_size,
+            'short_size': short_size,
+            'total_size': long_size + short_size,
+            'orders': counts,
+        }
+        self.walls[asset] = {short: sparse_max(self.level_sizes(asset, short)) for short in SIDES}
+        self.wall_sizes[asset] = float(np.percentile(long_size + short_size, WALL_PERCENTILE))
+
+    def level_sizes(self, asset, short=None):
+        levels = self.levels[asset]
+        return levels['total_size'] if short is None else levels['short_size' if short else 'long_size']
+
+    # Queries found below
+
+    def size_between(self, asset, low, high, short=None, order_type=None):
+        """Total trigger size with low <= trigger <= high, optionally for one direction and order type."""
+        key = (asset, short, order_type)
+        if key not in self.ranges:
+            return 0.0
+        triggers, cumulative = self.ranges[key]
+        start = np.searchsorted(triggers, low, side='left')
+        stop = np.searchsorted(triggers, high, side='right')
+        return float(cumulative[max(stop, start)] - cumulative[start])
+
+    def count_between(self, asset, low, high, short=None, order_type=None):
+        key = (asset, short, order_type)
+        if key not in self.ranges:
+            return 0
+        triggers = self.ranges[key][0]
+        return int(max(0, np.searchsorted(triggers, high, side='right') - np.searchsorted(triggers, low, side='left')))
+
+    def nearest_wall(self, asset, spot, above=True, min_size=None, short=None):
+        """The closest price level above (or at/below) `spot` with at least `min_size` of triggers.
+
+        A level belongs above spot when its lower edge is above it. Without
+        `min_size` the asset's WALL_PERCENTILE level size is used. Returns a
+        dict with the level's price range and sizes, or None.
+        """
+        if asset not in self.levels:
+            return None
+        if min_size is None:
+            min_size = self.wall_sizes[asset]
+        levels = self.levels[asset]
+        table = self.walls[asset][short]
+        split = int(np.searchsorted(levels['low'], spot, side='right'))
+
+        if above:
+            i = first_at_least(table, split, min_size)
+            if i >= len(levels['low']):
+                return None
+        else:
+            i = last_at_least(table, split - 1, min_size)
+            if i < 0:
+                return None
+        return self.level(asset, i)
+
+    def level(self, asset, i):
+        levels = self.levels[asset]
+        return {
+            'price_low': float(levels['low'][i]),
+            'price_high': float(levels['high'][i]),
+            'long_size': float(levels['long_size'][i]),
+            'short_size': float(levels['short_size'][i]),
+            'total_size': float(levels['total_size'][i]),
+            'orders': int(levels['orders'][i]),
+        }
+
+    def heatmap(self, asset, low=None, high=None):
+        """Price levels of `asset`, ascending, optionally limited to those overlapping [low, high]."""
+        if asset not in self.levels:
+            return []
+        levels = self.levels[asset]
+        start = 0 if low is None else int(np.searchsorted(levels['high'], low, side='right'))
+        stop = len(levels['low']) if high is None else int(np.searchsorted(levels['low'], high, side='right'))
+        return [self.level(asset, i) for i in range(start, stop)]
+
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import defaultdict, deque
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from .routes import routes, accountRoutes
+
+
+# Upper bound (seconds) for each route before a wait gives up
+ROUTE_TIMEOUTS = {
+  'TABLE_X': 12,
+  'LAST30BUTTON_X': 7,
+  'LAST7BUTTON_X': 7,
+  'PAGE1_X': 7,
+  'PAGE2_X': 7,
+  'TOP_POS_X': 7,
+  'POSITIONS_TAB': 10,
+  'ORDERS_TAB': 10,
+  'TAB_CONTENT': 10,
+  'POS_TABLE': 7,
+  'ORD_TABLE': 7
+}
+
+# Resolves an XPath and returns the node's innerText in a single round trip
+NODE_TEXT_JS = """
+var node = document.evaluate(arguments[0], document, null,
+                             XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return node ? node.innerText : null;
+"""
+
+
+def routeXPath(route) -> str:
+  if route in routes:
+    return routes[route]
+  return accountRoutes[route]
+
+
+class WaitEngine:
+  """Condition-based waits on the XPaths in routes.py with per-route, self-tuning timeouts.
+
+  Every successful wait records how long the route took to render. Once a route
+  has `minSamples` observations its budget shrinks to `headroom` times the
+  slowest recent latency (never below `minTimeout`); if that budget runs out the
+  wait carries on up to the configured route timeout, so adapting can only save
+  time, never fail a page that would have loaded.
+  """
+
+  def __init__(self, timeouts=None, minTimeout=1.0, headroom=2.0, history=50,
+               minSamples=5, pollFrequency=0.1) -> None:
+    self.timeouts = dict(ROUTE_TIMEOUTS)
+    self.timeouts.update(timeouts or {})
+    self.minTimeout = minTimeout
+    self.headroom = headroom
+    self.minSamples = minSamples
+    self.pollFrequency = pollFrequency
+    self.latencies = defaultdict(lambda: deque(maxlen=history))
+    self.timeoutCounts = defaultdict(int)
+    self.lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    with self.lock:
+      self.started = time.monotonic()
+      self.waited = 0.0
+      self.waits = 0
+      # Seconds spent waiting per worker thread, and the wall-clock time during which any worker waited
+      self.workerWaits = defaultdict(float)
+      self.active = 0
+      self.activeSince = None
+      self.anyWaiting = 0.0
+
+  def begin(self):
+    with self.lock:
+      if self.active == 0:
+        self.activeSince = time.monotonic()
+      self.active += 1
+
+  def end(self, elapsed):
+    with self.lock:
+      self.workerWaits[threading.current_thread().name] += elapsed
+      self.active -= 1
+      if self.active == 0:
+        self.anyWaiting += time.monotonic() - self.activeSince
+
+  def budget(self, route) -> float:
+    limit = self.timeouts.get(route, max(self.timeouts.values()))
+    with self.lock:
+      samples = list(self.latencies[route])
+    if len(samples) < self.minSamples:
+      return limit
+    return min(limit, max(self.minTimeout, max(samples) * self.headroom))
+
+  def record(self, route, elapsed, success):
+    with self.lock:
+      self.waited += elapsed
+      self.waits += 1
+      if success:
+        self.latencies[route].append(elapsed)
+      else:
+        self.timeoutCounts[route] += 1
+
+  def until(self, driver, route, condition):
+    """Polls `condition(driver)` for `route`, returning its first truthy value."""
+    limit = self.timeouts.get(route, max(self.timeouts.values()))
+    budget = self.budget(route)
+    start = time.monotonic()
+    self.begin()
+
+    try:
+      try:
+        result = WebDriverWait(driver, budget, poll_frequency=self.pollFrequency).until(condition)
+      except TimeoutException:
+        remaining = limit - (time.monotonic() - start)
+        if remaining <= 0:
+          self.record(route, time.monotonic() - start, success=False)
+          raise
+        try:
+          result = WebDriverWait(driver, remaining, poll_frequency=self.pollFrequency).until(condition)
+        except TimeoutException:
+          self.record(route, time.monotonic() - start, success=False)
+          raise
+    finally:
+      self.end(time.monotonic() - start)
+
+    self.record(route, time.monotonic() - start, success=True)
+    return result
+
+  def waitFor(self, driver, route, populated=True):
+    """Waits until the route's element exists (and has text, if `populated`) and returns it."""
+    xpath = routeXPath(route)
+
+    def ready(driver):
+      text = driver.execute_script(NODE_TEXT_JS, xpath)
+      if text is None or (populated and not text.strip()):
+        return False
+      return True
+
+    self.until(driver, route, ready)
+    return driver.find_element(By.XPATH, xpath)
+
+  def currentText(self, driver, route):
+    """Returns the route's innerText right now, or None if it is not rendered."""
+    return driver.execute_script(NODE_TEXT_JS, routeXPath(route))
+
+  def waitForChange(self, driver, route, previous):
+    """Waits until the route's text differs from `previous`, e.g. after switching a table page.
+
+    Some clicks legitimately leave the table as it was (selecting the page that
+    is already shown), so a timeout here returns the current element instead of
+    raising.
+    """
+    xpath = routeXPath(route)
+
+    def changed(driver):
+      text = driver.execute_script(NODE_TEXT_JS, xpath)
+      return text is not None and text.strip() != '' and text != previous
+
+    try:
+      self.until(driver, route, changed)
+    except TimeoutException:
+      pass
+    return driver.find_element(By.XPATH, xpath)
+
+  def report(self) -> dict:
+    """Wait totals since reset().
+
+    'waiting' is wall-clock time during which at least one worker was
+    waiting (the union of all wait intervals), so 'working' = wall - waiting
+    is time when no worker was blocked on a page. 'workers' gives each
+    worker thread's own waiting time and its share of wall time; 'waited'
+    is the plain sum over workers.
+    """
+    budgets = {route: self.budget(route) for route in self.timeouts}
+    with self.lock:
+      now = time.monotonic()
+      wall = now - self.started
+      waiting = self.anyWaiting + (now - self.activeSince if self.active else 0.0)
+      return {
+        'wall': wall,
+        'waiting': waiting,
+        'working': max(0.0, wall - waiting),
+        'waited': self.waited,
+        'waits': self.waits,
+        'workers': {name: {'waiting': waited, 'share': waited / wall if wall else 0.0}
+                    for name, waited in sorted(self.workerWaits.items())},
+        'timeouts': dict(self.timeoutCounts),
+        'budgets': budgets
+      }
+
+  def printReport(self):
+    report = self.report()
+    wall = report['wall'] or 1
+    print('\n', ' Wait Report '.center(50, '_'))
+    print(f"Wall time: {report['wall']:.1f}s")
+    print(f"Waiting:   {report['waiting']:.1f}s ({report['waiting'] / wall * 100:.0f}%) with any worker waiting, "
+          f"over {report['waits']} waits")
+    print(f"Working:   {report['working']:.1f}s ({report['working'] / wall * 100:.0f}%) with no worker waiting")
+    if len(report['workers']) > 1:
+      for name, worker in report['workers'].items():
+        print(f"  {name}: waiting {worker['waiting']:.1f}s ({worker['share'] * 100:.0f}%)")
+    for route, count in report['timeouts'].items():
+      print(f'Timeouts on {route}: {count}')
+
+
+# Shared engine so every driver feeds the same latency history
+waitEngine = WaitEngine()
@@ -1,10 +1,45 @@
-from core.scraper import accountURLScraper, accountPageScraper
-from core.sentimentAnalysis import mainAnalysis
+from core.scraper import accountURLScraper, accountPageScraper, streamAccountPages, DriverPool
+from core.sentimentAnalysis import mainAnalysis, start_price_fetch, wait_for_price_refreshes
+from core.waits import waitEngine
+from core.htmlParser import replayAccountPages
+from core.fetcher import accountAPIScraper, DataFetcher
+from core.incremental import AccountStateStore, incrementalScrape
+from core.daemon import WhaleDaemon
+from core.checkpoint import ScrapeCheckpoint
+from core.aggregates import AggregateState
+from core.snapshot import saveSnapshot, loadSnapshot
+from core.positionFrame import PositionFrame
+from core.traderHistory import TraderHistory
+from core.history import MetricsHistory
 import tkinter as tk
+import argparse
+import concurrent.futures
 import time
 import os
 
 
+# Number of browser workers the account pages are sharded across
+WORKERS = 4
+
+# Every scrape is stored here so it can be re-analysed with --snapshot
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'latest.snapshot')
+
+# A partial report line is printed every this many scraped accounts
+PROGRESS_EVERY = 10
+
+# Completed accounts of an unfinished browser scrape; the next run resumes from it
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'scrape.checkpoint.jsonl')
+
+# Last scraped state per account, used by --incremental
+ACCOUNT_STATE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'accountState.json')
+
+# Headline metrics of every run, recorded by the daemon; one-shot runs record through mainAnalysis
+METRICS_HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'history.sqlite')
+
+# Per-trader position and order history, keyed by wallet address
+TRADER_HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'traderHistory.sqlite')
+
+
 def testData() -> list:
   traderURLS = [
                 'https://app.gmx.io/#/accounts/0x591b6F096281DD7b645767C96aC34863A4Df9a89?network=arbitrum&v=2',
@@ -15,9 +50,158 @@ def testData() -> list:
 
 
 
+def parseArgs():
+  parser = argparse.ArgumentParser(description='Scrape the GMX leaderboard and analyse whale positions.')
+  parser.add_argument('--workers', type=int, default=WORKERS,
+                      help='number of headless browser workers used for the account pages')
+  parser.add_argument('--backend', choices=['browser', 'http'], default='browser',
+                      help="render account pages in Firefox ('browser') or fetch them as JSON ('http')")
+  parser.add_argument('--api-base', metavar='URL',
+                      help='endpoint for --backend http, required: a service implementing the apiRoutes schema '
+                           'in core/routes.py (GMX has no such public API) or a core.fetcher.RecordedServer')
+  parser.add_argument('--record', metavar='DIR',
+                      help='store every HTTP backend response in DIR for replay through a RecordedServer')
+  parser.add_argument('--parse-mode', choices=['script', 'html'], default='script',
+                      help="read tables with one execute_script ('script') or parse the page source offline ('html')")
+  parser.add_argument('--save-pages', metavar='DIR',
+                      help='store leaderboard and account page sources in DIR for offline replay')
+  parser.add_argument('--snapshot', metavar='DIR', nargs='?', const=SNAPSHOT_PATH,
+                      help='analyse a stored columnar snapshot (default: the latest scrape) instead of scraping')
+  parser.add_argument('--replay', metavar='DIR',
+                      help='analyse page sources stored with --save-pages instead of scraping')
+  parser.add_argument('--incremental', action='store_true',
+                      help='only re-scrape accounts whose leaderboard row changed since the last run')
+  parser.add_argument('--fresh', action='store_true',
+                      help='ignore the checkpoint of an interrupted browser scrape instead of resuming it')
+  parser.add_argument('--lean', action='store_true',
+                      help='use a headless browser profile without images, web fonts or third-party hosts')
+  parser.add_argument('--daemon', action='store_true',
+                      help='keep running, refreshing the leaderboard, accounts and prices on their own schedules')
+  return parser.parse_args()
+
+
+def incrementalTraders(args) -> list:
+  """Runs the chosen backend over just the accounts that changed and merges in the rest from the state file.
+
+  Only the scrape is incremental: the merged list still goes through a full
+  mainAnalysis. Its vectorised pass takes milliseconds for a leaderboard's
+  worth of accounts, against seconds per account page, and its liquidation
+  curves, trigger index and snapshot diff are built over the whole book
+  anyway. The daemon is the path that folds changed accounts into an
+  AggregateState.
+  """
+  store = AccountStateStore(ACCOUNT_STATE_PATH)
+  signals = {}
+
+  if args.backend == 'http':
+    fetcher = DataFetcher(apiBase=args.api_base, workers=args.workers, recordDir=args.record)
+    try:
+      traderURLS = fetcher.leaderboardAccounts(signals)
+      result = incrementalScrape(traderURLS, signals, store, fetcher.fetchTraders)
+    finally:
+      fetcher.close()
+  else:
+    with DriverPool(size=args.workers, headless=args.workers > 1, lean=args.lean) as pool:
+      traderURLS = accountURLScraper(snapshotDir=args.save_pages, signals=signals, pool=pool)
+      scrapeFn = lambda urls: accountPageScraper(urls, workers=args.workers, parseMode=args.parse_mode,
+                                                 snapshotDir=args.save_pages, pool=pool)
+      result = incrementalScrape(traderURLS, signals, store, scrapeFn)
+      pool.printReport()
+    waitEngine.printReport()
+
+  print(f'Accounts refreshed: {len(result.changed)}, reused from last run: {len(result.unchanged)}, '
+        f'dropped off the leaderboard: {len(result.removed)}\n')
+  return result.traders
+
+
+def printProgress(report, total) -> None:
+  longs, shorts, _ = report['long_vs_short']
+  hotspots = sum(len(clusters) for clusters in report['hotspots'].values())
+  print(f"Partial report: {report['traders']}/{total} accounts, {report['positions']} positions "
+        f"({longs} long / {shorts} short), {hotspots} order hotspots, "
+        f"{len(report['risk_positions'])} near liquidation\n")
+
+
+def streamTraders(traderURLS, args, pool, checkpoint) -> list:
+  """Scrapes the account pages while folding each Trader into an AggregateState as it arrives.
+
+  Prices for newly seen assets are fetched in the background, one lookup at a
+  time, so liquidation checks run during the scrape too. Once the scrape is
+  done, the pending lookup is waited for and every asset still unpriced is
+  looked up, so the final report covers all of them.
+  """
+  state = AggregateState()
+  priced = set()
+  priceFuture = None
+
+  def applyPrices(future):
+    if future.exception() is None:
+      state.update_prices(future.result())
+
+  for trader in streamAccountPages(traderURLS, workers=args.workers, parseMode=args.parse_mode,
+                                   snapshotDir=args.save_pages, pool=pool, checkpoint=checkpoint):
+    state.add_trader(trader)
+    if len(state) % PROGRESS_EVERY:
+      continue
+
+    unpriced = set(state.assets) - priced
+    if unpriced and (priceFuture is None or priceFuture.done()):
+      priced |= unpriced
+      priceFuture = start_price_fetch(unpriced)
+      priceFuture.add_done_callback(applyPrices)
+    printProgress(state.report(), len(traderURLS))
+
+  # Assets first seen after the last progress line, or while a lookup was running, are priced now
+  if priceFuture is not None:
+    concurrent.futures.wait([priceFuture])
+    applyPrices(priceFuture)
+  unpriced = set(state.assets) - set(state.prices)
+  if unpriced:
+    priceFuture = start_price_fetch(unpriced)
+    concurrent.futures.wait([priceFuture])
+    applyPrices(priceFuture)
+  if len(state):
+    printProgress(state.report(), len(traderURLS))
+
+  return sorted(state.traders, key=lambda trader: trader.traderID)
+
+
+def runDaemon(args) -> None:
+  """Runs a WhaleDaemon until interrupted, printing a line whenever a new analysis is published."""
+  traderHistory = TraderHistory(TRADER_HISTORY_PATH)
+  metricsHistory = MetricsHistory(METRICS_HISTORY_PATH)
+  daemon = WhaleDaemon(backend=args.backend, workers=args.workers, apiBase=args.api_base,
+                       parseMode=args.parse_mode, lean=args.lean,
+                       traderHistory=traderHistory, metricsHistory=metricsHistory)
+  daemon.start()
+  seen = 0
+  try:
+    while True:
+      time.sleep(5)
+      if daemon.version == seen:
+        continue
+      seen = daemon.version
+      analysis = daemon.latestAnalysis()
+      risky = len(analysis['risk_positions'] or [])
+      print(f"[{time.strftime('%H:%M:%S')}] {analysis['traders']} traders ({analysis['pending_accounts']} pending), "
+            f"{analysis['positions']} positions, {risky} near liquidation\n")
+  except KeyboardInterrupt:
+    pass
+  finally:
+    daemon.stop()
+    traderHistory.close()
+    metricsHistory.close()
+
+
 def main():
+  args = parseArgs()
+
+  if args.daemon:
+    runDaemon(args)
+    return
 
   startTime = time.time()
+  waitEngine.reset()
 
   data_dir = os.path.join(os.path.dirname(__file__), 'data')
   if not os.path.exists(data_dir):
@@ -25,12 +209,50 @@ def main():
   
   # traderURLS = list(accountURLScraper())
   # traderURLS = traderURLS[44:62]
-  traderURLS = accountURLScraper()
-  lstOfTraders = accountPageScraper(traderURLS)
+  if args.snapshot:
+    # Positions go into the analysis as the snapshot's columns, without building Position objects
+    lstOfTraders = PositionFrame.from_snapshot(loadSnapshot(args.snapshot))
+  elif args.replay:
+    lstOfTraders = replayAccountPages(args.replay)
+  elif args.incremental:
+    lstOfTraders = incrementalTraders(args)
+  elif args.backend == 'http':
+    lstOfTraders = accountAPIScraper(apiBase=args.api_base, workers=args.workers, recordDir=args.record)
+  else:
+    checkpoint = ScrapeCheckpoint(CHECKPOINT_PATH)
+    if args.fresh:
+      checkpoint.reset()
+
+    # One set of browsers serves both the leaderboard and the account pages
+    with DriverPool(size=args.workers, headless=args.workers > 1, lean=args.lean) as pool:
+      traderURLS = accountURLScraper(snapshotDir=args.save_pages, pool=pool)
+      lstOfTraders = streamTraders(traderURLS, args, pool, checkpoint)
+      pool.printReport()
+    waitEngine.printReport()
+
+    if checkpoint.isComplete(traderURLS):
+      checkpoint.finish()
+    else:
+      print(f'Scrape incomplete: analysing {len(lstOfTraders)} of {len(traderURLS)} accounts '
+            f'({len(checkpoint.failed)} failed). Run again to resume from {CHECKPOINT_PATH}\n')
+
+  # The previous scrape is read into memory before this one replaces it on disk
+  previous = None
+  if not args.snapshot and os.path.exists(SNAPSHOT_PATH):
+    previous = loadSnapshot(SNAPSHOT_PATH, mmap=False)
+  if not args.snapshot:
+    saveSnapshot(lstOfTraders, SNAPSHOT_PATH)
+  # Replayed pages are from an unknown time, so only live scrapes go into the history
+  if not args.snapshot and not args.replay:
+    history = TraderHistory(TRADER_HISTORY_PATH)
+    history.record(lstOfTraders)
+    history.close()
 
   # root = tk.Tk()
-  mainAnalysis(lstOfTraders)
+  mainAnalysis(lstOfTraders, previous=previous)
   # root.mainloop()
+  # Background price refreshes run on a daemon thread; let them land in the cache before the process exits
+  wait_for_price_refreshes(timeout=30)
   endTime = time.time()
   timeTakenMinutes = int(endTime - startTime) / 60
   
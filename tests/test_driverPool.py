@@ -0,0 +1,77 @@
+from core.scraper import DriverPool
+from selenium.common.exceptions import WebDriverException
+import pytest
+import threading
+
+
+class FakeDriver:
+  def __init__(self) -> None:
+    self.alive = True
+
+  @property
+  def current_url(self):
+    if not self.alive:
+      raise WebDriverException('browser is gone')
+    return 'about:blank'
+
+  def quit(self):
+    self.alive = False
+
+
+class FlakyFactory:
+  """Launches FakeDrivers, raising on the launches listed in `failOn` (1-based)."""
+
+  def __init__(self, failOn=()) -> None:
+    self.failOn = set(failOn)
+    self.calls = 0
+
+  def __call__(self):
+    self.calls += 1
+    if self.calls in self.failOn:
+      raise RuntimeError('Firefox failed to start')
+    return FakeDriver()
+
+
+def acquireWithin(pool, seconds=2):
+  """acquire() on a thread, failing the test instead of hanging if it blocks."""
+  result = {}
+  thread = threading.Thread(target=lambda: result.setdefault('pooled', pool.acquire()), daemon=True)
+  thread.start()
+  thread.join(seconds)
+  assert not thread.is_alive(), 'acquire() blocked'
+  return result['pooled']
+
+
+def test_failed_relaunch_gives_up_the_slot():
+  pool = DriverPool(size=1, factory=FlakyFactory(failOn={2}))
+  pooled = pool.acquire()
+  pooled.driver.quit()
+  pool.release(pooled)
+
+  # The health check fails and the relaunch raises
+  with pytest.raises(RuntimeError):
+    pool.acquire()
+  assert pool.launched == 0 and pool.drivers == []
+
+  # The next acquire launches a fresh driver instead of waiting on the lost slot
+  fresh = acquireWithin(pool)
+  assert fresh.driver.alive and fresh.driverID != pooled.driverID
+  assert pool.launched == 1 and pool.drivers == [fresh]
+
+
+def test_retired_driver_is_not_released_back():
+  pool = DriverPool(size=1, recycleAfter=1, factory=FlakyFactory(failOn={2}))
+  pooled = pool.acquire()
+  with pytest.raises(RuntimeError):
+    pool.countPage(pooled)
+  pool.release(pooled)
+
+  assert pool.idle.empty()
+  assert acquireWithin(pool).driver.alive
+
+
+def test_launch_failure_frees_the_slot():
+  pool = DriverPool(size=1, factory=FlakyFactory(failOn={1}))
+  with pytest.raises(RuntimeError):
+    pool.acquire()
+  assert acquireWithin(pool).driver.alive
@@ -0,0 +1,87 @@
+from core.fetcher import DataFetcher, RecordedServer, accountAPIScraper, recordingName
+import os
+import pytest
+import requests
+
+
+# Responses in the layout DataFetcher(recordDir=...) stores them, for the placeholder apiRoutes schema
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'api')
+
+WHALE = 'https://app.gmx.io/#/accounts/0x591b6F096281DD7b645767C96aC34863A4Df9a89?network=arbitrum&v=2'
+EMPTY = 'https://app.gmx.io/#/accounts/0x4Cd80aa0CE4881Eb8679EdA1f6fbe3d89AEc0F7F?network=arbitrum&v=2'
+UNRECORDED = 'https://app.gmx.io/#/accounts/0x' + '0' * 40 + '?network=arbitrum&v=2'
+
+
+@pytest.fixture
+def server():
+  with RecordedServer(FIXTURES) as server:
+    yield server
+
+
+def test_leaderboard_accounts_and_signals(server):
+  fetcher = DataFetcher(apiBase=server.url, workers=2)
+  signals = {}
+  try:
+    urls = fetcher.leaderboardAccounts(signals)
+  finally:
+    fetcher.close()
+
+  assert urls == {WHALE, EMPTY}
+  assert signals[WHALE] == ['125000.5|2400000.0|2']
+
+
+def test_traders_through_recorded_server(server):
+  traders = accountAPIScraper(apiBase=server.url, workers=2)
+
+  # IDs follow sorted URL order, like the browser scraper
+  assert [trader.url for trader in traders] == sorted([WHALE, EMPTY])
+  whale = next(trader for trader in traders if trader.url == WHALE)
+  empty = next(trader for trader in traders if trader.url == EMPTY)
+  assert empty.positions == [] and empty.orders == []
+
+  eth, btc = whale.positions
+  assert (eth.asset, eth.short, eth.leverage, eth.collateral, eth.liq) == ('ETH', False, 12.5, 20000.0, 2310.4)
+  assert eth.size == 250000
+  assert (btc.asset, btc.short, btc.liq) == ('BTC', True, None)
+
+  # Contract order types, by name or number, come out as the account page labels
+  assert [(order.asset, order.orderType, order.size, order.trigger) for order in whale.orders] == [
+    ('ETH', 'Limit', 50000.0, 2350.0),
+    ('ETH', 'Stop Loss', -250000.0, 2320.0),
+    ('BTC', 'Take Profit', -90000.0, 64000.0),
+  ]
+
+
+def test_record_then_replay(server, tmp_path):
+  fetcher = DataFetcher(apiBase=server.url, workers=2, recordDir=str(tmp_path))
+  try:
+    fetcher.fetchTrader(0, WHALE)
+  finally:
+    fetcher.close()
+
+  stored = sorted(os.listdir(tmp_path))
+  assert stored == sorted([recordingName('/accounts/0x591b6F096281DD7b645767C96aC34863A4Df9a89/positions'),
+                           recordingName('/accounts/0x591b6F096281DD7b645767C96aC34863A4Df9a89/orders')])
+
+
+def test_missing_recording_is_an_error(server):
+  fetcher = DataFetcher(apiBase=server.url, workers=1)
+  try:
+    with pytest.raises(requests.HTTPError) as error:
+      fetcher.fetchTrader(0, UNRECORDED)
+  finally:
+    fetcher.close()
+  assert error.value.response.status_code == 404
+
+
+def test_failed_account_is_skipped(server, capsys):
+  traders = accountAPIScraper([WHALE, UNRECORDED, EMPTY], apiBase=server.url, workers=2)
+
+  # The unrecorded account sorts first and is dropped; the others keep their IDs
+  assert [(trader.traderID, trader.url) for trader in traders] == [(1, EMPTY), (2, WHALE)]
+  assert 'Failed to fetch Trader # 0' in capsys.readouterr().out
+
+
+def test_no_default_endpoint():
+  with pytest.raises(ValueError):
+    DataFetcher()